@@ -0,0 +1,61 @@
+'''
+import-time benchmark for the mat_ceng package
+
+compares `import mat_ceng` (lazy) with importing the package and touching the
+heavy modules (what the old eager __init__ did). each case runs in a fresh
+interpreter so nothing is cached between runs.
+
+usage:
+    python benchmarks/bench_import_time.py --runs 20
+'''
+import argparse
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+
+src_folder = pathlib.Path(__file__).parents[1] / 'src'
+
+cases = {
+    'baseline (python -c pass)': 'pass',
+    'import mat_ceng (lazy)': 'import mat_ceng',
+    'import mat_ceng + csi + column_area (eager)': 'import mat_ceng; mat_ceng.csi; mat_ceng.get_column_area_loads',
+}
+
+timing_code = '''
+import time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+'''
+
+
+def time_statement(statement:str, runs:int) -> list[float]:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(src_folder), env.get('PYTHONPATH')]))
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', timing_code.format(statement=statement)],
+            capture_output=True, text=True, env=env, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    results = {name: statistics.median(time_statement(statement, args.runs)) for name, statement in cases.items()}
+    for name, median in results.items():
+        print(f'{name:<48} {median * 1e3:8.1f} ms')
+
+    lazy = results['import mat_ceng (lazy)']
+    eager = results['import mat_ceng + csi + column_area (eager)']
+    print(f'{"startup reduction":<48} {(eager - lazy) * 1e3:8.1f} ms ({eager / lazy:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
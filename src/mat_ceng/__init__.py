@@ -4,15 +4,53 @@ Package For Some Civil Engineering Tools
 
 __version__ = '0.0.22'
 
+import importlib
+from typing import TYPE_CHECKING
 
 
 from mat_ceng.mat_ceng import (say_hi)
 from mat_ceng.column import(
     Material,Load_Case,Section_Dimensions,Column,
     calculate_column_actual_moment_of_inertia,
+    calculate_section_actual_moment_of_inertia,
     calculate_minor_delta_ns,
     calculate_major_delta_ns,
     calculate_Cm,
     calculate_Ise)
-from mat_ceng.column_area import (get_column_area_loads)
-import mat_ceng.csi as csi
\ No newline at end of file
+
+# heavy modules (pythonnet/.NET runtime, shapely, pandas) are only imported
+# on first attribute access, so `import mat_ceng` stays cheap
+_lazy_modules = {
+    'csi': 'mat_ceng.csi',
+    'column_area': 'mat_ceng.column_area',
+    'csi_interop': 'mat_ceng.csi_interop',
+    'revit_interop': 'mat_ceng.revit_interop',
+    'geotechnical': 'mat_ceng.geotechnical',
+    'structural': 'mat_ceng.structural',
+    'surveying': 'mat_ceng.surveying',
+    'utils': 'mat_ceng.utils',
+}
+_lazy_attributes = {
+    'get_column_area_loads': ('mat_ceng.column_area', 'get_column_area_loads'),
+}
+
+if TYPE_CHECKING:
+    import mat_ceng.csi as csi
+    from mat_ceng.column_area import (get_column_area_loads)
+
+
+def __getattr__(name):
+    if name in _lazy_modules:
+        module = importlib.import_module(_lazy_modules[name])
+        globals()[name] = module
+        return module
+    if name in _lazy_attributes:
+        module_name, attribute = _lazy_attributes[name]
+        value = getattr(importlib.import_module(module_name), attribute)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_modules) | set(_lazy_attributes))
@@ -1,5 +1,11 @@
 from dataclasses import dataclass
 import math
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from mat_ceng.utils.geometry_helpers import SectionProperties
 
 @dataclass
 class Material:
@@ -74,6 +80,40 @@ def calculate_column_actual_moment_of_inertia(material:Material, dimensions:Sect
             'ratio':(round(I22/Ig_22,rounding_digits),round(I33/Ig_33,rounding_digits))}
 
 
+def calculate_section_actual_moment_of_inertia(material:Material, section:'SectionProperties', rft_ratio,
+                                               Pu, Mu_22, Mu_33, local_axis_angle=0.0, rounding_digits:int = 3) -> dict:
+    '''
+    calculate_column_actual_moment_of_inertia for any cross section polygons, vectorized
+    as per ACI318-19 Table 6.6.3.1.1(b)
+    section: properties of the cross_section_coord polygons (mat_ceng.utils.loop_properties),
+             the results are about its principal axes, 3-3 the major one and 2-2 the minor one
+    rft_ratio, Pu (N): floats or one value per section
+    Mu_22, Mu_33: signed moments about the frame local axes 2 and 3 as per ETABS, N*mm
+    local_axis_angle: angle of the local axis 2 from the global x axis, degrees (ETABS column
+                      default 0, local axis 3 at +90), the moments are resolved onto the principal axes
+    '''
+    Ag = section.area # gross area of concrete section, mm²
+    Ast = Ag * np.asarray(rft_ratio, dtype=float) # total area of longitudinal reinforcement bars, mm²
+    Pu = np.asarray(Pu, dtype=float)
+    Po = 0.85 * material.fc * (Ag - Ast) + material.fy * Ast # 22.4.2.2 nominal axial strength at zero eccentricity, N
+    safe_Pu = np.where(Pu > 0, Pu, 1.0)
+
+    # moment vector Mu_22 e2 + Mu_33 e3 on the major (angle) and minor principal axes
+    delta = section.angle - np.radians(local_axis_angle)
+    Mu_22, Mu_33 = np.asarray(Mu_22, dtype=float), np.asarray(Mu_33, dtype=float)
+    Mu_major = Mu_22 * np.cos(delta) + Mu_33 * np.sin(delta)
+    Mu_minor = Mu_33 * np.cos(delta) - Mu_22 * np.sin(delta)
+
+    result = []
+    for Ig, Mu, h in ((section.I2, Mu_minor, section.depth_2), (section.I1, Mu_major, section.depth_1)):
+        I_calculated = (0.8 + 25 * Ast / Ag) * (1 - np.abs(Mu) / (safe_Pu * h) - 0.5 * (Pu / Po)) * Ig # Table 6.6.3.1.1(b)
+        I_calculated = np.where(Pu <= 0, 0.35 * Ig, I_calculated)
+        I = np.clip(I_calculated, 0.35 * Ig, 0.875 * Ig)
+        result.append((np.round(I, rounding_digits), np.round(I / Ig, rounding_digits)))
+    (I22, ratio_22), (I33, ratio_33) = result
+    return {'moment_of_inertia':(I22, I33), 'ratio':(ratio_22, ratio_33)}
+
+
 def calculate_Ise(bar_count:float, bar_size:float, section_depth:float, concrete_cover:float) -> float:
     '''
     moment of inertia of reinforcement about centroidal axis of member cross section, mm⁴
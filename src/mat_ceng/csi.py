@@ -22,17 +22,17 @@ Provides a CsiHelper class using class methods to manage a shared connection sta
 #         sys.exit(1)
 # import clr
 
+import asyncio
+import functools
 import logging
+import queue
 import sys
-from typing import Optional, Dict, Any, List, Tuple, Union # Added Union
-
-# Configure basic logging - Users can reconfigure this in their main script if needed
-# Example: logging.basicConfig(level=logging.DEBUG, ...)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+import threading
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List, Tuple, Union, Callable # Added Union
+
+# The library does not configure logging; applications do, e.g.
+# logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__) # Use a module-specific logger
 
 # --- Constants ---
@@ -74,6 +74,16 @@ class CsiHelper:
         2. CsiHelper.connect_to_etabs() or CsiHelper.connect_to_sap()
         3. Use the returned SapModel object or helper functions (e.g., add_area).
         4. CsiHelper.release_connection() when done.
+
+    Worker thread usage (COM objects stay on the thread that created them):
+        1. CsiHelper.start_worker()
+        2. future = CsiHelper.submit(CsiHelper.connect_to_etabs, unit='N_mm_C')
+           All API traffic submitted this way runs on the one worker thread,
+           while the calling thread is free for parsing or geometry work.
+           From asyncio code use `await CsiHelper.asubmit(...)`.
+           The helper functions of this module (add_etabs_area, get_etabs_groups,
+           ...) route themselves through the worker while it is running.
+        3. CsiHelper.stop_worker() when done (releases the connection on the worker).
     """
     # --- Class Variables for State ---
     _sap_module: Optional[Any] = None
@@ -87,6 +97,10 @@ class CsiHelper:
     _initialized: bool = False
     _sap_dll_path: Optional[str] = None
     _etabs_dll_path: Optional[str] = None
+    _worker: Optional[threading.Thread] = None # Dedicated thread owning the COM objects
+    _requests: Optional[queue.Queue] = None # (Future, callable, args, kwargs) items for the worker
+    _worker_lock = threading.Lock() # Guards enqueueing against stop_worker()
+    _stopping: bool = False # Set by stop_worker(); submit() rejects new requests
 
     # --- Initialization ---
     @classmethod
@@ -413,6 +427,147 @@ class CsiHelper:
         logger.info("CSI connection references have been released.")
         # Note: Libraries remain loaded (_initialized remains True)
 
+    # --- Worker Thread ---
+    @classmethod
+    def start_worker(cls) -> None:
+        """
+        Starts the dedicated worker thread that runs all submitted API calls.
+
+        Connect through submit() after starting the worker so the COM objects
+        are created on the worker thread. Does nothing if already running; if
+        a worker is still stopping, waits for it to finish first so only one
+        thread ever owns the COM objects.
+        """
+        while True:
+            with cls._worker_lock:
+                stopping = cls._worker if cls._stopping else None
+                if stopping is None:
+                    if cls.worker_running():
+                        logger.debug("CsiHelper worker already running.")
+                        return
+                    cls._requests = queue.Queue()
+                    cls._worker = threading.Thread(target=cls._worker_loop, args=(cls._requests,),
+                                                   name="CsiHelperWorker", daemon=True)
+                    cls._worker.start()
+                    break
+            if stopping is threading.current_thread():
+                raise RuntimeError("CsiHelper worker can not be restarted from its own thread while stopping.")
+            stopping.join()
+        logger.info("CsiHelper worker thread started.")
+
+    @classmethod
+    def _worker_loop(cls, requests: queue.Queue) -> None:
+        """Internal loop executing queued requests in submission order."""
+        while True:
+            item = requests.get()
+            if item is None: # Stop sentinel
+                requests.task_done()
+                break
+            cls._run(*item)
+            requests.task_done()
+        # Nothing is enqueued after the sentinel (submit() checks _stopping under
+        # the lock); fail anything left anyway so no caller waits forever.
+        while True:
+            try:
+                item = requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[0].set_running_or_notify_cancel():
+                item[0].set_exception(RuntimeError("CsiHelper worker stopped before running the request."))
+            requests.task_done()
+        # The stopping state is cleared here, once nothing runs on this thread
+        # anymore, so submit() never runs inline (and start_worker() never starts
+        # a second thread) while this one still drains the queue.
+        with cls._worker_lock:
+            if cls._worker is threading.current_thread():
+                cls._worker = None
+                cls._requests = None
+                cls._stopping = False
+        logger.info("CsiHelper worker thread stopped.")
+
+    @staticmethod
+    def _run(future: Future, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        """Runs fn and stores its result or exception in the future."""
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+    @classmethod
+    def worker_running(cls) -> bool:
+        """Returns True if the worker thread is alive."""
+        return cls._worker is not None and cls._worker.is_alive()
+
+    @classmethod
+    def submit(cls, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        Schedules fn(*args, **kwargs) on the worker thread.
+
+        If the worker is not running, or submit() is called from the worker
+        itself (e.g., a helper calling another helper), fn runs immediately
+        on the calling thread and a completed Future is returned.
+
+        Args:
+            fn (Callable[..., Any]): Any callable using the CSI API, e.g. a helper
+                                     function of this module or a lambda taking
+                                     CsiHelper.get_active_sapmodel().
+
+        Returns:
+            Future: Resolves to the return value of fn, or raises its exception.
+        """
+        future: Future = Future()
+        with cls._worker_lock:
+            if cls._stopping:
+                raise RuntimeError("CsiHelper worker is stopping; request rejected.")
+            queued = cls.worker_running() and threading.current_thread() is not cls._worker
+            if queued:
+                cls._requests.put((future, fn, args, kwargs))
+        if not queued:
+            cls._run(future, fn, args, kwargs)
+        return future
+
+    @classmethod
+    def call(cls, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Runs fn on the worker thread and waits for its result."""
+        return cls.submit(fn, *args, **kwargs).result()
+
+    @classmethod
+    def asubmit(cls, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> "asyncio.Future":
+        """
+        asyncio-compatible submit(): `result = await CsiHelper.asubmit(fn, ...)`.
+
+        The request is queued immediately, so the worker runs it while the
+        coroutine carries on until it awaits the returned future.
+        """
+        return asyncio.wrap_future(cls.submit(fn, *args, **kwargs))
+
+    @classmethod
+    def stop_worker(cls, release: bool = True, wait: bool = True) -> None:
+        """
+        Stops the worker thread after the already queued requests.
+
+        submit() raises RuntimeError until the worker thread has exited (it
+        clears the stopping state itself); requests that could not run are
+        failed with RuntimeError instead of being left pending.
+
+        Args:
+            release (bool): If True (default), releases the CSI connection on
+                            the worker thread before stopping.
+            wait (bool): If True (default), blocks until the thread has finished.
+        """
+        with cls._worker_lock:
+            if not cls.worker_running() or cls._stopping:
+                logger.debug("CsiHelper worker is not running.")
+                return
+            cls._stopping = True
+            if release:
+                cls._requests.put((Future(), cls.release_connection, (), {}))
+            worker = cls._worker
+            cls._requests.put(None)
+        if wait and worker is not threading.current_thread():
+            worker.join()
+
     # --- Utility Methods ---
     @classmethod
     def refresh_view(cls) -> None:
@@ -494,6 +649,17 @@ class CsiHelper:
 
 # --- Helper Functions (using the CsiHelper class directly) ---
 
+def _on_worker(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Runs the decorated helper through CsiHelper.call(), i.e. on the worker
+    thread while it is running and inline otherwise (or when already on it).
+    """
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return CsiHelper.call(fn, *args, **kwargs)
+    return wrapper
+
+
 # Note: Consider moving geometry-specific helpers to a separate module if they grow.
 def _get_warning_area_arguments(locations: List[float], size: float = 500.0) -> Dict[str, Any]:
     """
@@ -531,6 +697,7 @@ def _get_warning_area_arguments(locations: List[float], size: float = 500.0) ->
         'CSys': csys
     }
 
+@_on_worker
 def add_etabs_area(AddByCoord_args: Dict[str, Any]) -> Optional[str]:
     """
     Adds a area object in ETABS at the specified coordinates.
@@ -574,6 +741,7 @@ def add_etabs_area(AddByCoord_args: Dict[str, Any]) -> Optional[str]:
         logger.exception(f"An unexpected error occurred during add_area:") # Includes traceback
         return None
 
+@_on_worker
 def add_etabs_warning_mark(
         location: List[float],
         size: float = 500.0,
@@ -631,18 +799,23 @@ def add_etabs_warning_mark(
 
 
 
-def get_etabs_groups() -> Optional[List[str]]:
+@_on_worker
+def get_etabs_groups(SapModel: Optional[Any] = None) -> Optional[List[str]]:
     """
     Retrieves a list of all group names defined in the current ETABS model.
 
     Connects to ETABS using CsiHelper if not already connected.
 
+    Args:
+        SapModel (Optional[Any]): ETABS SapModel. Defaults to the shared CsiHelper connection.
+
     Returns:
         Optional[List[str]]: A list of group names, or None on failure.
     """
     logger.debug("Attempting to retrieve ETABS groups.")
     try:
-        SapModel = CsiHelper.connect_to_etabs(unit=None)
+        if SapModel is None:
+            SapModel = CsiHelper.connect_to_etabs(unit=None)
 
         etabs_groups = {
             'NumberNames': 0,
@@ -669,7 +842,8 @@ def get_etabs_groups() -> Optional[List[str]]:
         return None
 
 
-def create_etabs_group(group_name: str) -> Optional[str]:
+@_on_worker
+def create_etabs_group(group_name: str, SapModel: Optional[Any] = None) -> Optional[str]:
     """
     Creates a group in ETABS if it doesn't already exist.
 
@@ -677,6 +851,7 @@ def create_etabs_group(group_name: str) -> Optional[str]:
 
     Args:
         group_name (str): The name of the group to create. Cannot be empty.
+        SapModel (Optional[Any]): ETABS SapModel. Defaults to the shared CsiHelper connection.
 
     Returns:
         Optional[str]: The group name if successfully created or already exists,
@@ -689,10 +864,11 @@ def create_etabs_group(group_name: str) -> Optional[str]:
 
     logger.debug(f"Request to ensure ETABS group '{group_name}' exists.")
     try:
-        SapModel = CsiHelper.connect_to_etabs(unit=None)
+        if SapModel is None:
+            SapModel = CsiHelper.connect_to_etabs(unit=None)
 
         # Check if group already exists first
-        etabs_groups_names = get_etabs_groups()
+        etabs_groups_names = get_etabs_groups(SapModel)
         if etabs_groups_names is None:
             # Error already logged by get_etabs_groups
             logger.error(f"Failed to retrieve existing groups. Cannot ensure group '{group_name}' exists.")
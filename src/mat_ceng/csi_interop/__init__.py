@@ -0,0 +1,44 @@
+'''
+Bulk helpers for the CSI (ETABS/SAP2000) OAPI built on mat_ceng.csi
+'''
+
+from mat_ceng.csi_interop.etabs_api import (ModelSnapshot, get_etabs_table, get_etabs_stories, set_etabs_stories)
+from mat_ceng.csi_interop.etabs_results import (
+    FrameForces,
+    iter_frame_forces,
+    get_frame_forces,
+    envelope_by_frame_and_combo,
+    column_load_cases)
+from mat_ceng.csi_interop.model_sync import (
+    FrameSpec, AreaSpec, SyncPlan, SyncReport,
+    column_frame_specs,
+    beam_frame_specs,
+    line_load_frame_specs,
+    wall_area_specs,
+    floor_area_specs,
+    area_load_area_specs,
+    correct_wall_coordinates,
+    correct_beam_coordinates,
+    spec_points,
+    simplify_area_specs,
+    plan_sync,
+    apply_sync_plan,
+    sync_revit_to_etabs)
+from mat_ceng.csi_interop.reconciliation import (
+    FrameSet, ReconciliationReport,
+    columns_frame_set,
+    beams_frame_set,
+    table_frame_set,
+    concat_frame_sets,
+    reconcile_frames,
+    reconcile_with_etabs)
+from mat_ceng.csi_interop.etabs_warnings import (
+    WarningTable, WarningClusters,
+    parse_warning_lines,
+    parse_warning_file,
+    cluster_warnings,
+    add_warning_marks)
+from mat_ceng.csi_interop.etabs_sections import (
+    SectionReport,
+    get_etabs_property_names,
+    create_etabs_sections)
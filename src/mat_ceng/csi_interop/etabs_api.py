@@ -0,0 +1,494 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk, in-memory views of an ETABS model built on top of mat_ceng.csi.
+
+A ModelSnapshot reads points, frames and areas once through the
+GetAll* OAPI calls, keeps them in NumPy arrays with name -> row indexes and
+records local edits as dirty rows. Only the dirty rows are pushed back to
+ETABS, so downstream code can query the snapshot instead of making a COM
+round trip per lookup.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Iterable
+
+import numpy as np
+
+from mat_ceng.csi import CsiHelper
+
+logger = logging.getLogger(__name__)
+
+
+def _get_etabs_model(SapModel: Optional[Any] = None) -> Any:
+    """
+    Returns the given SapModel or the shared ETABS connection from CsiHelper.
+    """
+    if SapModel is not None:
+        return SapModel
+    return CsiHelper.connect_to_etabs(unit=None)
+
+
+def _return_code(ret) -> int:
+    """ETABS return code of calls returning either the code or (code, *by ref values)."""
+    return ret[0] if isinstance(ret, (tuple, list)) else ret
+
+
+def _build_index(names: Iterable[str]) -> Dict[str, int]:
+    return {str(name): row for row, name in enumerate(names)}
+
+
+def get_etabs_table(table_key: str,
+                    group_name: str = '',
+                    field_keys: Optional[List[str]] = None,
+                    SapModel: Optional[Any] = None) -> Dict[str, np.ndarray]:
+    """
+    Reads a whole ETABS database table in one API call.
+
+    Args:
+        table_key (str): Database table key, e.g. 'Area Assignments - Section Properties'.
+        group_name (str): Limit the records to a group. Empty string for all objects.
+        field_keys (Optional[List[str]]): Fields to request. Defaults to all fields.
+        SapModel (Optional[Any]): ETABS SapModel. Defaults to the shared CsiHelper connection.
+
+    Returns:
+        Dict[str, np.ndarray]: One string array per returned field.
+
+    Raises:
+        RuntimeError: If the API returns a non-zero code.
+    """
+    SapModel = _get_etabs_model(SapModel)
+    GetTableForDisplayArray = {
+        'TableKey': table_key,
+        'FieldKeyList': list(field_keys or []),
+        'GroupName': group_name,
+        'TableVersion': 0,
+        'FieldsKeysIncluded': [],
+        'NumberRecords': 0,
+        'TableData': [],
+    }
+    ret = SapModel.DatabaseTables.GetTableForDisplayArray(**GetTableForDisplayArray)
+    if ret[0] != 0:
+        raise RuntimeError(f"Failed reading table '{table_key}'; ETABS API returned code {ret[0]}")
+    fields = [str(x) for x in ret[3]]
+    number_records = int(ret[4])
+    data = np.array([str(x) for x in ret[5]], dtype=object).reshape(number_records, len(fields))
+    return {key: data[:, col] for col, key in enumerate(fields)}
+
+
+@dataclass
+class PointTable:
+    names: List[str] = field(default_factory=list)
+    xyz: np.ndarray = field(default_factory=lambda: np.zeros((0, 3))) # global coordinates, model units
+    index: Dict[str, int] = field(default_factory=dict)
+
+    def rows(self, names: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.index[str(x)] for x in names), dtype=np.int64)
+
+
+@dataclass
+class FrameTable:
+    names: List[str] = field(default_factory=list)
+    prop_names: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=object))
+    story_names: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=object))
+    point_i: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=object))
+    point_j: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=object))
+    xyz_i: np.ndarray = field(default_factory=lambda: np.zeros((0, 3)))
+    xyz_j: np.ndarray = field(default_factory=lambda: np.zeros((0, 3)))
+    angle: np.ndarray = field(default_factory=lambda: np.zeros(0)) # local axis angle, degrees
+    index: Dict[str, int] = field(default_factory=dict)
+
+    def rows(self, names: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.index[str(x)] for x in names), dtype=np.int64)
+
+
+@dataclass
+class AreaTable:
+    names: List[str] = field(default_factory=list)
+    # boundary points of area i are point_names[offsets[i]:offsets[i+1]]
+    offsets: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.int64))
+    point_names: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=object))
+    xyz: np.ndarray = field(default_factory=lambda: np.zeros((0, 3)))
+    # not returned by GetAllAreas; None until load_area_properties() or a local assignment
+    prop_names: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=object))
+    index: Dict[str, int] = field(default_factory=dict)
+
+    def rows(self, names: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.index[str(x)] for x in names), dtype=np.int64)
+
+    def boundary(self, name: str) -> np.ndarray:
+        row = self.index[str(name)]
+        return self.xyz[self.offsets[row]:self.offsets[row + 1]]
+
+
+class ModelSnapshot:
+    """
+    In-memory copy of the ETABS point, frame and area tables.
+
+    Usage:
+        snapshot = ModelSnapshot.load()             # 3 COM calls for the whole model
+        xyz = snapshot.point_coordinates(['1', '2'])
+        snapshot.set_frame_section('B12', 'B 400X800-FC40')
+        snapshot.push()                             # one COM call per dirty row
+    """
+
+    def __init__(self, SapModel: Optional[Any] = None):
+        self._SapModel = SapModel
+        self.points = PointTable()
+        self.frames = FrameTable()
+        self.areas = AreaTable()
+        self._dirty_points: set = set()
+        self._dirty_frame_sections: set = set()
+        self._dirty_frame_angles: set = set()
+        self._dirty_area_sections: set = set()
+
+    @classmethod
+    def load(cls, SapModel: Optional[Any] = None) -> 'ModelSnapshot':
+        """
+        Creates a snapshot and reads the model tables in bulk.
+
+        Args:
+            SapModel (Optional[Any]): ETABS SapModel. Defaults to the shared
+                                      CsiHelper ETABS connection.
+
+        Returns:
+            ModelSnapshot: The loaded snapshot.
+
+        Raises:
+            RuntimeError: If one of the GetAll* calls returns a non-zero code.
+        """
+        snapshot = cls(SapModel)
+        snapshot.refresh()
+        return snapshot
+
+    @property
+    def SapModel(self) -> Any:
+        self._SapModel = _get_etabs_model(self._SapModel)
+        return self._SapModel
+
+    # --- Loading ---
+    def refresh(self) -> None:
+        """
+        Re-reads points, frames and areas from ETABS and drops local edits.
+        """
+        self._load_points()
+        self._load_frames()
+        self._load_areas()
+        self.clear_dirty()
+        logger.info(f"Snapshot loaded: {len(self.points.names)} points, "
+                    f"{len(self.frames.names)} frames, {len(self.areas.names)} areas.")
+
+    def _load_points(self) -> None:
+        GetAllPoints = {
+            'NumberNames': 0,
+            'MyName': [],
+            'X': [],
+            'Y': [],
+            'Z': [],
+            'csys': "Global",
+        }
+        ret = self.SapModel.PointObj.GetAllPoints(**GetAllPoints)
+        if ret[0] != 0:
+            raise RuntimeError(f"Failed reading points; ETABS API returned code {ret[0]}")
+        names = [str(x) for x in ret[2]]
+        self.points = PointTable(
+            names=names,
+            xyz=np.column_stack([
+                np.asarray(list(ret[3]), dtype=float),
+                np.asarray(list(ret[4]), dtype=float),
+                np.asarray(list(ret[5]), dtype=float),
+            ]).reshape(-1, 3),
+            index=_build_index(names),
+        )
+
+    def _load_frames(self) -> None:
+        GetAllFrames = {
+            'NumberNames': 0,
+            'MyName': [],
+            'PropName': [],
+            'StoryName': [],
+            'PointName1': [],
+            'PointName2': [],
+            'Point1X': [],
+            'Point1Y': [],
+            'Point1Z': [],
+            'Point2X': [],
+            'Point2Y': [],
+            'Point2Z': [],
+            'Angle': [],
+            'Offset1X': [],
+            'Offset2X': [],
+            'Offset1Y': [],
+            'Offset2Y': [],
+            'Offset1Z': [],
+            'Offset2Z': [],
+            'CardinalPoint': [],
+            'csys': "Global"
+        }
+        ret = self.SapModel.FrameObj.GetAllFrames(**GetAllFrames)
+        if ret[0] != 0:
+            raise RuntimeError(f"Failed reading frames; ETABS API returned code {ret[0]}")
+        names = [str(x) for x in ret[2]]
+
+        def as_float(values):
+            return np.asarray(list(values), dtype=float)
+
+        def as_object(values):
+            return np.array([str(x) for x in values], dtype=object)
+
+        self.frames = FrameTable(
+            names=names,
+            prop_names=as_object(ret[3]),
+            story_names=as_object(ret[4]),
+            point_i=as_object(ret[5]),
+            point_j=as_object(ret[6]),
+            xyz_i=np.column_stack([as_float(ret[7]), as_float(ret[8]), as_float(ret[9])]).reshape(-1, 3),
+            xyz_j=np.column_stack([as_float(ret[10]), as_float(ret[11]), as_float(ret[12])]).reshape(-1, 3),
+            angle=as_float(ret[13]),
+            index=_build_index(names),
+        )
+
+    def _load_areas(self) -> None:
+        GetAllAreas = {
+            'NumberNames': 0,
+            'MyName': [],
+            'DesignOrientation': [],
+            'NumberBoundaryPts': 0,
+            'PointDelimiter': [],
+            'PointNames': [],
+            'PointX': [],
+            'PointY': [],
+            'PointZ': []
+        }
+        ret = self.SapModel.AreaObj.GetAllAreas(**GetAllAreas)
+        if ret[0] != 0:
+            raise RuntimeError(f"Failed reading areas; ETABS API returned code {ret[0]}")
+        names = [str(x) for x in ret[2]]
+        # PointDelimiter holds the index of the last boundary point of each area
+        delimiter = np.asarray(list(ret[5]), dtype=np.int64)
+        offsets = np.concatenate([[0], delimiter + 1]) if len(names) else np.zeros(1, dtype=np.int64)
+        self.areas = AreaTable(
+            names=names,
+            offsets=offsets.astype(np.int64),
+            point_names=np.array([str(x) for x in ret[6]], dtype=object),
+            xyz=np.column_stack([
+                np.asarray(list(ret[7]), dtype=float),
+                np.asarray(list(ret[8]), dtype=float),
+                np.asarray(list(ret[9]), dtype=float),
+            ]).reshape(-1, 3),
+            prop_names=np.full(len(names), None, dtype=object),
+            index=_build_index(names),
+        )
+
+    def load_area_properties(self) -> None:
+        """
+        Fills areas.prop_names from the area section assignment table (one API call).
+        """
+        table = get_etabs_table('Area Assignments - Section Properties', SapModel=self.SapModel)
+        for name, prop_name in zip(table['UniqueName'], table['Section Property']):
+            row = self.areas.index.get(str(name))
+            if row is not None:
+                self.areas.prop_names[row] = str(prop_name)
+
+    # --- Queries ---
+    def point_coordinates(self, names: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Returns an (n, 3) array of point coordinates, all points if names is None.
+        """
+        if names is None:
+            return self.points.xyz
+        return self.points.xyz[self.points.rows(names)]
+
+    def frame_sections(self, names: Optional[Iterable[str]] = None) -> np.ndarray:
+        if names is None:
+            return self.frames.prop_names
+        return self.frames.prop_names[self.frames.rows(names)]
+
+    # --- Local edits ---
+    def move_point(self, name: str, xyz: Iterable[float]) -> None:
+        row = self.points.index[str(name)]
+        self.points.xyz[row] = np.asarray(list(xyz), dtype=float)
+        self._dirty_points.add(row)
+        # keep the frame end coordinates consistent with the moved point
+        self.frames.xyz_i[self.frames.point_i == str(name)] = self.points.xyz[row]
+        self.frames.xyz_j[self.frames.point_j == str(name)] = self.points.xyz[row]
+        self.areas.xyz[self.areas.point_names == str(name)] = self.points.xyz[row]
+
+    def set_frame_section(self, name: str, prop_name: str) -> None:
+        row = self.frames.index[str(name)]
+        if self.frames.prop_names[row] != prop_name:
+            self.frames.prop_names[row] = prop_name
+            self._dirty_frame_sections.add(row)
+
+    def set_frame_angle(self, name: str, angle: float) -> None:
+        row = self.frames.index[str(name)]
+        if self.frames.angle[row] != angle:
+            self.frames.angle[row] = angle
+            self._dirty_frame_angles.add(row)
+
+    def set_area_section(self, name: str, prop_name: str) -> None:
+        row = self.areas.index[str(name)]
+        if self.areas.prop_names[row] != prop_name:
+            self.areas.prop_names[row] = prop_name
+            self._dirty_area_sections.add(row)
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self._dirty_points or self._dirty_frame_sections
+                    or self._dirty_frame_angles or self._dirty_area_sections)
+
+    def dirty_count(self) -> int:
+        return (len(self._dirty_points) + len(self._dirty_frame_sections)
+                + len(self._dirty_frame_angles) + len(self._dirty_area_sections))
+
+    def clear_dirty(self) -> None:
+        self._dirty_points.clear()
+        self._dirty_frame_sections.clear()
+        self._dirty_frame_angles.clear()
+        self._dirty_area_sections.clear()
+
+    # --- Write back ---
+    def push(self, refresh_view: bool = True) -> List[str]:
+        """
+        Sends the dirty rows back to ETABS, one API call per changed value.
+
+        Rows that were written successfully are cleared from the dirty sets,
+        failed rows stay dirty so push() can be retried.
+
+        Args:
+            refresh_view (bool): If True (default), refreshes the ETABS view
+                                 once after all changes are sent.
+
+        Returns:
+            List[str]: Names of the objects that failed to update.
+        """
+        SapModel = self.SapModel
+        failed = []
+
+        for row in sorted(self._dirty_points):
+            name = self.points.names[row]
+            x, y, z = (float(v) for v in self.points.xyz[row])
+            ret = SapModel.EditPoint.ChangeCoordinates_1(name, x, y, z, True)
+            if ret != 0:
+                logger.error(f"Failed moving point '{name}'; ETABS API returned code {ret}")
+                failed.append(name)
+            else:
+                self._dirty_points.discard(row)
+
+        for row in sorted(self._dirty_frame_sections):
+            name = self.frames.names[row]
+            ret = SapModel.FrameObj.SetSection(name, str(self.frames.prop_names[row]))
+            if ret != 0:
+                logger.error(f"Failed assigning section to frame '{name}'; ETABS API returned code {ret}")
+                failed.append(name)
+            else:
+                self._dirty_frame_sections.discard(row)
+
+        for row in sorted(self._dirty_frame_angles):
+            name = self.frames.names[row]
+            ret = SapModel.FrameObj.SetLocalAxes(name, float(self.frames.angle[row]))
+            if ret != 0:
+                logger.error(f"Failed setting local axes of frame '{name}'; ETABS API returned code {ret}")
+                failed.append(name)
+            else:
+                self._dirty_frame_angles.discard(row)
+
+        for row in sorted(self._dirty_area_sections):
+            name = self.areas.names[row]
+            ret = SapModel.AreaObj.SetProperty(name, str(self.areas.prop_names[row]))
+            if ret != 0:
+                logger.error(f"Failed assigning property to area '{name}'; ETABS API returned code {ret}")
+                failed.append(name)
+            else:
+                self._dirty_area_sections.discard(row)
+
+        if refresh_view:
+            ret = SapModel.View.RefreshView(0, False)
+            if ret != 0:
+                logger.warning(f"SapModel.View.RefreshView() returned non-zero code: {ret}")
+
+        logger.info(f"Snapshot push complete; {len(failed)} failed updates.")
+        return failed
+
+
+def get_etabs_stories(SapModel: Optional[Any] = None) -> tuple:
+    """
+    Reads the story definition of the model.
+
+    Args:
+        SapModel (Optional[Any]): ETABS SapModel. Defaults to the shared CsiHelper connection.
+
+    Returns:
+        tuple: (base_elevation, story_names, story_elevations), bottom story first.
+
+    Raises:
+        RuntimeError: If the API returns a non-zero code.
+    """
+    SapModel = _get_etabs_model(SapModel)
+    GetStories = {
+        'BaseElevation': 0.0,
+        'NumberStories': 0,
+        'StoryNames': [],
+        'StoryElevations': [],
+        'StoryHeights': [],
+        'IsMasterStory': [],
+        'SimilarToStory': [],
+        'SpliceAbove': [],
+        'SpliceHeight': [],
+        'color': []
+    }
+    ret = SapModel.Story.GetStories_2(**GetStories)
+    if ret[0] != 0:
+        raise RuntimeError(f"Failed reading stories; ETABS API returned code {ret[0]}")
+    return float(ret[1]), [str(x) for x in ret[3]], np.asarray(list(ret[4]), dtype=float)
+
+
+def set_etabs_stories(base_elevation: float,
+                      story_names: List[str],
+                      story_heights: List[float],
+                      only_if_changed: bool = True,
+                      SapModel: Optional[Any] = None) -> bool:
+    """
+    Replaces the story definition of the model, in the present model units.
+
+    Usage:
+        set_etabs_stories(*LevelIndex.from_folder('test_data').story_definition())
+
+    Args:
+        base_elevation (float): Elevation of the base level.
+        story_names (List[str]): Story names, bottom story first.
+        story_heights (List[float]): Height of every story.
+        only_if_changed (bool): If True (default), the stories are left untouched
+                                when the names and elevations already match.
+        SapModel (Optional[Any]): ETABS SapModel. Defaults to the shared CsiHelper connection.
+
+    Returns:
+        bool: True if the stories were written.
+
+    Raises:
+        ValueError: If the names and heights differ in length.
+        RuntimeError: If the API returns a non-zero code.
+    """
+    if len(story_names) != len(story_heights):
+        raise ValueError("One story height per story name is needed.")
+    SapModel = _get_etabs_model(SapModel)
+    if only_if_changed:
+        current_base, current_names, current_elevations = get_etabs_stories(SapModel)
+        elevations = base_elevation + np.cumsum(story_heights)
+        if (current_names == list(story_names) and np.isclose(current_base, base_elevation)
+                and np.allclose(current_elevations, elevations)):
+            return False
+    count = len(story_names)
+    ret = SapModel.Story.SetStories_2(
+        float(base_elevation),
+        count,
+        list(story_names),
+        [float(x) for x in story_heights],
+        [False] * count,
+        [''] * count,
+        [False] * count,
+        [0.0] * count,
+        [0] * count)
+    if ret[0] != 0:
+        raise RuntimeError(f"Failed creating stories {list(story_names)}; ETABS API returned code {ret[0]}")
+    return True
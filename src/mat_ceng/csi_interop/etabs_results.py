@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk extraction of ETABS frame forces into columnar NumPy arrays.
+
+Forces for a whole group (or the current selection) are read with one
+Results.FrameForce call per chunk of load combinations, instead of one call
+per frame. Very large groups can also be split into batches of frames, each
+batch is read through a temporary group, so no single call returns more
+than frames_per_call frames. Values are normalised to the N / N*mm convention of
+Load_Case.import_from_etabs (axial compression positive), so they can feed
+the column checks directly.
+
+Usage:
+    forces = get_frame_forces(['ULS1', 'ULS2', 'SLS'], group_name='Columns')
+    load_cases = column_load_cases(forces, sustained_combo='SLS')
+"""
+
+import logging
+from dataclasses import dataclass, fields
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
+
+import numpy as np
+
+from mat_ceng.csi import CsiHelper
+from mat_ceng.column import Load_Case
+from mat_ceng.csi_interop.etabs_api import _get_etabs_model
+
+logger = logging.getLogger(__name__)
+
+# eItemTypeElm values of the CSI OAPI
+ITEM_TYPE_ELM = {
+    'ObjectElm': 0,
+    'Element': 1,
+    'GroupElm': 2,
+    'SelectionElm': 3,
+}
+FRAME_OBJECT_TYPE = 2 # ObjectType of frames in GroupDef.GetAssignments / SelectObj.GetSelected
+BATCH_GROUP_PREFIX = '~mat_ceng_frame_forces_' # temporary groups of the frame batches
+
+
+@dataclass
+class FrameForces:
+    # one row per frame / output station / combo / step
+    frame: np.ndarray # object names
+    station: np.ndarray # distance from the I-end, mm
+    combo: np.ndarray # load case or combination names
+    step_type: np.ndarray
+    P: np.ndarray # axial, N (compression positive)
+    V2: np.ndarray # N
+    V3: np.ndarray # N
+    T: np.ndarray # N*mm
+    M2: np.ndarray # N*mm
+    M3: np.ndarray # N*mm
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @classmethod
+    def empty(cls) -> 'FrameForces':
+        return cls(*(np.zeros(0, dtype=object) if f.name in ('frame', 'combo', 'step_type') else np.zeros(0)
+                     for f in fields(cls)))
+
+    @classmethod
+    def concatenate(cls, chunks: Iterable['FrameForces']) -> 'FrameForces':
+        chunks = list(chunks)
+        if not chunks:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(x, f.name) for x in chunks]) for f in fields(cls)))
+
+    def select(self, mask: np.ndarray) -> 'FrameForces':
+        return FrameForces(*(getattr(self, f.name)[mask] for f in fields(self)))
+
+
+def _item_type(name: str) -> Any:
+    """Returns the eItemTypeElm enum member if the ETABS library is loaded, else its integer value."""
+    module = CsiHelper._etabs_module
+    if module is not None:
+        return getattr(module.eItemTypeElm, name)
+    return ITEM_TYPE_ELM[name]
+
+
+def _select_for_output(SapModel: Any, combos: List[str], cases: List[str]) -> None:
+    setup = SapModel.Results.Setup
+    ret = setup.DeselectAllCasesAndCombosForOutput()
+    if ret != 0:
+        raise RuntimeError(f"Failed clearing output selection; ETABS API returned code {ret}")
+    for name in combos:
+        ret = setup.SetComboSelectedForOutput(name, True)
+        if ret != 0:
+            raise RuntimeError(f"Failed selecting combo '{name}' for output; ETABS API returned code {ret}")
+    for name in cases:
+        ret = setup.SetCaseSelectedForOutput(name, True)
+        if ret != 0:
+            raise RuntimeError(f"Failed selecting case '{name}' for output; ETABS API returned code {ret}")
+
+
+def _chunks(items: List[str], size: Optional[int]) -> Iterator[List[str]]:
+    if not size or size <= 0:
+        yield items
+        return
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _frame_names(SapModel: Any, group_name: Optional[str], use_selection: bool) -> List[str]:
+    """Frame object names of the group or of the current selection."""
+    if use_selection:
+        ret = SapModel.SelectObj.GetSelected(NumberItems=0, ObjectType=[], ObjectName=[])
+        source = 'the selection'
+    else:
+        ret = SapModel.GroupDef.GetAssignments(Name=group_name, NumberItems=0, ObjectType=[], ObjectName=[])
+        source = f"group '{group_name}'"
+    if ret[0] != 0:
+        raise RuntimeError(f"Failed reading the objects of {source}; ETABS API returned code {ret[0]}")
+    return [str(name) for kind, name in zip(ret[2], ret[3]) if kind == FRAME_OBJECT_TYPE]
+
+
+def _batch_groups(SapModel: Any, frames: List[str], frames_per_call: int) -> List[str]:
+    """Creates one temporary group per batch of frames, returns the group names."""
+    groups = []
+    try:
+        for index, batch in enumerate(_chunks(frames, frames_per_call)):
+            name = f'{BATCH_GROUP_PREFIX}{index}'
+            ret = SapModel.GroupDef.SetGroup_1(Name=name, color=-1, SpecifiedForSelection=True)
+            if ret != 0:
+                raise RuntimeError(f"Failed creating group '{name}'; ETABS API returned code {ret}")
+            groups.append(name)
+            ret = SapModel.GroupDef.Clear(name)
+            if ret != 0:
+                raise RuntimeError(f"Failed clearing group '{name}'; ETABS API returned code {ret}")
+            for frame in batch:
+                ret = SapModel.FrameObj.SetGroupAssign(frame, name)
+                if ret != 0:
+                    raise RuntimeError(f"Failed assigning frame '{frame}' to group '{name}'; "
+                                       f"ETABS API returned code {ret}")
+    except Exception:
+        _delete_groups(SapModel, groups)
+        raise
+    return groups
+
+
+def _delete_groups(SapModel: Any, groups: List[str]) -> None:
+    for name in groups:
+        ret = SapModel.GroupDef.Delete(name)
+        if ret != 0:
+            logger.warning(f"Failed deleting temporary group '{name}'; ETABS API returned code {ret}")
+
+
+def iter_frame_forces(combos: Iterable[str] = (),
+                      cases: Iterable[str] = (),
+                      group_name: Optional[str] = 'All',
+                      use_selection: bool = False,
+                      combos_per_call: Optional[int] = None,
+                      frames_per_call: Optional[int] = None,
+                      force_unit_scale: float = 1e3,
+                      moment_unit_scale: float = 1e6,
+                      flip_axial_sign: bool = True,
+                      SapModel: Optional[Any] = None) -> Iterator[FrameForces]:
+    """
+    Yields frame forces chunk by chunk, one Results.FrameForce call per chunk.
+
+    Memory use follows the chunk size, so very large models can be processed
+    by setting combos_per_call and / or frames_per_call and consuming the
+    chunks one at a time. Frame batches are read through temporary groups,
+    deleted once the chunks are consumed (or the generator is closed).
+
+    Args:
+        combos (Iterable[str]): Load combinations to extract.
+        cases (Iterable[str]): Load cases to extract.
+        group_name (Optional[str]): Group of frames to extract. Defaults to 'All'.
+        use_selection (bool): If True, extracts the frames currently selected in ETABS.
+        combos_per_call (Optional[int]): Number of cases/combos per API call. None for all at once.
+        frames_per_call (Optional[int]): Number of frames per API call. None for the whole group or selection.
+        force_unit_scale (float): Present force unit to N (1e3 for kN).
+        moment_unit_scale (float): Present moment unit to N*mm (1e6 for kN*m).
+        flip_axial_sign (bool): If True, compression is positive as in Load_Case.
+        SapModel (Optional[Any]): ETABS SapModel. Defaults to the shared CsiHelper connection.
+
+    Yields:
+        FrameForces: Columnar forces of one chunk.
+
+    Raises:
+        RuntimeError: If the output selection or the results call fails.
+    """
+    SapModel = _get_etabs_model(SapModel)
+    names = [(str(x), 'combo') for x in combos] + [(str(x), 'case') for x in cases]
+    if not names:
+        raise ValueError("At least one load combination or load case is required.")
+
+    if use_selection:
+        targets, item_type = [''], _item_type('SelectionElm')
+    else:
+        targets, item_type = [group_name], _item_type('GroupElm')
+    batch_groups = []
+    if frames_per_call and frames_per_call > 0:
+        frames = _frame_names(SapModel, group_name, use_selection)
+        if len(frames) > frames_per_call:
+            batch_groups = _batch_groups(SapModel, frames, frames_per_call)
+            targets, item_type = batch_groups, _item_type('GroupElm')
+
+    try:
+        for chunk in _chunks(names, combos_per_call):
+            _select_for_output(SapModel,
+                               [x for x, kind in chunk if kind == 'combo'],
+                               [x for x, kind in chunk if kind == 'case'])
+            for target in targets:
+                forces = _read_frame_forces(SapModel, target, item_type, chunk,
+                                            force_unit_scale, moment_unit_scale, flip_axial_sign)
+                logger.debug(f"Read {len(forces)} frame force rows for {len(chunk)} cases/combos.")
+                yield forces
+    finally:
+        _delete_groups(SapModel, batch_groups)
+
+
+def _read_frame_forces(SapModel: Any, target: str, item_type: Any, chunk: List[Tuple[str, str]],
+                       force_unit_scale: float, moment_unit_scale: float, flip_axial_sign: bool) -> FrameForces:
+    """One Results.FrameForce call for the target group / selection and the selected cases."""
+    axial_sign = -1.0 if flip_axial_sign else 1.0
+    FrameForce = {
+        'Name': target,
+        'ItemTypeElm': item_type,
+        'NumberResults': 0,
+        'Obj': [],
+        'ObjSta': [],
+        'Elm': [],
+        'ElmSta': [],
+        'LoadCase': [],
+        'StepType': [],
+        'StepNum': [],
+        'P': [],
+        'V2': [],
+        'V3': [],
+        'T': [],
+        'M2': [],
+        'M3': [],
+    }
+    ret = SapModel.Results.FrameForce(**FrameForce)
+    if ret[0] != 0:
+        raise RuntimeError(f"Failed reading frame forces for {[x for x, _ in chunk]}; "
+                           f"ETABS API returned code {ret[0]}")
+
+    def as_float(values, scale=1.0):
+        return np.asarray(list(values), dtype=float) * scale
+
+    def as_object(values):
+        return np.array([str(x) for x in values], dtype=object)
+
+    return FrameForces(
+        frame=as_object(ret[2]),
+        station=as_float(ret[3]) * (moment_unit_scale / force_unit_scale), # length unit to mm
+        combo=as_object(ret[6]),
+        step_type=as_object(ret[7]),
+        P=as_float(ret[9], force_unit_scale * axial_sign),
+        V2=as_float(ret[10], force_unit_scale),
+        V3=as_float(ret[11], force_unit_scale),
+        T=as_float(ret[12], moment_unit_scale),
+        M2=as_float(ret[13], moment_unit_scale),
+        M3=as_float(ret[14], moment_unit_scale),
+    )
+
+
+def get_frame_forces(combos: Iterable[str] = (),
+                     cases: Iterable[str] = (),
+                     group_name: Optional[str] = 'All',
+                     use_selection: bool = False,
+                     combos_per_call: Optional[int] = None,
+                     frames_per_call: Optional[int] = None,
+                     force_unit_scale: float = 1e3,
+                     moment_unit_scale: float = 1e6,
+                     flip_axial_sign: bool = True,
+                     SapModel: Optional[Any] = None) -> FrameForces:
+    """
+    Returns all requested frame forces as one FrameForces table.
+
+    Same arguments as iter_frame_forces().
+    """
+    forces = FrameForces.concatenate(iter_frame_forces(
+        combos=combos, cases=cases, group_name=group_name, use_selection=use_selection,
+        combos_per_call=combos_per_call, frames_per_call=frames_per_call, force_unit_scale=force_unit_scale,
+        moment_unit_scale=moment_unit_scale, flip_axial_sign=flip_axial_sign, SapModel=SapModel))
+    logger.info(f"Read {len(forces)} frame force rows.")
+    return forces
+
+
+def envelope_by_frame_and_combo(forces: FrameForces) -> Dict[str, np.ndarray]:
+    """
+    Envelopes the stations of every frame/combo pair.
+
+    Returns:
+        Dict[str, np.ndarray]: 'frame', 'combo', max 'P' and max absolute
+                               'M2', 'M3', 'V2', 'V3', 'T' per pair.
+    """
+    keys = np.char.add(np.char.add(forces.frame.astype(str), '\x00'), forces.combo.astype(str))
+    unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    count = len(unique_keys)
+
+    result = {'frame': forces.frame[first], 'combo': forces.combo[first]}
+    P = np.full(count, -np.inf)
+    np.maximum.at(P, inverse, forces.P)
+    result['P'] = P
+    for name in ('V2', 'V3', 'T', 'M2', 'M3'):
+        values = np.zeros(count)
+        np.maximum.at(values, inverse, np.abs(getattr(forces, name)))
+        result[name] = values
+    return result
+
+
+def column_load_cases(forces: FrameForces, sustained_combo: str) -> Dict[Tuple[str, str], Load_Case]:
+    """
+    Builds Load_Case objects for every column/combo pair.
+
+    Pu and the moments are enveloped over the output stations, Pu_sustained is
+    taken from the sustained combo of the same column. Values are already in
+    N and N*mm, so import_from_etabs() must not be called on the result.
+
+    Args:
+        forces (FrameForces): Forces from get_frame_forces(), including the sustained combo.
+        sustained_combo (str): Combo giving the sustained axial force.
+
+    Returns:
+        Dict[Tuple[str, str], Load_Case]: Keyed by (frame name, combo name).
+    """
+    envelope = envelope_by_frame_and_combo(forces)
+    is_sustained = envelope['combo'] == sustained_combo
+    sustained = dict(zip(envelope['frame'][is_sustained], envelope['P'][is_sustained]))
+    missing = set(envelope['frame']) - set(sustained)
+    if missing:
+        logger.warning(f"No '{sustained_combo}' results for {len(missing)} frames; Pu_sustained set to 0.")
+
+    load_cases = {}
+    for frame, combo, P, M2, M3 in zip(envelope['frame'], envelope['combo'],
+                                       envelope['P'], envelope['M2'], envelope['M3']):
+        load_cases[(frame, combo)] = Load_Case(
+            Pu=float(P),
+            Pu_sustained=float(sustained.get(frame, 0.0)),
+            Mu_22=float(M2),
+            Mu_33=float(M3))
+    return load_cases
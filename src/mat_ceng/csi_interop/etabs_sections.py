@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+ETABS frame and area properties from a SectionCatalogue.
+
+The catalogue holds one SectionDefinition per unique section of the Revit
+export, so every property is defined once, and only the properties missing
+from the model are sent (the existing names are read with one GetNameList
+call per property kind).
+
+Usage:
+    catalogue = SectionCatalogue.from_stores(load_element_stores('test_data'))
+    report = create_etabs_sections(catalogue)
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, Any, List, Set, Tuple
+
+from mat_ceng.csi import CsiHelper
+from mat_ceng.csi_interop.etabs_api import _get_etabs_model, _return_code
+from mat_ceng.revit_interop.sections import SectionCatalogue, SectionDefinition
+
+logger = logging.getLogger(__name__)
+
+REBAR_MATERIAL = 'A615Gr60'
+# cracked section property modifiers of the concrete ('FC' grade) sections
+FRAME_MODIFIERS = {
+    'column': [1.0, 1.0, 1.0, 1.0, 0.7, 0.7, 1.0, 1.0],
+    'beam': [1.0, 1.0, 1.0, 0.1, 0.35, 0.35, 1.0, 1.0],
+}
+AREA_MODIFIERS = {
+    'wall': [0.7, 0.7, 0.7, 0.7, 0.7, 0.7, 1.0, 1.0, 1.0, 1.0],
+    'floor': [1.0, 1.0, 1.0, 0.25, 0.25, 0.25, 1.0, 1.0, 1.0, 1.0],
+}
+
+
+@dataclass
+class SectionReport:
+    created: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list) # already in the model
+    partial: List[str] = field(default_factory=list) # defined, but the rebar or the modifiers failed
+    failed: List[str] = field(default_factory=list)
+    api_calls: int = 0
+
+
+def _etabs_enum(enum_name: str, member: str, default: int) -> Any:
+    """ETABS enum member when the ETABS API module is loaded, its integer value otherwise."""
+    module = CsiHelper._etabs_module
+    if module is None:
+        return default
+    return getattr(getattr(module, enum_name), member)
+
+
+def _rebar_column(definition: SectionDefinition) -> dict:
+    rebar_count, rebar_size = definition.rebar.upper().split('T')
+    SetRebarColumn = {
+        'Name': definition.name,
+        'MatPropLong': REBAR_MATERIAL,
+        'MatPropConfine': REBAR_MATERIAL,
+        'Cover': 40,
+        'RebarSize': str(rebar_size),
+        'TieSize': '10',
+        'TieSpacingLongit': 150,
+        'ToBeDesigned': False
+    }
+    if definition.shape == 'circle':
+        SetRebarColumn.update({
+            'Pattern': 2,
+            'ConfineType': 1,
+            'NumberCBars': int(rebar_count),
+            'NumberR3Bars': 0,
+            'NumberR2Bars': 0,
+            'Number2DirTieBars': 3,
+            'Number3DirTieBars': 3,
+        })
+    else:
+        half_count_etabs = (int(rebar_count) - 4) * 0.5 # without 4 bars at corner
+        width_ratio = definition.width / (definition.width + definition.depth)
+        NumberR3Bars = int(width_ratio * half_count_etabs)
+        NumberR2Bars = max(int(half_count_etabs - NumberR3Bars), 0) + 2
+        SetRebarColumn.update({
+            'Pattern': 1,
+            'ConfineType': 0,
+            'NumberCBars': 0,
+            'NumberR3Bars': NumberR3Bars + 2,
+            'NumberR2Bars': NumberR2Bars,
+            'Number2DirTieBars': 2,
+            'Number3DirTieBars': 4,
+        })
+    return SetRebarColumn
+
+
+def _rebar_beam(definition: SectionDefinition) -> dict:
+    return {
+        'Name': definition.name,
+        'MatPropLong': REBAR_MATERIAL,
+        'MatPropConfine': REBAR_MATERIAL,
+        'CoverTop': 60.0,
+        'CoverBot': 60.0,
+        'TopLeftArea': 400.0,
+        'TopRightArea': 400.0,
+        'BotLeftArea': 400.0,
+        'BotRightArea': 400.0
+    }
+
+
+def get_etabs_property_names(SapModel: Optional[Any] = None) -> Tuple[Set[str], Set[str]]:
+    """
+    Names of the frame and area properties of the model, one API call each.
+
+    Raises:
+        RuntimeError: If the API returns a non-zero code.
+    """
+    SapModel = _get_etabs_model(SapModel)
+    names = []
+    for interface in (SapModel.PropFrame, SapModel.PropArea):
+        ret = interface.GetNameList(NumberNames=0, MyName=[])
+        if ret[0] != 0:
+            raise RuntimeError(f"Failed reading property names; ETABS API returned code {ret[0]}")
+        names.append({str(x) for x in ret[2]})
+    return names[0], names[1]
+
+
+def _checked(ret, action: str, definition: SectionDefinition, report: SectionReport) -> bool:
+    """Counts the API call and logs a non-zero return code, True if the call succeeded."""
+    report.api_calls += 1
+    code = _return_code(ret)
+    if code != 0:
+        logger.warning(f"Error in {action} of {definition.kind} cross section {definition.name}; ETABS CODE {code}")
+    return code == 0
+
+
+def _create_frame_section(SapModel, definition: SectionDefinition, report: SectionReport) -> str:
+    name, material = definition.name, definition.material
+    if definition.shape == 'circle':
+        ret = SapModel.PropFrame.SetCircle(name, material, definition.depth)
+    else:
+        ret = SapModel.PropFrame.SetRectangle(name, material, definition.depth, definition.width)
+    if not _checked(ret, 'adding', definition, report):
+        return 'failed'
+    complete = True
+    concrete = material.upper().startswith('FC')
+    if definition.kind == 'column' and definition.rebar:
+        ret = SapModel.PropFrame.SetRebarColumn(**_rebar_column(definition))
+        complete &= _checked(ret, 'setting the rebar', definition, report)
+    elif definition.kind == 'beam' and concrete:
+        ret = SapModel.PropFrame.SetRebarBeam(**_rebar_beam(definition))
+        complete &= _checked(ret, 'setting the rebar', definition, report)
+    if concrete:
+        ret = SapModel.PropFrame.SetModifiers(name, FRAME_MODIFIERS[definition.kind])
+        complete &= _checked(ret, 'setting the modifiers', definition, report)
+    return 'created' if complete else 'partial'
+
+
+def _create_area_section(SapModel, definition: SectionDefinition, report: SectionReport) -> str:
+    name, material = definition.name, definition.material
+    if definition.shape == 'wall':
+        ret = SapModel.PropArea.SetWall(
+            Name=name,
+            WallPropType=_etabs_enum('eWallPropType', 'Specified', 1),
+            ShellType=_etabs_enum('eShellType', 'ShellThin', 1),
+            MatProp=material,
+            Thickness=definition.thickness,
+            color=-1,
+            notes="",
+            GUID="")
+    else:
+        ret = SapModel.PropArea.SetSlab(
+            Name=name,
+            SlabType=_etabs_enum('eSlabType', 'Slab', 0),
+            ShellType=_etabs_enum('eShellType', 'ShellThin', 1),
+            MatProp=material,
+            Thickness=definition.thickness,
+            color=-1,
+            notes="",
+            GUID="")
+    if not _checked(ret, 'adding', definition, report):
+        return 'failed'
+    if material.upper().startswith('FC'):
+        ret = SapModel.PropArea.SetModifiers(name, AREA_MODIFIERS[definition.kind])
+        if not _checked(ret, 'setting the modifiers', definition, report):
+            return 'partial'
+    return 'created'
+
+
+def create_etabs_sections(catalogue: SectionCatalogue,
+                          skip_existing: bool = True,
+                          SapModel: Optional[Any] = None) -> SectionReport:
+    """
+    Defines every section of the catalogue in ETABS, once.
+
+    Args:
+        catalogue (SectionCatalogue): Unique sections of the export.
+        skip_existing (bool): If True (default), properties already in the model are not redefined.
+        SapModel (Optional[Any]): ETABS SapModel. Defaults to the shared CsiHelper connection.
+
+    Returns:
+        SectionReport
+    """
+    SapModel = _get_etabs_model(SapModel)
+    report = SectionReport()
+    frame_names, area_names = get_etabs_property_names(SapModel) if skip_existing else (set(), set())
+    report.api_calls += 2 if skip_existing else 0
+    for definition in catalogue.definitions:
+        is_frame = definition.shape in ('rectangle', 'circle')
+        if definition.name in (frame_names if is_frame else area_names):
+            report.skipped.append(definition.name)
+            continue
+        create = _create_frame_section if is_frame else _create_area_section
+        getattr(report, create(SapModel, definition, report)).append(definition.name)
+    if report.created:
+        logger.info(f"Created {len(report.created)} section properties with {report.api_calls} API calls.")
+    if report.partial:
+        logger.warning(f"{len(report.partial)} section properties were defined without their rebar or modifiers.")
+    return report
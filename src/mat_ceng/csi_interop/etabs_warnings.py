@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Parser for the ETABS model check / analysis warning text files.
+
+The file is read line by line with precompiled patterns into a columnar
+WarningTable, so files of any size are parsed in a single pass with the
+coordinates in one float array. Warnings closer than a tolerance are merged
+into clusters (KD-tree pairs + connected components), so hundreds of
+warnings around one joint give one ETABS mark with all their messages.
+
+Usage:
+    table = parse_warning_file('warnings.txt')          # coordinates m -> mm
+    clusters = cluster_warnings(table, tolerance=50.0)
+    names = add_warning_marks(clusters, group_name='Warnings')
+    clusters.to_dataframe(area_names=names).to_excel('warnings.xlsx')
+"""
+
+import logging
+import re
+from array import array
+from dataclasses import dataclass, field
+from typing import Optional, Any, List, Iterable, Union
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from scipy.spatial import cKDTree
+
+from mat_ceng.csi import _get_warning_area_arguments, create_etabs_group
+from mat_ceng.csi_interop.etabs_api import _get_etabs_model
+
+logger = logging.getLogger(__name__)
+
+_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+# '... Check at (12.5 -3.25 6.9)', separators may be spaces or commas
+WARNING_PATTERN = re.compile(rf'Check at \(\s*({_NUMBER})[\s,]+({_NUMBER})[\s,]+({_NUMBER})\s*\)')
+# first line of the file, e.g. 'Model check, 1523 warnings found': title, comma, count and a word
+HEADER_PATTERN = re.compile(r'^\s*[^,(]+,\s*(\d+)\s+[A-Za-z]')
+
+
+@dataclass
+class WarningTable:
+    xyz: np.ndarray = field(default_factory=lambda: np.zeros((0, 3))) # model units
+    line_numbers: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64)) # 1 based
+    messages: List[str] = field(default_factory=list) # stripped lines, empty if not kept
+    total_warnings: Optional[int] = None # count in the file header
+
+    def __len__(self):
+        return len(self.xyz)
+
+
+@dataclass
+class WarningClusters:
+    location: np.ndarray # (k, 3) mark location: centroid of the busiest grid cell of the cluster
+    count: np.ndarray # warnings per cluster
+    labels: np.ndarray # cluster of every warning of the table
+    messages: List[List[str]] # messages of every cluster, in file order
+
+    def __len__(self):
+        return len(self.location)
+
+    def to_dataframe(self, area_names: Optional[List[Optional[str]]] = None):
+        import pandas as pd
+        df = pd.DataFrame({
+            'Coordinates': [tuple(x) for x in self.location.tolist()],
+            'Count': self.count,
+            'Warnings': ['\n'.join(x) for x in self.messages],
+        })
+        if area_names is not None:
+            df['area_name'] = area_names
+            df.set_index('area_name', inplace=True)
+        return df
+
+
+def parse_warning_lines(lines: Iterable[str],
+                        unit_conversion: float = 1000.0,
+                        keep_messages: bool = True) -> WarningTable:
+    """
+    Collects the located warnings of an ETABS warning listing.
+
+    Args:
+        lines (Iterable[str]): Lines of the file; an open file is streamed.
+        unit_conversion (float): Factor from the file units to the model units.
+                                 Defaults to 1000.0 (m -> mm).
+        keep_messages (bool): Keep the warning lines for the cluster messages.
+
+    Returns:
+        WarningTable
+    """
+    coords = array('d')
+    line_numbers = array('q')
+    messages = []
+    total = None
+    search = WARNING_PATTERN.search
+    for number, line in enumerate(lines, start=1):
+        match = search(line)
+        if match is None:
+            if number == 1:
+                header = HEADER_PATTERN.match(line)
+                total = int(header.group(1)) if header else None
+            continue
+        coords.extend((float(match.group(1)), float(match.group(2)), float(match.group(3))))
+        line_numbers.append(number)
+        if keep_messages:
+            messages.append(line.strip())
+    xyz = np.frombuffer(coords, dtype=float).reshape(-1, 3) * unit_conversion
+    table = WarningTable(xyz, np.frombuffer(line_numbers, dtype=np.int64).copy(), messages, total)
+    if total is not None and total != len(table):
+        logger.info(f"Warning file header lists {total} warnings, {len(table)} have a location.")
+    return table
+
+
+def parse_warning_file(path, unit_conversion: float = 1000.0, keep_messages: bool = True,
+                       encoding: str = 'utf-8') -> WarningTable:
+    """
+    Streams an ETABS warning file into a WarningTable, see parse_warning_lines.
+    """
+    with open(path, 'r', encoding=encoding, errors='replace') as file:
+        return parse_warning_lines(file, unit_conversion, keep_messages)
+
+
+def cluster_warnings(table: WarningTable, tolerance: float = 50.0) -> WarningClusters:
+    """
+    Merges the warnings closer than tolerance into clusters.
+
+    The locations are first snapped to a grid with a cell diagonal of
+    tolerance (every cell is one cluster), the cell centroids are then linked
+    by KD-tree pairs within tolerance (single linkage), so the KD-tree only
+    sees a few points per joint however many warnings it has.
+
+    Args:
+        table (WarningTable): Parsed warnings.
+        tolerance (float): Merge distance in model units; 0 merges identical locations only.
+
+    Returns:
+        WarningClusters, in the order of the first warning of every cluster.
+    """
+    if len(table) == 0:
+        return WarningClusters(np.zeros((0, 3)), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), [])
+
+    if tolerance > 0:
+        cell_size = tolerance / np.sqrt(3.0)
+        keys = np.floor((table.xyz - table.xyz.min(axis=0)) / cell_size).astype(np.int64)
+        dims = keys.max(axis=0) + 1
+        if np.prod(dims.astype(float)) < 2.0 ** 62:
+            # one int64 per cell, a 1D sort is much faster than np.unique(axis=0)
+            keys = np.ravel_multi_index(keys.T, dims)
+    else:
+        keys = table.xyz
+    _, cell_of, cell_count = np.unique(keys, axis=0 if keys.ndim == 2 else None,
+                                       return_inverse=True, return_counts=True)
+    cell_of = cell_of.reshape(-1)
+    n = len(cell_count)
+    centroids = np.column_stack([np.bincount(cell_of, weights=table.xyz[:, i], minlength=n) for i in range(3)])
+    centroids /= cell_count[:, None]
+    if tolerance > 0 and n > 1:
+        pairs = cKDTree(centroids).query_pairs(tolerance, output_type='ndarray')
+        graph = sparse.coo_matrix((np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+        _, cluster_of_cell = csgraph.connected_components(graph, directed=False)
+    else:
+        cluster_of_cell = np.arange(n)
+
+    # number the clusters by their first warning in the file
+    labels = cluster_of_cell[cell_of]
+    _, first = np.unique(labels, return_index=True)
+    renumber = np.empty(len(first), dtype=np.int64)
+    renumber[np.argsort(first, kind='stable')] = np.arange(len(first))
+    labels = renumber[labels]
+    cluster_of_cell = renumber[cluster_of_cell]
+
+    # mark at the centroid of the busiest cell of every cluster
+    order = np.lexsort((-cell_count, cluster_of_cell))
+    _, first = np.unique(cluster_of_cell[order], return_index=True)
+    location = centroids[order[first]]
+    count = np.bincount(labels, minlength=len(location))
+
+    if table.messages:
+        rows = np.argsort(labels, kind='stable')
+        split = np.cumsum(count)[:-1]
+        messages = [[table.messages[i] for i in group] for group in np.split(rows, split)]
+    else:
+        messages = [[] for _ in range(len(location))]
+    return WarningClusters(location, count, labels, messages)
+
+
+def add_warning_marks(clusters: Union[WarningClusters, np.ndarray],
+                      size: float = 500.0,
+                      group_name: Optional[str] = 'Warnings',
+                      SapModel: Optional[Any] = None) -> List[Optional[str]]:
+    """
+    Adds one triangular warning mark per cluster, see mat_ceng.csi.add_etabs_warning_mark.
+
+    The model is looked up once and no log record is written per mark.
+
+    Args:
+        clusters (Union[WarningClusters, np.ndarray]): Clusters or an (n, 3) array of locations.
+        size (float): Mark size, model units.
+        group_name (Optional[str]): Group the marks are assigned to, created if needed
+                                    with mat_ceng.csi.create_etabs_group.
+        SapModel (Optional[Any]): ETABS SapModel. Defaults to the shared CsiHelper connection.
+
+    Returns:
+        List[Optional[str]]: Area name of every mark, None where ETABS refused it.
+    """
+    SapModel = _get_etabs_model(SapModel)
+    locations = clusters.location if isinstance(clusters, WarningClusters) else np.asarray(clusters, dtype=float)
+    if group_name and create_etabs_group(group_name, SapModel) is None:
+        raise RuntimeError(f"Failed creating group '{group_name}', see the log.")
+
+    names = []
+    failed = 0
+    for xyz in locations.tolist():
+        ret = SapModel.AreaObj.AddByCoord(**_get_warning_area_arguments(xyz, size))
+        if ret[0] != 0:
+            names.append(None)
+            failed += 1
+            continue
+        name = str(ret[4])
+        if group_name and SapModel.AreaObj.SetGroupAssign(name, group_name) != 0:
+            failed += 1
+        names.append(name)
+    if failed:
+        logger.error(f"{failed} of {len(names)} warning marks failed.")
+    return names
@@ -0,0 +1,739 @@
+# -*- coding: utf-8 -*-
+"""
+Diff-based synchronisation of the Revit exporter data with an ETABS model.
+
+The Revit element id is used as the ETABS object name (UserName), with a
+'_n' suffix for multi segment elements. Each revision is converted to frame
+and area specs, compared against a ModelSnapshot of the current model and
+only the added, modified and deleted objects are sent to ETABS.
+
+The spec builders apply the geometry corrections of the columns_to_etabs
+workflow: wall base points follow the wall below, beam ends snap to the wall
+points and the line / area loads snap to the structural joints.
+
+Usage:
+    frames = column_frame_specs(columns) + beam_frame_specs(beams, walls)
+    areas = wall_area_specs(walls) + floor_area_specs(floors)
+    joints = spec_points(frames, areas)
+    frames += line_load_frame_specs(line_loads, snap_to=joints)
+    areas += area_load_area_specs(area_loads, snap_to=joints)
+    areas, simplified = simplify_area_specs(areas, tolerance=5.0)
+    report = sync_revit_to_etabs(frames, areas)
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple, Callable, Iterable
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from mat_ceng.utils.geometry_helpers import PointSnapper, SimplifyResult, simplify_polylines
+from mat_ceng.csi_interop.etabs_api import ModelSnapshot, _get_etabs_model, _return_code
+from mat_ceng.revit_interop.sections import (
+    get_etabs_column_concrete_section,
+    get_etabs_beam_cross_section,
+    get_etabs_wall_cross_section,
+    get_etabs_floor_cross_section)
+
+logger = logging.getLogger(__name__)
+
+# Revit element ids, optionally with the '_n' segment suffix
+REVIT_NAME_PATTERN = re.compile(r'\d{5,}(_\d+)?')
+
+
+def is_revit_name(name: str) -> bool:
+    return REVIT_NAME_PATTERN.fullmatch(str(name)) is not None
+
+
+@dataclass
+class FrameSpec:
+    name: str
+    xyz_i: Tuple[float, float, float]
+    xyz_j: Tuple[float, float, float]
+    prop_name: str
+    angle: float = 0.0 # local axis angle, degrees
+
+
+@dataclass
+class AreaSpec:
+    name: str
+    xyz: np.ndarray # (n, 3) boundary points without the closing point
+    prop_name: str
+
+
+@dataclass
+class ModifiedElement:
+    spec: Any
+    changes: Tuple[str, ...] # any of 'geometry', 'section', 'angle'
+
+
+@dataclass
+class SyncPlan:
+    frames_added: List[FrameSpec] = field(default_factory=list)
+    frames_modified: List[ModifiedElement] = field(default_factory=list)
+    frames_deleted: List[str] = field(default_factory=list)
+    areas_added: List[AreaSpec] = field(default_factory=list)
+    areas_modified: List[ModifiedElement] = field(default_factory=list)
+    areas_deleted: List[str] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            'frames_added': len(self.frames_added),
+            'frames_modified': len(self.frames_modified),
+            'frames_deleted': len(self.frames_deleted),
+            'areas_added': len(self.areas_added),
+            'areas_modified': len(self.areas_modified),
+            'areas_deleted': len(self.areas_deleted),
+        }
+
+    @property
+    def is_empty(self) -> bool:
+        return not any(self.summary().values())
+
+
+@dataclass
+class SyncReport:
+    plan: SyncPlan
+    api_calls: int = 0
+    failed: List[str] = field(default_factory=list)
+
+
+# --- Revit exporter data -> specs ---
+def _segment_name(name, indx: int, segment_count: int) -> str:
+    return f'{name}_{indx+1}' if segment_count > 1 else str(name)
+
+
+def _snap_to_targets(points: np.ndarray, limits: np.ndarray, targets: np.ndarray,
+                     target_limits: np.ndarray, z_tolerance: float) -> np.ndarray:
+    """
+    Moves every point (n, 3) in plan onto the nearest target at the same level.
+
+    A point snaps when |dz| <= z_tolerance and its plan distance to the target is
+    within both its own limit and the limit of the target.
+    """
+    snapped = points.copy()
+    if not len(points) or not len(targets):
+        return snapped
+    radius = float(min(limits.max(), target_limits.max()))
+    if radius <= 0:
+        return snapped
+    # z scaled so that any level difference above z_tolerance is out of the search radius
+    scale = radius / z_tolerance
+    snapper = PointSnapper(np.column_stack([targets[:, :2], targets[:, 2] * scale]), radius, epsilon=0.0)
+    result = snapper.snap(np.column_stack([points[:, :2], points[:, 2] * scale]))
+    hit = np.flatnonzero(result.target_index >= 0)
+    target = result.target_index[hit]
+    plan_distance = np.hypot(*(points[hit, :2] - targets[target, :2]).T)
+    ok = (plan_distance <= np.minimum(limits[hit], target_limits[target])) & \
+         (np.abs(points[hit, 2] - targets[target, 2]) <= z_tolerance)
+    snapped[hit[ok], :2] = targets[target[ok], :2]
+    return snapped
+
+
+def _copy_xy(elements: Iterable) -> list:
+    """Copies of the exporter elements with their own x / y lists."""
+    return [[element[0], dict(element[1], x=list(element[1]['x']), y=list(element[1]['y']))]
+            for element in elements]
+
+
+def correct_wall_coordinates(walls: Iterable, threshold: float = 0.4, epsilon: float = 1e-2) -> list:
+    """
+    Moves the wall points onto the points of the walls below them.
+
+    Vectorized correct_wall_coordinates_to_follow_wall_below of the
+    columns_to_etabs workflow: a point of a wall snaps to the nearest point of a
+    wall whose top is at the wall base, within threshold * wall thickness. The
+    levels are processed from the lowest up, so corrections carry up the stack.
+
+    Returns:
+        list: Corrected copies of the walls, the input is not modified.
+    """
+    walls = _copy_xy(walls)
+    if not walls:
+        return walls
+    counts = np.array([len(wall[1]['x']) for wall in walls], dtype=np.int64)
+    owner = np.repeat(np.arange(len(walls)), counts)
+    xy = np.column_stack([np.concatenate([wall[1]['x'] for wall in walls]),
+                          np.concatenate([wall[1]['y'] for wall in walls])]).astype(float)
+    z_base = np.array([wall[1]['z_base'] for wall in walls], dtype=float)[owner]
+    z_top = np.array([wall[1]['z_top'] for wall in walls], dtype=float)[owner]
+    limit = threshold * np.array([wall[1]['thk'] for wall in walls], dtype=float)[owner]
+
+    for level in np.unique(z_base):
+        sources = np.flatnonzero(z_base == level)
+        targets = np.flatnonzero(np.abs(z_top - level) <= epsilon)
+        if not len(targets):
+            continue
+        points = np.column_stack([xy[sources], np.full(len(sources), level)])
+        target_xyz = np.column_stack([xy[targets], np.full(len(targets), level)])
+        xy[sources] = _snap_to_targets(points, limit[sources], target_xyz,
+                                       np.full(len(targets), np.inf), epsilon)[:, :2]
+
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    for wall, start, count in zip(walls, starts, counts):
+        wall[1]['x'] = xy[start:start + count, 0].tolist()
+        wall[1]['y'] = xy[start:start + count, 1].tolist()
+    return walls
+
+
+def _snap_beam_points(points: np.ndarray, walls: list, threshold: float = 0.501,
+                      epsilon: float = 1e-2) -> np.ndarray:
+    """Beam points (n, 3) snapped onto the points of the walls whose top is at their level."""
+    if not walls:
+        return points.copy()
+    wall_counts = [len(wall[1]['x']) for wall in walls]
+    targets = np.column_stack([np.concatenate([wall[1]['x'] for wall in walls]),
+                               np.concatenate([wall[1]['y'] for wall in walls]),
+                               np.repeat([wall[1]['z_top'] for wall in walls], wall_counts)]).astype(float)
+    target_limits = threshold * np.repeat([wall[1]['thk'] for wall in walls], wall_counts).astype(float)
+    return _snap_to_targets(points, np.full(len(points), np.inf), targets, target_limits, epsilon)
+
+
+def correct_beam_coordinates(beams: Iterable, walls: Iterable, threshold: float = 0.501,
+                             epsilon: float = 1e-2) -> list:
+    """
+    Moves the beam points onto the points of the walls they frame into.
+
+    Vectorized correct_beam_coordinates_to_connect_wall_points of the
+    columns_to_etabs workflow: a beam point snaps to the nearest point of a wall
+    whose top is at the beam level, within threshold * thickness of that wall.
+    The walls are expected already corrected (correct_wall_coordinates).
+
+    Returns:
+        list: Corrected copies of the beams, the input is not modified.
+    """
+    beams = _copy_xy(beams)
+    walls = list(walls)
+    if not beams or not walls:
+        return beams
+    counts = np.array([len(beam[1]['x']) for beam in beams], dtype=np.int64)
+    points = np.column_stack([np.concatenate([beam[1]['x'] for beam in beams]),
+                              np.concatenate([beam[1]['y'] for beam in beams]),
+                              np.repeat([beam[1]['z'] for beam in beams], counts)]).astype(float)
+    points = _snap_beam_points(points, walls, threshold, epsilon)
+
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    for beam, start, count in zip(beams, starts, counts):
+        beam[1]['x'] = points[start:start + count, 0].tolist()
+        beam[1]['y'] = points[start:start + count, 1].tolist()
+    return beams
+
+
+def _snapper(snap_to: Any, min_snap_distance: float) -> Optional[PointSnapper]:
+    if snap_to is None or isinstance(snap_to, PointSnapper):
+        return snap_to
+    return PointSnapper(snap_to, min_snap_distance)
+
+
+def column_frame_specs(columns: Iterable) -> List[FrameSpec]:
+    specs = []
+    for column in columns:
+        data = column[1]
+        specs.append(FrameSpec(
+            name=str(column[0]),
+            xyz_i=(data['x'], data['y'], data['z_base']),
+            xyz_j=(data['x'], data['y'], data['z_top']),
+            prop_name=get_etabs_column_concrete_section(column),
+            angle=float(data['angle'])))
+    return specs
+
+
+def beam_frame_specs(beams: Iterable, walls: Optional[Iterable] = None) -> List[FrameSpec]:
+    """
+    Beam segments; with walls, the beam ends are first snapped to the wall
+    points (correct_beam_coordinates on the corrected walls).
+    """
+    if walls is not None:
+        beams = correct_beam_coordinates(beams, correct_wall_coordinates(walls))
+    specs = []
+    for beam in beams:
+        data = beam[1]
+        x, y, z = data['x'], data['y'], data['z']
+        section_name = get_etabs_beam_cross_section(beam)
+        segment_count = len(x) - 1
+        for indx in range(segment_count):
+            specs.append(FrameSpec(
+                name=_segment_name(beam[0], indx, segment_count),
+                xyz_i=(x[indx], y[indx], z),
+                xyz_j=(x[indx+1], y[indx+1], z),
+                prop_name=section_name,
+                angle=float(data['angle'])))
+    return specs
+
+
+def line_load_frame_specs(line_loads: Iterable, section_prefix: str = 'dummy_load_',
+                          snap_to: Any = None, min_snap_distance: float = 500.0) -> List[FrameSpec]:
+    """
+    Dummy frames of the line loads.
+
+    Args:
+        snap_to: Joints (n, 3) or a PointSnapper; the load ends are moved to the
+                 nearest joint within min_snap_distance (auto_snap of the workflow).
+    """
+    snapper = _snapper(snap_to, min_snap_distance)
+    specs = []
+    for line_load in line_loads:
+        data = line_load[1]
+        xyz = np.column_stack([data['x'], data['y'], data['z']]).astype(float)
+        if snapper is not None:
+            xyz = snapper.snap(xyz).points
+        section_name = section_prefix + data['line_load_type']
+        segment_count = len(xyz) - 1
+        for indx in range(segment_count):
+            specs.append(FrameSpec(
+                name=_segment_name(line_load[0], indx, segment_count),
+                xyz_i=tuple(xyz[indx]),
+                xyz_j=tuple(xyz[indx+1]),
+                prop_name=section_name))
+    return specs
+
+
+def wall_area_specs(walls: Iterable, follow_wall_below: bool = True) -> List[AreaSpec]:
+    """
+    One area per wall segment; the wall points follow the wall below by
+    default (correct_wall_coordinates).
+    """
+    if follow_wall_below:
+        walls = correct_wall_coordinates(walls)
+    specs = []
+    for wall in walls:
+        data = wall[1]
+        x, y = data['x'], data['y']
+        z_base, z_top = data['z_base'], data['z_top']
+        section_name = get_etabs_wall_cross_section(wall)
+        segment_count = len(x) - 1
+        for indx in range(segment_count):
+            xyz = np.array([
+                [x[indx], y[indx], z_base],
+                [x[indx+1], y[indx+1], z_base],
+                [x[indx+1], y[indx+1], z_top],
+                [x[indx], y[indx], z_top],
+            ], dtype=float)
+            specs.append(AreaSpec(_segment_name(wall[0], indx, segment_count), xyz, section_name))
+    return specs
+
+
+def floor_area_specs(floors: Iterable) -> List[AreaSpec]:
+    specs = []
+    for floor in floors:
+        data = floor[1]
+        section_name = get_etabs_floor_cross_section(floor)
+        slab_count = len(data['x'])
+        for i in range(slab_count):
+            # exporter outlines are closed, ETABS takes the open loop
+            pnt_x = data['x'][i][:-1]
+            pnt_y = data['y'][i][:-1]
+            xyz = np.column_stack([pnt_x, pnt_y, np.full(len(pnt_x), data['z'])]).astype(float)
+            specs.append(AreaSpec(_segment_name(floor[0], i, slab_count), xyz, section_name))
+    return specs
+
+
+def area_load_area_specs(area_loads: Iterable, prop_name: str = 'None',
+                         snap_to: Any = None, min_snap_distance: float = 500.0) -> List[AreaSpec]:
+    """
+    Areas of the area loads.
+
+    Args:
+        snap_to: Joints (n, 3) or a PointSnapper; the boundary points are moved to
+                 the nearest joint within min_snap_distance (auto_snap of the workflow).
+    """
+    snapper = _snapper(snap_to, min_snap_distance)
+    specs = []
+    for area_load in area_loads:
+        data = area_load[1]
+        pnt_x = data['x'][:-1]
+        pnt_y = data['y'][:-1]
+        xyz = np.column_stack([pnt_x, pnt_y, np.full(len(pnt_x), data['z'])]).astype(float)
+        if snapper is not None:
+            xyz = snapper.snap(xyz).points
+        specs.append(AreaSpec(str(area_load[0]), xyz, prop_name))
+    return specs
+
+
+def spec_points(frames: Iterable[FrameSpec], areas: Iterable[AreaSpec]) -> np.ndarray:
+    """Unique joints (n, 3) of the frame and area specs, the snapping targets of the loads."""
+    frames, areas = list(frames), list(areas)
+    points = [np.array([x.xyz_i for x in frames], dtype=float).reshape(-1, 3),
+              np.array([x.xyz_j for x in frames], dtype=float).reshape(-1, 3)]
+    points += [np.asarray(x.xyz, dtype=float).reshape(-1, 3) for x in areas]
+    return np.unique(np.concatenate(points), axis=0)
+
+
+def simplify_area_specs(specs: List[AreaSpec],
+                        tolerance: float) -> Tuple[List[AreaSpec], SimplifyResult]:
+    """
+    Removes the boundary points closer than tolerance to the simplified outline.
+
+    All the outlines are simplified in one batch (Douglas-Peucker, see
+    simplify_polylines); every outline keeps at least 3 points. Self
+    intersections created by large tolerances are not checked.
+
+    Args:
+        specs (List[AreaSpec]): Areas with open boundary loops.
+        tolerance (float): Largest allowed deviation of a removed point, model units.
+
+    Returns:
+        Tuple[List[AreaSpec], SimplifyResult]: The simplified specs and the
+        vertex reduction / max deviation of every spec.
+    """
+    # close every loop so the segment back to the first point is checked too
+    loops = [np.vstack([spec.xyz, spec.xyz[:1]]) for spec in specs]
+    offsets = np.concatenate([[0], np.cumsum([len(x) for x in loops])]).astype(np.int64)
+    coords = np.concatenate(loops) if loops else np.zeros((0, 3))
+    result = simplify_polylines(coords, offsets, tolerance, closed=[len(x) >= 4 for x in loops])
+    simplified = [AreaSpec(spec.name, result[i][:-1], spec.prop_name) for i, spec in enumerate(specs)]
+    if specs:
+        logger.info(f"Simplified {len(specs)} areas: {result.reduction:.1%} of the points removed, "
+                    f"max deviation {result.max_deviation.max():.3g}.")
+    return simplified, result
+
+
+# --- Diff ---
+def _unique_specs(specs: Iterable, kind: str) -> Dict[str, Any]:
+    by_name = {}
+    for spec in specs:
+        if spec.name in by_name:
+            logger.warning(f"Duplicate {kind} name '{spec.name}' in Revit data; keeping the last one.")
+        by_name[spec.name] = spec
+    return by_name
+
+
+def diff_frames(specs: Iterable[FrameSpec],
+                snapshot: ModelSnapshot,
+                tolerance: float = 1.0,
+                angle_tolerance: float = 0.01,
+                is_managed: Callable[[str], bool] = is_revit_name
+                ) -> Tuple[List[FrameSpec], List[ModifiedElement], List[str]]:
+    """
+    Compares frame specs with the snapshot frames.
+
+    Args:
+        specs (Iterable[FrameSpec]): Frames expected in the model.
+        snapshot (ModelSnapshot): Current model state.
+        tolerance (float): End point tolerance in model units.
+        angle_tolerance (float): Local axis angle tolerance, degrees.
+        is_managed (Callable[[str], bool]): Model objects for which this returns
+                                            False are never deleted.
+
+    The end points are compared regardless of their order.
+
+    Returns:
+        Tuple: (added, modified, deleted frame names)
+    """
+    desired = _unique_specs(specs, 'frame')
+    frames = snapshot.frames
+
+    added = [spec for name, spec in desired.items() if name not in frames.index]
+    deleted = [name for name in frames.names if is_managed(name) and name not in desired]
+
+    common = [spec for name, spec in desired.items() if name in frames.index]
+    modified = []
+    if common:
+        rows = frames.rows(x.name for x in common)
+        xyz_i = np.array([x.xyz_i for x in common], dtype=float)
+        xyz_j = np.array([x.xyz_j for x in common], dtype=float)
+        angle = np.array([x.angle for x in common], dtype=float)
+        prop_names = np.array([x.prop_name for x in common], dtype=object)
+
+        current_i, current_j = frames.xyz_i[rows], frames.xyz_j[rows]
+        same = np.maximum(np.abs(xyz_i - current_i).max(axis=1), np.abs(xyz_j - current_j).max(axis=1))
+        # the same frame drawn from the other end is not a geometry change
+        swapped = np.maximum(np.abs(xyz_i - current_j).max(axis=1), np.abs(xyz_j - current_i).max(axis=1))
+        geometry = np.minimum(same, swapped) > tolerance
+        section = prop_names != frames.prop_names[rows]
+        rotation = np.abs(angle - frames.angle[rows]) > angle_tolerance
+
+        for k in np.flatnonzero(geometry | section | rotation):
+            changes = tuple(label for label, flag in
+                            (('geometry', geometry[k]), ('section', section[k]), ('angle', rotation[k])) if flag)
+            modified.append(ModifiedElement(common[k], changes))
+    return added, modified, deleted
+
+
+def diff_areas(specs: Iterable[AreaSpec],
+               snapshot: ModelSnapshot,
+               tolerance: float = 1.0,
+               is_managed: Callable[[str], bool] = is_revit_name
+               ) -> Tuple[List[AreaSpec], List[ModifiedElement], List[str]]:
+    """
+    Compares area specs with the snapshot areas.
+
+    Boundary points are compared in order. Sections are only compared for
+    areas whose property is known in the snapshot (see load_area_properties).
+
+    Returns:
+        Tuple: (added, modified, deleted area names)
+    """
+    desired = _unique_specs(specs, 'area')
+    areas = snapshot.areas
+
+    added = [spec for name, spec in desired.items() if name not in areas.index]
+    deleted = [name for name in areas.names if is_managed(name) and name not in desired]
+
+    common = [spec for name, spec in desired.items() if name in areas.index]
+    modified = []
+    if common:
+        rows = areas.rows(x.name for x in common)
+        counts_desired = np.array([len(x.xyz) for x in common], dtype=np.int64)
+        counts_current = np.diff(areas.offsets)[rows]
+        geometry = counts_desired != counts_current
+
+        # point by point deviation for the areas with the same point count
+        same = np.flatnonzero(~geometry)
+        if len(same):
+            counts = counts_desired[same]
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            local = np.arange(counts.sum()) - np.repeat(starts, counts)
+            current_idx = np.repeat(areas.offsets[rows[same]], counts) + local
+            desired_xyz = np.concatenate([common[k].xyz for k in same])
+            deviation = np.abs(desired_xyz - areas.xyz[current_idx]).max(axis=1)
+            geometry[same] = np.maximum.reduceat(deviation, starts) > tolerance
+
+        current_props = areas.prop_names[rows]
+        prop_names = np.array([x.prop_name for x in common], dtype=object)
+        section = np.array([c is not None and c != p for c, p in zip(current_props, prop_names)], dtype=bool)
+
+        for k in np.flatnonzero(geometry | section):
+            changes = tuple(label for label, flag in
+                            (('geometry', geometry[k]), ('section', section[k])) if flag)
+            modified.append(ModifiedElement(common[k], changes))
+    return added, modified, deleted
+
+
+def plan_sync(frames: Iterable[FrameSpec],
+              areas: Iterable[AreaSpec],
+              snapshot: ModelSnapshot,
+              tolerance: float = 1.0,
+              is_managed: Callable[[str], bool] = is_revit_name) -> SyncPlan:
+    frames_added, frames_modified, frames_deleted = diff_frames(
+        frames, snapshot, tolerance=tolerance, is_managed=is_managed)
+    areas_added, areas_modified, areas_deleted = diff_areas(
+        areas, snapshot, tolerance=tolerance, is_managed=is_managed)
+    plan = SyncPlan(frames_added, frames_modified, frames_deleted,
+                    areas_added, areas_modified, areas_deleted)
+    logger.info(f"Sync plan: {plan.summary()}")
+    return plan
+
+
+# --- Apply ---
+def _add_frame(SapModel, spec: FrameSpec, report: SyncReport) -> None:
+    AddByCoord = {
+        'XI': float(spec.xyz_i[0]),
+        'YI': float(spec.xyz_i[1]),
+        'ZI': float(spec.xyz_i[2]),
+        'XJ': float(spec.xyz_j[0]),
+        'YJ': float(spec.xyz_j[1]),
+        'ZJ': float(spec.xyz_j[2]),
+        'Name': spec.name,
+        'PropName': spec.prop_name,
+        'UserName': spec.name,
+        'CSys': 'Global'
+    }
+    ret = SapModel.FrameObj.AddByCoord(**AddByCoord)
+    report.api_calls += 1
+    if ret[0] != 0:
+        logger.warning(f'Error in adding frame {spec.name}; ETABS CODE {ret[0]}')
+        report.failed.append(spec.name)
+        return
+    if round(spec.angle, 3) != 0:
+        _set_frame_angle(SapModel, spec, report)
+
+
+def _set_frame_angle(SapModel, spec: FrameSpec, report: SyncReport) -> None:
+    ret = SapModel.FrameObj.SetLocalAxes(spec.name, float(spec.angle))
+    report.api_calls += 1
+    if ret != 0:
+        logger.warning(f'Error in setting local axes of frame {spec.name}; ETABS CODE {ret}')
+        report.failed.append(spec.name)
+
+
+def _add_area(SapModel, spec: AreaSpec, report: SyncReport) -> None:
+    AddByCoord = {
+        'NumberPoints': len(spec.xyz),
+        'X': [float(x) for x in spec.xyz[:, 0]],
+        'Y': [float(x) for x in spec.xyz[:, 1]],
+        'Z': [float(x) for x in spec.xyz[:, 2]],
+        'Name': spec.name,
+        'PropName': spec.prop_name if spec.prop_name else 'Default',
+        'UserName': spec.name,
+        'CSys': 'Global'
+    }
+    ret = SapModel.AreaObj.AddByCoord(**AddByCoord)
+    report.api_calls += 1
+    if ret[0] != 0:
+        logger.warning(f'Error in adding area {spec.name}; ETABS CODE {ret[0]}')
+        report.failed.append(spec.name)
+
+
+def _delete(interface, name: str, kind: str, report: SyncReport) -> bool:
+    ret = interface.Delete(name)
+    report.api_calls += 1
+    if ret != 0:
+        logger.warning(f'Error in deleting {kind} {name}; ETABS CODE {ret}')
+        report.failed.append(name)
+        return False
+    return True
+
+
+class _JointNames:
+    """
+    Point object names for coordinates: existing joints of the snapshot within
+    the tolerance are reused, other coordinates are added with PointObj.AddCartesian
+    (once, later requests for the same coordinates reuse the new point).
+    """
+    def __init__(self, SapModel, snapshot: Optional[ModelSnapshot], tolerance: float):
+        self.SapModel = SapModel
+        self.tolerance = tolerance
+        points = snapshot.points if snapshot is not None else None
+        self.names = list(points.names) if points is not None else []
+        self.tree = cKDTree(points.xyz) if self.names else None
+        self.added = {}
+
+    def name(self, xyz, report: SyncReport) -> Optional[str]:
+        xyz = tuple(float(x) for x in xyz)
+        if self.tree is not None:
+            distance, row = self.tree.query(xyz, distance_upper_bound=self.tolerance)
+            if np.isfinite(distance):
+                return self.names[row]
+        key = tuple(round(x / self.tolerance) for x in xyz) if self.tolerance > 0 else xyz
+        if key in self.added:
+            return self.added[key]
+        ret = self.SapModel.PointObj.AddCartesian(*xyz, '', '', 'Global')
+        report.api_calls += 1
+        if _return_code(ret) != 0:
+            logger.warning(f'Error in adding point at {xyz}; ETABS CODE {_return_code(ret)}')
+            return None
+        self.added[key] = str(ret[1])
+        return self.added[key]
+
+
+def _move_frame(SapModel, spec: FrameSpec, joints: _JointNames, report: SyncReport) -> None:
+    """Reconnects the existing frame to the new end points, keeping its assignments."""
+    point_i, point_j = joints.name(spec.xyz_i, report), joints.name(spec.xyz_j, report)
+    if point_i is None or point_j is None:
+        report.failed.append(spec.name)
+        return
+    ret = SapModel.EditFrame.ChangeConnectivity(spec.name, point_i, point_j)
+    report.api_calls += 1
+    if _return_code(ret) != 0:
+        logger.warning(f'Error in moving frame {spec.name}; ETABS CODE {_return_code(ret)}')
+        report.failed.append(spec.name)
+
+
+def _move_area(SapModel, spec: AreaSpec, joints: _JointNames, report: SyncReport) -> None:
+    """Reconnects the existing area to the new boundary points, keeping its assignments."""
+    points = [joints.name(xyz, report) for xyz in spec.xyz]
+    if any(x is None for x in points):
+        report.failed.append(spec.name)
+        return
+    ret = SapModel.EditArea.ChangeConnectivity(spec.name, len(points), points)
+    report.api_calls += 1
+    if _return_code(ret) != 0:
+        logger.warning(f'Error in moving area {spec.name}; ETABS CODE {_return_code(ret)}')
+        report.failed.append(spec.name)
+
+
+def apply_sync_plan(plan: SyncPlan,
+                    SapModel: Optional[Any] = None,
+                    refresh_view: bool = True,
+                    snapshot: Optional[ModelSnapshot] = None,
+                    tolerance: float = 1.0) -> SyncReport:
+    """
+    Sends a SyncPlan to ETABS.
+
+    Only the added objects are created and only the deleted ones removed.
+    Modified objects are edited in place, so their loads, groups, releases and
+    labels survive: geometry changes reconnect the object to its new joints
+    (EditFrame / EditArea.ChangeConnectivity), section and angle changes use
+    SetSection / SetProperty / SetLocalAxes.
+
+    Args:
+        plan (SyncPlan): The plan from plan_sync().
+        SapModel (Optional[Any]): ETABS SapModel. Defaults to the shared CsiHelper connection.
+        refresh_view (bool): If True (default), refreshes the ETABS view once at the end.
+        snapshot (Optional[ModelSnapshot]): Model state the plan was computed from; its
+                                            joints are reused for the moved objects.
+        tolerance (float): Distance within which an existing joint is reused, model units.
+
+    Returns:
+        SyncReport: API call count and names of the failed objects.
+    """
+    SapModel = _get_etabs_model(SapModel)
+    report = SyncReport(plan)
+    joints = _JointNames(SapModel, snapshot, tolerance)
+
+    for name in plan.frames_deleted:
+        _delete(SapModel.FrameObj, name, 'frame', report)
+    for name in plan.areas_deleted:
+        _delete(SapModel.AreaObj, name, 'area', report)
+
+    for spec in plan.frames_added:
+        _add_frame(SapModel, spec, report)
+    for spec in plan.areas_added:
+        _add_area(SapModel, spec, report)
+
+    for item in plan.frames_modified:
+        spec = item.spec
+        if 'geometry' in item.changes:
+            _move_frame(SapModel, spec, joints, report)
+        if 'section' in item.changes:
+            ret = SapModel.FrameObj.SetSection(spec.name, spec.prop_name)
+            report.api_calls += 1
+            if ret != 0:
+                logger.warning(f'Error in assigning section to frame {spec.name}; ETABS CODE {ret}')
+                report.failed.append(spec.name)
+        if 'angle' in item.changes:
+            _set_frame_angle(SapModel, spec, report)
+
+    for item in plan.areas_modified:
+        spec = item.spec
+        if 'geometry' in item.changes:
+            _move_area(SapModel, spec, joints, report)
+        if 'section' in item.changes:
+            ret = SapModel.AreaObj.SetProperty(spec.name, spec.prop_name)
+            report.api_calls += 1
+            if ret != 0:
+                logger.warning(f'Error in assigning property to area {spec.name}; ETABS CODE {ret}')
+                report.failed.append(spec.name)
+
+    if refresh_view and not plan.is_empty:
+        ret = SapModel.View.RefreshView(0, False)
+        report.api_calls += 1
+        if ret != 0:
+            logger.warning(f'Error in refreshing the ETABS view; ETABS CODE {ret}')
+
+    logger.info(f"Sync applied with {report.api_calls} API calls; {len(report.failed)} failed.")
+    return report
+
+
+def sync_revit_to_etabs(frames: Iterable[FrameSpec],
+                        areas: Iterable[AreaSpec],
+                        SapModel: Optional[Any] = None,
+                        tolerance: float = 1.0,
+                        is_managed: Callable[[str], bool] = is_revit_name,
+                        dry_run: bool = False) -> SyncReport:
+    """
+    Brings the ETABS model in line with the Revit specs, touching only the differences.
+
+    The current model is read with 4 bulk calls (points, frames, areas and the
+    area section table) before the plan is computed.
+
+    Args:
+        frames (Iterable[FrameSpec]): Columns, beams and line load frames from the Revit export.
+        areas (Iterable[AreaSpec]): Walls, floors and area loads from the Revit export.
+        SapModel (Optional[Any]): ETABS SapModel. Defaults to the shared CsiHelper connection.
+        tolerance (float): Coordinate tolerance in model units (mm with N_mm_C).
+        is_managed (Callable[[str], bool]): Filter for model objects that may be deleted.
+        dry_run (bool): If True, only computes the plan.
+
+    Returns:
+        SyncReport: The plan with the API call count and failed names.
+    """
+    snapshot = ModelSnapshot.load(SapModel)
+    snapshot.load_area_properties()
+    plan = plan_sync(frames, areas, snapshot, tolerance=tolerance, is_managed=is_managed)
+    if dry_run:
+        return SyncReport(plan)
+    return apply_sync_plan(plan, snapshot.SapModel, snapshot=snapshot, tolerance=tolerance)
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+Reconciliation of the Revit exporter frames against the ETABS frames.
+
+Both sides are reduced to a FrameSet (names, end points, section and level
+arrays). Frames are paired by name first (Revit id, '_n' for segments) and
+the remaining ones by geometry with a KD-tree on the 6D end point vectors,
+so a full model is checked in O(n log n) instead of the nested loops of the
+check notebook.
+
+Categories of the report:
+    missing        Revit frame without an ETABS frame
+    extra          ETABS frame without a Revit frame
+    renamed        paired by geometry only, the ETABS name differs
+    moved          paired by name, an end point is off by more than the tolerance
+    wrong_section  ETABS section differs from the Revit section name
+    wrong_level    ETABS story differs from the Revit level
+
+Usage:
+    stores = load_element_stores('test_data', kinds=['column', 'beam'])
+    revit = concat_frame_sets([columns_frame_set(stores['column']), beams_frame_set(stores['beam'], stores.get('wall'))])
+    report = reconcile_frames(revit, table_frame_set(ModelSnapshot.load().frames), tolerance=1.0)
+    report.summary()
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from mat_ceng.csi_interop.etabs_api import ModelSnapshot
+from mat_ceng.csi_interop.model_sync import correct_wall_coordinates, _snap_beam_points
+from mat_ceng.revit_interop.sections import section_names
+
+MISMATCH_CATEGORIES = ('missing', 'extra', 'renamed', 'moved', 'wrong_section', 'wrong_level')
+
+
+def _object_array(values: Iterable) -> np.ndarray:
+    values = list(values)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+@dataclass
+class FrameSet:
+    names: np.ndarray # str object array
+    xyz_i: np.ndarray # (n, 3)
+    xyz_j: np.ndarray # (n, 3)
+    prop_names: np.ndarray # object array, None if unknown
+    levels: np.ndarray # object array, level / story name, None if unknown
+
+    def __len__(self):
+        return len(self.names)
+
+    def take(self, rows: np.ndarray) -> 'FrameSet':
+        return FrameSet(self.names[rows], self.xyz_i[rows], self.xyz_j[rows], self.prop_names[rows], self.levels[rows])
+
+
+def columns_frame_set(columns) -> FrameSet:
+    """
+    Column ElementStore to a FrameSet.
+
+    ETABS assigns a column to the story at its top, so the Revit top_level is used.
+    """
+    n = len(columns)
+    return FrameSet(
+        names=_object_array(str(x) for x in columns.ids.tolist()),
+        xyz_i=np.column_stack([columns['x'], columns['y'], columns['z_base']]).reshape(n, 3),
+        xyz_j=np.column_stack([columns['x'], columns['y'], columns['z_top']]).reshape(n, 3),
+        prop_names=section_names(columns),
+        levels=columns['top_level'].decode())
+
+
+def beams_frame_set(beams, walls=None) -> FrameSet:
+    """
+    Beam ElementStore to a FrameSet, one frame per polyline segment.
+
+    Segment names follow model_sync: '<id>_<n>' for multi segment beams, '<id>' otherwise.
+    With a wall ElementStore the beam points are snapped to the corrected wall
+    points as beam_frame_specs(beams, walls) does, so the end points are the ones
+    sent to ETABS.
+    """
+    x, y = beams['x'], beams['y']
+    z_points = np.repeat(beams['z'], x.lengths())
+    x_points, y_points = x.values, y.values
+    if walls is not None and len(walls):
+        wall_items = correct_wall_coordinates([wall_id, walls.get(wall_id)] for wall_id in walls.ids.tolist())
+        points = _snap_beam_points(np.column_stack([x_points, y_points, z_points]).astype(float), wall_items)
+        x_points, y_points = points[:, 0], points[:, 1]
+    points = x.lengths()
+    segments = np.maximum(points - 1, 0)
+    beam_rows = np.repeat(np.arange(len(beams)), segments)
+    # start point of every segment: all polyline points except the last of each beam
+    is_start = np.ones(len(x.values), dtype=bool)
+    is_start[x.offsets[1:][points > 0] - 1] = False
+    start = np.flatnonzero(is_start)
+    z = beams['z'][beam_rows]
+    ids = beams.ids.tolist()
+    segment_index = np.arange(len(beam_rows)) - np.repeat(np.cumsum(segments) - segments, segments)
+    names = _object_array(
+        f'{ids[row]}_{indx + 1}' if segments[row] > 1 else str(ids[row])
+        for row, indx in zip(beam_rows.tolist(), segment_index.tolist()))
+    return FrameSet(
+        names=names,
+        xyz_i=np.column_stack([x_points[start], y_points[start], z]).reshape(-1, 3),
+        xyz_j=np.column_stack([x_points[start + 1], y_points[start + 1], z]).reshape(-1, 3),
+        prop_names=section_names(beams)[beam_rows],
+        levels=beams['level'].decode()[beam_rows])
+
+
+def table_frame_set(frames) -> FrameSet:
+    """ETABS FrameTable (ModelSnapshot.frames) to a FrameSet."""
+    return FrameSet(
+        names=_object_array(str(x) for x in frames.names),
+        xyz_i=np.asarray(frames.xyz_i, dtype=float).reshape(-1, 3),
+        xyz_j=np.asarray(frames.xyz_j, dtype=float).reshape(-1, 3),
+        prop_names=_object_array(frames.prop_names),
+        levels=_object_array(frames.story_names))
+
+
+def concat_frame_sets(frame_sets: Iterable[FrameSet]) -> FrameSet:
+    frame_sets = list(frame_sets)
+    if not frame_sets:
+        return FrameSet(_object_array([]), np.zeros((0, 3)), np.zeros((0, 3)), _object_array([]), _object_array([]))
+    return FrameSet(
+        names=np.concatenate([x.names for x in frame_sets]),
+        xyz_i=np.concatenate([x.xyz_i for x in frame_sets]),
+        xyz_j=np.concatenate([x.xyz_j for x in frame_sets]),
+        prop_names=np.concatenate([x.prop_names for x in frame_sets]),
+        levels=np.concatenate([x.levels for x in frame_sets]))
+
+
+@dataclass
+class ReconciliationReport:
+    """
+    One row per mismatch; a pair with a wrong section and a wrong level gives two rows.
+
+    revit_value / etabs_value hold the section or level names for the wrong_section
+    and wrong_level rows; deviation is the largest end point coordinate difference.
+    """
+    category: np.ndarray = field(default_factory=lambda: _object_array([]))
+    revit_name: np.ndarray = field(default_factory=lambda: _object_array([]))
+    etabs_name: np.ndarray = field(default_factory=lambda: _object_array([]))
+    revit_value: np.ndarray = field(default_factory=lambda: _object_array([]))
+    etabs_value: np.ndarray = field(default_factory=lambda: _object_array([]))
+    deviation: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    matched: int = 0 # number of Revit / ETABS pairs
+
+    def __len__(self):
+        return len(self.category)
+
+    def summary(self) -> Dict[str, int]:
+        return {key: int(np.count_nonzero(self.category == key)) for key in MISMATCH_CATEGORIES}
+
+    def select(self, category: str) -> 'ReconciliationReport':
+        if category not in MISMATCH_CATEGORIES:
+            raise ValueError(f"Unknown category '{category}', expected one of {MISMATCH_CATEGORIES}")
+        rows = np.flatnonzero(self.category == category)
+        return ReconciliationReport(self.category[rows], self.revit_name[rows], self.etabs_name[rows],
+                                    self.revit_value[rows], self.etabs_value[rows], self.deviation[rows],
+                                    self.matched)
+
+    def rows(self) -> Iterator[Tuple]:
+        return zip(self.category, self.revit_name, self.etabs_name,
+                   self.revit_value, self.etabs_value, self.deviation.tolist())
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame({
+            'category': self.category,
+            'revit_name': self.revit_name,
+            'etabs_name': self.etabs_name,
+            'revit_value': self.revit_value,
+            'etabs_value': self.etabs_value,
+            'deviation': self.deviation,
+        })
+
+
+def _check_unique(names: np.ndarray, side: str) -> None:
+    unique, counts = np.unique(names.astype(str), return_counts=True)
+    if np.any(counts > 1):
+        raise ValueError(f"Duplicate {side} frame names: {unique[counts > 1][:10].tolist()}")
+
+
+def _end_point_deviation(revit: FrameSet, etabs: FrameSet, r: np.ndarray, e: np.ndarray) -> np.ndarray:
+    """Largest coordinate difference of the end points, either frame direction."""
+    same = np.maximum(np.abs(revit.xyz_i[r] - etabs.xyz_i[e]).max(axis=1, initial=0),
+                      np.abs(revit.xyz_j[r] - etabs.xyz_j[e]).max(axis=1, initial=0))
+    flipped = np.maximum(np.abs(revit.xyz_i[r] - etabs.xyz_j[e]).max(axis=1, initial=0),
+                         np.abs(revit.xyz_j[r] - etabs.xyz_i[e]).max(axis=1, initial=0))
+    return np.minimum(same, flipped)
+
+
+def _match_by_geometry(revit: FrameSet, etabs: FrameSet, r: np.ndarray, e: np.ndarray,
+                       tolerance: float) -> Tuple[np.ndarray, np.ndarray]:
+    """One to one pairs of rows r and e with all end point coordinates within tolerance."""
+    if len(r) == 0 or len(e) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    tree = cKDTree(np.hstack([etabs.xyz_i[e], etabs.xyz_j[e]]))
+    bound = np.nextafter(tolerance, np.inf) # inclusive tolerance
+    distance, nearest = tree.query(np.hstack([revit.xyz_i[r], revit.xyz_j[r]]), p=np.inf, distance_upper_bound=bound)
+    distance_flip, nearest_flip = tree.query(np.hstack([revit.xyz_j[r], revit.xyz_i[r]]), p=np.inf, distance_upper_bound=bound)
+    use_flip = distance_flip < distance
+    distance = np.where(use_flip, distance_flip, distance)
+    nearest = np.where(use_flip, nearest_flip, nearest)
+    found = np.isfinite(distance)
+    candidates = np.flatnonzero(found)
+    # closest pairs first, each ETABS frame is used once
+    candidates = candidates[np.argsort(distance[candidates], kind='stable')]
+    _, first = np.unique(nearest[candidates], return_index=True)
+    candidates = np.sort(candidates[first])
+    return r[candidates], e[nearest[candidates]]
+
+
+def reconcile_frames(revit: FrameSet,
+                     etabs: FrameSet,
+                     tolerance: float = 1.0,
+                     match_geometry: bool = True,
+                     story_of_level: Optional[Dict[str, str]] = None,
+                     is_managed: Optional[Callable[[str], bool]] = None
+                     ) -> ReconciliationReport:
+    """
+    Categorised mismatches between the Revit and the ETABS frames.
+
+    Args:
+        revit: frames of the Revit export, see columns_frame_set / beams_frame_set.
+        etabs: frames of the ETABS model, see table_frame_set.
+        tolerance: allowed end point coordinate difference, model units.
+        match_geometry: pair the frames left after the name join by their end points.
+        story_of_level: Revit level name -> ETABS story name, identity if not given.
+        is_managed: ETABS frames without a Revit frame are reported as extra only if
+            is_managed(name) is True; all of them if not given.
+
+    Returns:
+        ReconciliationReport
+    """
+    _check_unique(revit.names, 'Revit')
+    _check_unique(etabs.names, 'ETABS')
+
+    _, r_named, e_named = np.intersect1d(revit.names.astype(str), etabs.names.astype(str), return_indices=True)
+    r_left = np.setdiff1d(np.arange(len(revit)), r_named)
+    e_left = np.setdiff1d(np.arange(len(etabs)), e_named)
+    if match_geometry:
+        r_geometry, e_geometry = _match_by_geometry(revit, etabs, r_left, e_left, tolerance)
+        r_left = np.setdiff1d(r_left, r_geometry)
+        e_left = np.setdiff1d(e_left, e_geometry)
+    else:
+        r_geometry = e_geometry = np.zeros(0, dtype=np.int64)
+
+    r_pair = np.concatenate([r_named, r_geometry]).astype(np.int64)
+    e_pair = np.concatenate([e_named, e_geometry]).astype(np.int64)
+    deviation = _end_point_deviation(revit, etabs, r_pair, e_pair)
+
+    revit_levels = revit.levels[r_pair]
+    if story_of_level is not None:
+        revit_levels = _object_array(story_of_level.get(x, x) for x in revit_levels)
+    etabs_levels = etabs.levels[e_pair]
+    revit_props = revit.prop_names[r_pair]
+    etabs_props = etabs.prop_names[e_pair]
+    known_level = (revit_levels != None) & (etabs_levels != None)
+    known_prop = (revit_props != None) & (etabs_props != None)
+
+    if is_managed is not None:
+        e_left = e_left[np.fromiter((bool(is_managed(x)) for x in etabs.names[e_left]), dtype=bool, count=len(e_left))]
+
+    parts = []
+
+    def add(category, r, e, r_value=None, e_value=None, dev=None):
+        count = len(r) if r is not None else len(e)
+        parts.append((
+            category,
+            revit.names[r] if r is not None else np.full(count, None, dtype=object),
+            etabs.names[e] if e is not None else np.full(count, None, dtype=object),
+            r_value if r_value is not None else np.full(count, None, dtype=object),
+            e_value if e_value is not None else np.full(count, None, dtype=object),
+            dev if dev is not None else np.full(count, np.nan)))
+
+    add('missing', r_left, None)
+    add('extra', None, e_left)
+    n_named = len(r_named)
+    renamed = np.arange(n_named, len(r_pair))
+    add('renamed', r_pair[renamed], e_pair[renamed], dev=deviation[renamed])
+    moved = np.flatnonzero(deviation[:n_named] > tolerance)
+    add('moved', r_pair[moved], e_pair[moved], dev=deviation[moved])
+    wrong = np.flatnonzero(known_prop & (revit_props != etabs_props))
+    add('wrong_section', r_pair[wrong], e_pair[wrong], revit_props[wrong], etabs_props[wrong], deviation[wrong])
+    wrong = np.flatnonzero(known_level & (revit_levels != etabs_levels))
+    add('wrong_level', r_pair[wrong], e_pair[wrong], revit_levels[wrong], etabs_levels[wrong], deviation[wrong])
+
+    return ReconciliationReport(
+        category=np.repeat(_object_array(x[0] for x in parts), [len(x[1]) for x in parts]),
+        revit_name=np.concatenate([x[1] for x in parts]).astype(object),
+        etabs_name=np.concatenate([x[2] for x in parts]).astype(object),
+        revit_value=np.concatenate([x[3] for x in parts]).astype(object),
+        etabs_value=np.concatenate([x[4] for x in parts]).astype(object),
+        deviation=np.concatenate([x[5] for x in parts]).astype(float),
+        matched=len(r_pair))
+
+
+def reconcile_with_etabs(stores: Dict[str, Any],
+                         SapModel: Optional[Any] = None,
+                         snapshot=None,
+                         **kwargs) -> ReconciliationReport:
+    """
+    Reconcile the column and beam ElementStores of an export with the open ETABS model.
+
+    Args:
+        stores: load_element_stores() result, the 'column', 'beam' and 'wall' entries are used.
+        SapModel: ETABS model, the active CsiHelper model if not given.
+        snapshot: an already loaded ModelSnapshot, read from SapModel if not given.
+        **kwargs: passed to reconcile_frames.
+    """
+    if snapshot is None:
+        snapshot = ModelSnapshot.load(SapModel)
+    revit = []
+    if 'column' in stores:
+        revit.append(columns_frame_set(stores['column']))
+    if 'beam' in stores:
+        revit.append(beams_frame_set(stores['beam'], stores.get('wall')))
+    return reconcile_frames(concat_frame_sets(revit), table_frame_set(snapshot.frames), **kwargs)
@@ -0,0 +1,10 @@
+'''
+Geotechnical design helpers
+'''
+
+from mat_ceng.geotechnical.soil_mechanics import (
+    SoilLateralPressureParameters, min_pressure, max_pressure, calculate_etabs_parameters,
+    pressure_at, panel_levels, panel_pressures, wall_types,
+    SoilLayer, LayeredSoil, stress_influence, SettlementModel, SettlementResults)
+from mat_ceng.geotechnical.foundation_design import (
+    FootingDesign, plan_candidates, size_isolated_footings, RaftModel, RaftResults)
@@ -0,0 +1,355 @@
+'''
+isolated footing sizing
+
+all the columns and all the candidate plan sizes / thicknesses are checked together:
+the plan sizes failing bearing at the thinnest footing are dropped first (self weight only
+makes it worse), the thinnest section passing punching and one-way shear is then found by
+bisection over the thickness candidates (shear strength grows with the thickness), and the
+footing with the least concrete volume is kept for every column
+
+units are in meters and kN (pressures kPa), concrete strength in MPa
+bearing compares the net service pressure (column loads and footing self weight, less the
+overburden removed down to the base) with the net allowable bearing, the base is kept in full
+contact (resultant inside the kern); shear uses the ultimate combinations with the net
+factored pressure of the column loads (ACI318-19 13.3.1.2, 22.5, 22.6, 13.2.7.2), punching
+adds the shear stress of the unbalanced moments transferred by eccentricity of shear (8.4.4.2)
+the reinforcement is not designed
+
+rafts are plates (structural.slab_design elements) on Winkler springs, the plate stiffness
+is assembled and factorised once; tension-only springs released by uplift are taken out with
+a low rank (Woodbury) correction of that factorisation, or by a numeric refactorisation of the
+same matrix pattern when many springs lift off
+
+usage:
+    design = size_isolated_footings(columns_c1, columns_c2, service_P, ultimate_P,
+                                    allowable_bearing=250.0, service_Mx=..., service_My=...)
+    design.B, design.L, design.h
+
+    raft = RaftModel(outline, thickness=1.2, subgrade_modulus=20_000.0, mesh_size=0.5)
+    results = raft.solve(raft.load_vector(column_xy, column_loads, walls, wall_loads))
+'''
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import shapely
+from shapely import Polygon
+from scipy import sparse
+from scipy.linalg import lu_factor, lu_solve
+
+from mat_ceng.structural.beam_analysis import concrete_modulus
+from mat_ceng.structural.slab_design import (
+    SlabMesh, PlateFactor, mesh_slab, plate_rigidity, plate_element_stiffness,
+    assemble_plate_stiffness, _curvature_matrix, _support_nodes)
+
+CONCRETE_UNIT_WEIGHT = 25.0 # kN/m³
+
+
+@dataclass
+class FootingDesign:
+    B: np.ndarray # (n,) plan size along x, m, nan if no candidate passes
+    L: np.ndarray # (n,) plan size along y, m
+    h: np.ndarray # (n,) thickness, m
+    feasible: np.ndarray # (n,) bool
+    bearing_ratio: np.ndarray # (n,) max net service pressure / allowable bearing
+    punching_ratio: np.ndarray # (n,) vu / phi vc
+    one_way_ratio: np.ndarray # (n,) Vu / phi Vc, worst direction
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.B * self.L * self.h
+
+
+def plan_candidates(sizes, max_aspect_ratio:float = 1.0) -> tuple[np.ndarray, np.ndarray]:
+    '''(B, L) pairs of the sizes with max(B, L) / min(B, L) <= max_aspect_ratio'''
+    sizes = np.asarray(sizes, dtype=float)
+    B, L = [x.reshape(-1) for x in np.meshgrid(sizes, sizes, indexing='ij')]
+    keep = np.maximum(B, L) <= max_aspect_ratio * np.minimum(B, L) + 1e-9
+    return B[keep], L[keep]
+
+
+def _as_2d(values, n:int) -> np.ndarray:
+    if values is None:
+        return np.zeros((n, 1))
+    values = np.asarray(values, dtype=float)
+    return values.reshape(n, -1)
+
+
+def _service_pressures(P, Mx, My, B, L, h) -> tuple[np.ndarray, np.ndarray]:
+    '''max and min gross service pressure of every candidate (..., combos), kPa'''
+    A = B * L
+    weight = CONCRETE_UNIT_WEIGHT * A * h
+    average = (P + weight[..., None]) / A[..., None]
+    bending = 6 * np.abs(Mx) / (B * L ** 2)[..., None] + 6 * np.abs(My) / (L * B ** 2)[..., None]
+    return (average + bending).max(axis=-1), (average - bending).min(axis=-1)
+
+
+def _shear_ratios(Pu, Mux, Muy, c1, c2, B, L, d, fc, lambda_concrete, phi) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    punching and one-way shear ratios of every candidate, worst ultimate combination
+    all arguments broadcast to the candidates, the loads carry the combinations on the last axis
+    '''
+    A = B * L
+    # ACI318-19 22.5.5.1.3 size effect, 22.5.3.1 sqrt(fc) <= 8.3 MPa
+    lambda_s = np.minimum(np.sqrt(2 / (1 + 0.004 * d * 1000)), 1.0)
+    root_fc = lambda_s * lambda_concrete * np.sqrt(min(fc, 69.0)) * 1000 # kPa
+
+    # punching, critical section at d/2, interior column (22.6.5.2)
+    bx, by = c1 + d, c2 + d
+    b0 = 2 * bx + 2 * by
+    beta = np.maximum(c1, c2) / np.minimum(c1, c2)
+    vc = np.minimum.reduce([0.33 * root_fc,
+                            (0.17 + 0.33 / beta) * root_fc,
+                            0.083 * (2 + 40 * d / b0) * root_fc])
+    inside = np.minimum(bx * by / A, 1.0)
+    # unbalanced moments (8.4.4.2), gamma_v Msc c / Jc added at the corner of the section,
+    # b1 is the side of the critical section along the span of the moment (R8.4.4.2.3)
+    moment_stress = 0.0
+    for Mu, b1, b2 in ((Mux, by, bx), (Muy, bx, by)):
+        gamma_v = 1 - 1 / (1 + 2 / 3 * np.sqrt(b1 / b2))
+        Jc = d * b1 ** 3 / 6 + b1 * d ** 3 / 6 + d * b2 * b1 ** 2 / 2
+        moment_stress = moment_stress + np.abs(Mu) * (gamma_v * b1 / 2 / Jc)[..., None]
+    vu = (Pu * (1 - inside)[..., None] / (b0 * d)[..., None] + moment_stress).max(axis=-1)
+    punching = vu / (phi * vc)
+
+    # one-way shear at d from the column faces with the max factored pressure (22.5.5.1)
+    q_max = Pu / A[..., None] + 6 * np.abs(Mux) / (B * L ** 2)[..., None] + 6 * np.abs(Muy) / (L * B ** 2)[..., None]
+    q_max = q_max.max(axis=-1)
+    arm_x = np.clip((B - c1) / 2 - d, 0, None)
+    arm_y = np.clip((L - c2) / 2 - d, 0, None)
+    Vc_unit = 0.17 * root_fc * d # per m width
+    one_way = np.maximum(q_max * arm_x / (phi * Vc_unit), q_max * arm_y / (phi * Vc_unit))
+    return punching, one_way
+
+
+def size_isolated_footings(c1, c2,
+                           service_P, ultimate_P,
+                           allowable_bearing:float,
+                           service_Mx=None, service_My=None,
+                           ultimate_Mx=None, ultimate_My=None,
+                           sizes=None,
+                           thicknesses=None,
+                           overburden:float = 0.0,
+                           max_aspect_ratio:float = 1.0,
+                           fc:float = 30.0,
+                           depth_offset:float = 0.1,
+                           lambda_concrete:float = 1.0,
+                           phi:float = 0.75,
+                           chunk_size:int = 200_000) -> FootingDesign:
+    '''
+    lightest isolated footing of every column
+
+    c1, c2: (n,) column sizes along x and y, m
+    service_P, ultimate_P: (n, combos) column base reactions, compression positive, kN
+    service_Mx, service_My, ultimate_Mx, ultimate_My: (n, combos) base moments about x / y, kN.m
+    allowable_bearing: net allowable bearing pressure, kPa
+    sizes: plan size candidates, m, 1.0 to 6.0 by 0.1 by default
+    thicknesses: thickness candidates, m, 0.4 to 2.0 by 0.05 by default
+    overburden: pressure of the soil removed down to the base and not put back, kPa (gamma Df),
+                subtracted from the gross pressure; 0 checks the gross pressure (conservative)
+    max_aspect_ratio: 1.0 for square footings only
+    depth_offset: h - d, cover + one bar, m
+    chunk_size: candidate (column, plan) pairs checked at once, bounds the memory
+    '''
+    c1 = np.asarray(c1, dtype=float).reshape(-1)
+    c2 = np.asarray(c2, dtype=float).reshape(-1)
+    n = len(c1)
+    P, Pu = _as_2d(service_P, n), _as_2d(ultimate_P, n)
+    Mx, My = _as_2d(service_Mx, n), _as_2d(service_My, n)
+    Mux, Muy = _as_2d(ultimate_Mx, n), _as_2d(ultimate_My, n)
+    sizes = np.arange(1.0, 6.0 + 1e-9, 0.1) if sizes is None else np.asarray(sizes, dtype=float)
+    thicknesses = np.sort(np.arange(0.4, 2.0 + 1e-9, 0.05) if thicknesses is None
+                          else np.asarray(thicknesses, dtype=float))
+    plan_B, plan_L = plan_candidates(sizes, max_aspect_ratio)
+    order = np.argsort(plan_B * plan_L, kind='stable')
+    plan_B, plan_L = plan_B[order], plan_L[order]
+
+    # plans at least as large as the column plus the cover, and with the bearing area of the max load
+    fits = (plan_B[None, :] >= c1[:, None] + 0.1) & (plan_L[None, :] >= c2[:, None] + 0.1)
+    fits &= (plan_B * plan_L)[None, :] >= P.max(axis=1)[:, None] / (allowable_bearing + overburden)
+    column, plan = np.nonzero(fits)
+
+    best_volume = np.full(n, np.inf)
+    best = np.full((n, 3), np.nan)
+    ratios = np.full((n, 3), np.nan)
+    for start in range(0, len(column), chunk_size):
+        col, pl = column[start:start + chunk_size], plan[start:start + chunk_size]
+        B, L = plan_B[pl], plan_L[pl]
+        # bearing at the thinnest footing, self weight only adds to it
+        q_max, q_min = _service_pressures(P[col], Mx[col], My[col], B, L, np.full(len(col), thicknesses[0]))
+        keep = (q_max - overburden <= allowable_bearing) & (q_min >= 0)
+        col, B, L = col[keep], B[keep], L[keep]
+
+        # bisection over the thickness candidates for the thinnest shear section
+        low = np.zeros(len(col), dtype=np.int64)
+        high = np.full(len(col), len(thicknesses))
+        while np.any(low < high):
+            middle = (low + high) // 2
+            active = low < high
+            h = thicknesses[np.minimum(middle, len(thicknesses) - 1)]
+            punching, one_way = _shear_ratios(Pu[col], Mux[col], Muy[col], c1[col], c2[col], B, L,
+                                              h - depth_offset, fc, lambda_concrete, phi)
+            passes = (punching <= 1.0) & (one_way <= 1.0)
+            high = np.where(active & passes, middle, high)
+            low = np.where(active & ~passes, middle + 1, low)
+        found = low < len(thicknesses)
+        col, B, L, t = col[found], B[found], L[found], low[found]
+        h = thicknesses[t]
+        q_max, q_min = _service_pressures(P[col], Mx[col], My[col], B, L, h)
+        keep = (q_max - overburden <= allowable_bearing) & (q_min >= 0)
+        col, B, L, h, q_max = col[keep], B[keep], L[keep], h[keep], q_max[keep]
+        if len(col) == 0:
+            continue
+
+        # least volume per column, the smaller plan on ties (candidates are sorted by area)
+        volume = B * L * h
+        order = np.lexsort((B * L, volume, col))
+        first = order[np.concatenate([[True], np.diff(col[order]) != 0])]
+        better = volume[first] < best_volume[col[first]] - 1e-12
+        winners = first[better]
+        best_volume[col[winners]] = volume[winners]
+        best[col[winners]] = np.column_stack([B[winners], L[winners], h[winners]])
+        punching, one_way = _shear_ratios(Pu[col[winners]], Mux[col[winners]], Muy[col[winners]],
+                                          c1[col[winners]], c2[col[winners]], B[winners], L[winners],
+                                          h[winners] - depth_offset, fc, lambda_concrete, phi)
+        ratios[col[winners]] = np.column_stack([(q_max[winners] - overburden) / allowable_bearing,
+                                                punching, one_way])
+
+    feasible = np.isfinite(best_volume)
+    return FootingDesign(best[:, 0], best[:, 1], best[:, 2], feasible, ratios[:, 0], ratios[:, 1], ratios[:, 2])
+
+
+# --- raft on Winkler springs ---
+@dataclass
+class RaftResults:
+    mesh: SlabMesh
+    settlement: np.ndarray # (n, c) node settlements, m, downwards positive
+    soil_pressure: np.ndarray # (n, c) kPa, 0 where the spring is released
+    moments: np.ndarray # (e, 3, c) mx, my, mxy at the element centres, kN.m/m
+    in_contact: np.ndarray # (n, c) bool, spring active
+    iterations: np.ndarray # (c,) tension-only iterations of every combination
+
+    @property
+    def max_pressure(self) -> np.ndarray:
+        return self.soil_pressure.max(axis=0)
+
+
+class RaftModel:
+    '''
+    raft plate on Winkler springs, mesh and factorisation built once for all load combinations
+
+    outline: raft outline [[x, y], ...], m; openings: list of outlines
+    thickness: m; subgrade_modulus: ks, kN/m³, one value or (nodes,) one per mesh node
+    fc: concrete strength, MPa (E from ACI318-19 19.2.2.1)
+    mesh_size: target element size, m
+    '''
+    def __init__(self, outline, thickness:float, subgrade_modulus:float, fc:float = 30.0,
+                 poisson:float = 0.2, mesh_size:float = 0.5, openings:Optional[list] = None):
+        self.outline = Polygon(outline, holes=openings or [])
+        self.mesh = mesh_slab(self.outline, mesh_size)
+        a, b = self.mesh.size
+        self.rigidity = plate_rigidity(concrete_modulus(fc) * 1000, thickness, poisson) # kPa
+        self.plate_stiffness = assemble_plate_stiffness(self.mesh, plate_element_stiffness(a, b, self.rigidity))
+        # lumped spring of every node, a quarter of every element around it
+        node_area = np.bincount(self.mesh.elements.reshape(-1), minlength=len(self.mesh.nodes)) * a * b / 4
+        self.springs = np.broadcast_to(np.asarray(subgrade_modulus, dtype=float), node_area.shape) * node_area
+        self.subgrade_modulus = self.springs / node_area
+        self.factor = PlateFactor(self.mesh, self._stiffness(np.ones(len(self.springs), dtype=bool)))
+
+    @property
+    def dof_count(self) -> int:
+        return 3 * len(self.mesh.nodes)
+
+    def _stiffness(self, active:np.ndarray) -> sparse.csr_matrix:
+        '''plate stiffness plus the active springs, the plate part is not re-assembled'''
+        diagonal = np.zeros(self.dof_count)
+        diagonal[0::3] = self.springs * active
+        return self.plate_stiffness + sparse.diags(diagonal, format='csr')
+
+    def load_vector(self, column_xy=None, column_loads=None, walls=None, wall_loads=None) -> np.ndarray:
+        '''
+        (dofs, c) load vector of the column and wall reactions, kN, downwards positive
+        column_xy: (k, 2) column centres, each load goes to the closest node
+        column_loads: (k, c) column reactions of every combination
+        walls: wall outlines, every wall load is shared by the nodes inside the outline
+        wall_loads: (w, c) wall reactions of every combination
+        '''
+        column_count = 0 if column_xy is None else len(column_xy)
+        column_loads = np.zeros((0, 1)) if not column_count else \
+            np.asarray(column_loads, dtype=float).reshape(column_count, -1)
+        wall_loads = np.zeros((0, 1)) if not walls else np.asarray(wall_loads, dtype=float).reshape(len(walls), -1)
+        F = np.zeros((self.dof_count, max(column_loads.shape[1], wall_loads.shape[1])))
+        if column_count:
+            loads = column_loads
+            nodes = shapely.STRtree(shapely.points(self.mesh.nodes)).nearest(shapely.points(np.asarray(column_xy, dtype=float)))
+            np.add.at(F, 3 * nodes, loads)
+        if walls:
+            loads = wall_loads
+            pairs = _support_nodes(self.mesh, [Polygon(x) for x in walls])
+            share = 1.0 / np.bincount(pairs[:, 0], minlength=len(walls))
+            np.add.at(F, 3 * pairs[:, 1], loads[pairs[:, 0]] * share[pairs[:, 0], None])
+        return F
+
+    def _stable(self, contact:np.ndarray) -> bool:
+        '''the springs in contact restrain the rigid body modes (w, rx, ry) of the plate'''
+        xy = self.mesh.nodes[contact]
+        return len(xy) >= 3 and np.linalg.matrix_rank(xy[1:] - xy[0]) == 2
+
+    def _solve_released(self, F:np.ndarray, released:np.ndarray, woodbury_limit:int) -> np.ndarray:
+        '''
+        solution with the springs of the released nodes removed:
+        (K0 - U k U^T)^-1 F by the Woodbury identity with the K0 factorisation for few releases,
+        a numeric refactorisation otherwise
+        '''
+        nodes = np.flatnonzero(released)
+        if len(nodes) == 0:
+            return self.factor.solve(F)
+        if len(nodes) > woodbury_limit:
+            try:
+                factor = PlateFactor.with_order(self.factor.order, self._stiffness(~released))
+            except RuntimeError:
+                raise ValueError('raft: singular stiffness, too few springs stay in contact (uplift)') from None
+            return factor.solve(F)
+        dofs = 3 * nodes
+        U = np.zeros((self.dof_count, len(nodes)))
+        U[dofs, np.arange(len(nodes))] = 1.0
+        Z = self.factor.solve(U) # K0^-1 U
+        x0 = self.factor.solve(F)
+        capacitance = np.diag(1.0 / self.springs[nodes]) - Z[dofs]
+        return x0 + Z @ lu_solve(lu_factor(capacitance), x0[dofs])
+
+    def solve(self, F:np.ndarray, tension_only:bool = True, max_iterations:int = 30,
+              woodbury_limit:int = 200) -> RaftResults:
+        '''
+        settlements, soil pressures and moments of every load combination (columns of F)
+
+        tension_only: springs under uplifting nodes are released and the combination is solved
+                      again until the contact area does not change
+        woodbury_limit: largest number of released springs handled by the low rank correction
+        '''
+        F = np.asarray(F, dtype=float).reshape(self.dof_count, -1)
+        d = self.factor.solve(F)
+        cases = F.shape[1]
+        active = np.ones((len(self.springs), cases), dtype=bool)
+        iterations = np.zeros(cases, dtype=np.int64)
+        if tension_only:
+            for case in range(cases):
+                contact = d[0::3, case] > 0
+                while not np.array_equal(contact, active[:, case]):
+                    if iterations[case] >= max_iterations:
+                        raise RuntimeError(f'raft: contact area did not converge for combination {case}')
+                    if not contact.any():
+                        raise ValueError(f'raft: the whole raft uplifts for combination {case}')
+                    if not self._stable(contact):
+                        raise ValueError(f'raft: fewer than three non collinear springs stay in contact for '
+                                         f'combination {case}, the raft is unstable (uplift)')
+                    active[:, case] = contact
+                    d[:, case] = self._solve_released(F[:, [case]], ~contact, woodbury_limit)[:, 0]
+                    iterations[case] += 1
+                    # released springs stay released while the node lifts, contact again when it settles
+                    contact = d[0::3, case] > 0
+        settlement = d[0::3]
+        pressure = self.subgrade_modulus[:, None] * settlement * active
+        B = _curvature_matrix(*self.mesh.size, 0.5, 0.5)[0]
+        moments = np.einsum('ij,jk,ekc->eic', self.rigidity, B, d[self.mesh.element_dofs])
+        return RaftResults(self.mesh, settlement, pressure, moments, active, iterations)
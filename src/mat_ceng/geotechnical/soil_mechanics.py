@@ -0,0 +1,324 @@
+'''
+lateral earth pressure on basement walls, ETABS non-uniform pressure parameters
+
+pressure = C * Z + D, linear between the top of the wall (min. pressure) and the
+etabs base level (max. pressure), with the soil above the wall as surcharge and the water
+below the water table (submerged soil + water pressure)
+
+every parameter may be a float or an array (one value per wall / scenario), the functions
+broadcast them and return arrays, or floats for float inputs
+
+units are in meters and kN
+
+settlement of layered soil under loaded rectangular footprints: the vertical stress increase
+of a unit pressure on every footprint at every point / sublayer (Boussinesq or Westergaard) is
+computed once into an influence matrix and cached, the settlement of any load case is then a
+matrix product followed by the immediate / consolidation settlement of every sublayer
+
+usage:
+    params = SoilLateralPressureParameters(water_table_height=np.array([0.0, 6.0, 12.0]))
+    C, D = calculate_etabs_parameters(params)
+    bottom, top = panel_levels(ModelSnapshot.load().areas, wall_names, length_scale=1e-3)
+    p_bottom, p_top = panel_pressures(params, bottom, top)   # (panels, scenarios)
+
+    soil = LayeredSoil([SoilLayer(3.0, elastic_modulus=30e3), SoilLayer(8.0, compression_index=0.3)],
+                       water_table_depth=2.0)
+    model = SettlementModel(soil, points, footprints)         # footprints: (k, 4) cx, cy, B, L
+    model.settlement(pressures).total                         # pressures: (k, cases) kPa
+'''
+from dataclasses import dataclass
+import functools
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+ArrayLike = Union[float, np.ndarray]
+
+
+@dataclass
+class SoilLateralPressureParameters:
+    # units are in meters and kN
+
+    etabs_base_level: ArrayLike = -5.0
+
+    # all heights are mesured from etabs base level
+    water_table_height: ArrayLike = 6.0
+    wall_height: ArrayLike = 10.0
+    soil_total_height: ArrayLike = 16.0
+
+    # Loads and coefficients
+    surcharge_load: ArrayLike = 20.0  # kN/m²
+
+    # local axe 3 direction = 1 for same load direction, -1 for opposite load direction
+    local_axe3_direction: ArrayLike = 1  # 1 or -1
+
+    # Soil properties
+    soil_unit_weight: ArrayLike = 20.0  # kN/m³
+    soil_submerged_unit_weight: ArrayLike = 10.0  # kN/m³
+    water_unit_weight: ArrayLike = 10.0  # kN/m³
+    soil_lateral_pressure_coefficient: ArrayLike = 0.5
+
+
+def _result(value):
+    value = np.asarray(value, dtype=float)
+    return float(value) if value.ndim == 0 else value
+
+
+def _arrays(params:SoilLateralPressureParameters) -> dict:
+    return {key: np.asarray(value, dtype=float) for key, value in vars(params).items()}
+
+
+def _min_pressure_magnitude(p:dict) -> np.ndarray:
+    k = p['soil_lateral_pressure_coefficient']
+    dry = p['surcharge_load'] * k + p['soil_unit_weight'] * (p['soil_total_height'] - p['wall_height']) * k
+    # water table above the top of the wall
+    wet = p['surcharge_load'] * k + \
+        p['soil_unit_weight'] * (p['soil_total_height'] - p['water_table_height']) * k + \
+        p['soil_submerged_unit_weight'] * (p['water_table_height'] - p['wall_height']) * k + \
+        p['water_unit_weight'] * (p['water_table_height'] - p['wall_height'])
+    return np.where(p['water_table_height'] <= p['wall_height'], dry, wet)
+
+
+def _max_pressure_magnitude(p:dict) -> np.ndarray:
+    k = p['soil_lateral_pressure_coefficient']
+    top = np.abs(_min_pressure_magnitude(p))
+    water, height = p['water_table_height'], p['wall_height']
+    dry = top + p['soil_unit_weight'] * height * k
+    partly = top + p['soil_unit_weight'] * (height - water) * k + \
+        p['soil_submerged_unit_weight'] * water * k + p['water_unit_weight'] * water
+    submerged = top + p['soil_submerged_unit_weight'] * height * k + p['water_unit_weight'] * height
+    return np.where(water <= 0.0, dry, np.where(water < height, partly, submerged))
+
+
+def min_pressure(params:SoilLateralPressureParameters) -> ArrayLike:
+    '''lateral pressure at top of the wall, kN/m²'''
+    p = _arrays(params)
+    return _result(_min_pressure_magnitude(p) * p['local_axe3_direction'])
+
+
+def max_pressure(params:SoilLateralPressureParameters) -> ArrayLike:
+    '''lateral pressure at bottom of the wall (etabs base level), kN/m²'''
+    p = _arrays(params)
+    return _result(_max_pressure_magnitude(p) * p['local_axe3_direction'])
+
+
+def calculate_etabs_parameters(params:SoilLateralPressureParameters) -> tuple:
+    '''
+    C and D parameters of the ETABS non-uniform surface pressure, Pressure = C * Z + D
+    C in kN/m²/m, D in kN/m²
+    '''
+    p = _arrays(params)
+    p_min = _min_pressure_magnitude(p) * p['local_axe3_direction']
+    p_max = _max_pressure_magnitude(p) * p['local_axe3_direction']
+    C = (p_min - p_max) / p['wall_height']
+    D = p_max - C * p['etabs_base_level']
+    return _result(C), _result(D)
+
+
+def pressure_at(C:ArrayLike, D:ArrayLike, z:ArrayLike) -> ArrayLike:
+    '''pressure at the levels z, kN/m²; z (n,) with C, D (k,) gives (n, k)'''
+    C, D, z = np.asarray(C, dtype=float), np.asarray(D, dtype=float), np.asarray(z, dtype=float)
+    if z.ndim and C.ndim:
+        z = z[:, None]
+    return _result(C * z + D)
+
+
+def panel_levels(areas, names:Optional[Iterable[str]] = None, length_scale:float = 1.0) -> tuple:
+    '''
+    bottom and top level of every wall panel from the bulk area table of the model
+    (ModelSnapshot.load().areas), instead of one GetCoordCartesian call per point
+
+    names: panels to read, all areas by default
+    length_scale: model length unit -> m, e.g. 1e-3 for a N_mm model
+    '''
+    offsets = np.asarray(areas.offsets, dtype=np.int64)
+    z = np.asarray(areas.xyz, dtype=float)[:, 2] * length_scale
+    counts = np.diff(offsets)
+    if names is None:
+        rows = np.arange(len(counts))
+    else:
+        rows = areas.rows(names)
+    if len(rows) == 0:
+        return np.zeros(0), np.zeros(0)
+    if np.any(counts[rows] == 0):
+        raise ValueError('panel levels: areas without boundary points')
+    bottom = np.minimum.reduceat(z, offsets[:-1][counts > 0])
+    top = np.maximum.reduceat(z, offsets[:-1][counts > 0])
+    # reduceat rows of the non empty areas
+    position = np.cumsum(counts > 0) - 1
+    return bottom[position[rows]], top[position[rows]]
+
+
+def panel_pressures(params:SoilLateralPressureParameters, bottom:ArrayLike, top:ArrayLike) -> tuple:
+    '''
+    pressure at the bottom and top level of every panel for every parameter set
+    bottom, top: (n,) panel levels, m; array parameters (k,) give (n, k) pressures
+    '''
+    C, D = calculate_etabs_parameters(params)
+    return pressure_at(C, D, bottom), pressure_at(C, D, top)
+
+
+def wall_types(bottom:np.ndarray, top:np.ndarray, decimals:int = 3) -> tuple:
+    '''
+    unique (bottom, top) level pairs of the panels and the type of every panel
+    '''
+    levels = np.round(np.column_stack([bottom, top]), decimals)
+    types, panel_type = np.unique(levels, axis=0, return_inverse=True)
+    return types, panel_type.reshape(-1)
+
+
+# --- settlement ---
+@dataclass
+class SoilLayer:
+    thickness: float # m
+    unit_weight: float = 19.0 # total unit weight, kN/m³
+    elastic_modulus: float = 20000.0 # for the immediate settlement, kPa; inf for none
+    compression_index: float = 0.0 # Cc, 0 for no consolidation settlement
+    recompression_index: float = 0.0 # Cr
+    void_ratio: float = 0.8 # initial void ratio e0
+    ocr: float = 1.0 # over consolidation ratio
+    sublayers: int = 4
+
+
+class LayeredSoil:
+    '''
+    soil profile split into sublayers, properties and initial effective stress at their mid depth
+    '''
+    def __init__(self, layers:list[SoilLayer], water_table_depth:float = np.inf, water_unit_weight:float = 10.0):
+        self.layers = list(layers)
+        layer = np.repeat(np.arange(len(self.layers)), [x.sublayers for x in self.layers])
+        self.dz = np.concatenate([np.full(x.sublayers, x.thickness / x.sublayers) for x in self.layers])
+        bottom = np.cumsum(self.dz)
+        self.depth = bottom - self.dz / 2
+
+        def values(name):
+            return np.array([getattr(x, name) for x in self.layers], dtype=float)[layer]
+
+        self.elastic_modulus = values('elastic_modulus')
+        self.compression_index = values('compression_index')
+        self.recompression_index = values('recompression_index')
+        self.void_ratio = values('void_ratio')
+        unit_weight = values('unit_weight')
+        # total stress at the mid depth, minus the pore pressure below the water table
+        total = np.cumsum(unit_weight * self.dz) - unit_weight * self.dz / 2
+        self.effective_stress = total - water_unit_weight * np.clip(self.depth - water_table_depth, 0, None)
+        self.preconsolidation = self.effective_stress * values('ocr')
+
+    def __len__(self):
+        return len(self.depth)
+
+
+def _corner_boussinesq(a:np.ndarray, b:np.ndarray, z:np.ndarray) -> np.ndarray:
+    '''stress under the corner of an a x b loaded rectangle at depth z, unit pressure (Newmark)'''
+    m, n = a / z, b / z
+    m2, n2 = m * m, n * n
+    root = np.sqrt(m2 + n2 + 1)
+    first = 2 * m * n * root / (m2 + n2 + m2 * n2 + 1) * (m2 + n2 + 2) / (m2 + n2 + 1)
+    return (first + np.arctan2(2 * m * n * root, m2 + n2 + 1 - m2 * n2)) / (4 * np.pi)
+
+
+def _corner_westergaard(a:np.ndarray, b:np.ndarray, z:np.ndarray, poisson:float) -> np.ndarray:
+    '''stress under the corner of an a x b loaded rectangle at depth z, unit pressure, layered (Westergaard)'''
+    eta = (1 - 2 * poisson) / (2 - 2 * poisson)
+    m, n = a / z, b / z
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = np.sqrt(eta * (1 / m ** 2 + 1 / n ** 2) + eta ** 2 / (m ** 2 * n ** 2))
+        value = (np.pi / 2 - np.arctan(x)) / (2 * np.pi)
+    return np.where((m > 0) & (n > 0), value, 0.0)
+
+
+def stress_influence(points:np.ndarray, depths:np.ndarray, footprints:np.ndarray,
+                     method:str = 'boussinesq', poisson:float = 0.0) -> np.ndarray:
+    '''
+    (points * depths, footprints) vertical stress at every point / depth (point major)
+    of a unit pressure on every rectangular footprint (cx, cy, B, L), superposing the four corners
+    '''
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    depths = np.asarray(depths, dtype=float).reshape(-1)
+    footprints = np.asarray(footprints, dtype=float).reshape(-1, 4)
+    if method == 'boussinesq':
+        corner = _corner_boussinesq
+    elif method == 'westergaard':
+        corner = functools.partial(_corner_westergaard, poisson=poisson)
+    else:
+        raise ValueError(f'method must be "boussinesq" or "westergaard", not "{method}"')
+    x1 = footprints[:, 0] - footprints[:, 2] / 2
+    x2 = footprints[:, 0] + footprints[:, 2] / 2
+    y1 = footprints[:, 1] - footprints[:, 3] / 2
+    y2 = footprints[:, 1] + footprints[:, 3] / 2
+    z = depths[None, :, None]
+    result = np.zeros((len(points), len(depths), len(footprints)))
+    for xa, ya, sign in ((x2, y2, 1), (x1, y2, -1), (x2, y1, -1), (x1, y1, 1)):
+        dx = xa[None, :] - points[:, :1] # (p, k)
+        dy = ya[None, :] - points[:, 1:]
+        signed = np.sign(dx) * np.sign(dy)
+        result += sign * (signed[:, None, :] * corner(np.abs(dx)[:, None, :], np.abs(dy)[:, None, :], z))
+    return result.reshape(len(points) * len(depths), len(footprints))
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_influence(key:tuple) -> np.ndarray:
+    (points, point_shape), (depths, depth_shape), (footprints, footprint_shape), method, poisson = key
+    influence = stress_influence(np.frombuffer(points).reshape(point_shape), np.frombuffer(depths).reshape(depth_shape),
+                                 np.frombuffer(footprints).reshape(footprint_shape), method, poisson)
+    influence.flags.writeable = False
+    return influence
+
+
+def _array_key(values:np.ndarray) -> tuple:
+    values = np.ascontiguousarray(values, dtype=float)
+    return values.tobytes(), values.shape
+
+
+@dataclass
+class SettlementResults:
+    immediate: np.ndarray # (p, c) m
+    consolidation: np.ndarray # (p, c) m
+    stress_increase: np.ndarray # (p, sublayers, c) kPa
+
+    @property
+    def total(self) -> np.ndarray:
+        return self.immediate + self.consolidation
+
+
+class SettlementModel:
+    '''
+    settlement of the soil profile at points under rectangular footprints
+
+    points: (p, 2) plan coordinates of the settlement points, m
+    footprints: (k, 4) centre x, centre y, size along x (B), size along y (L) of every loaded area, m
+    method: 'boussinesq' or 'westergaard' (poisson used by westergaard)
+    the influence matrix is cached by the content of points / footprints / sublayer depths,
+    models rebuilt with the same geometry (e.g. in soil structure interaction loops) share it
+    '''
+    def __init__(self, soil:LayeredSoil, points, footprints, method:str = 'boussinesq', poisson:float = 0.0):
+        self.soil = soil
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.footprints = np.asarray(footprints, dtype=float).reshape(-1, 4)
+        key = (_array_key(self.points), _array_key(soil.depth), _array_key(self.footprints), method, float(poisson))
+        self.influence = _cached_influence(key)
+
+    def stress_increase(self, pressures) -> np.ndarray:
+        '''(p, sublayers, c) vertical stress increase of the footprint pressures (k, c), kPa'''
+        pressures = np.asarray(pressures, dtype=float).reshape(len(self.footprints), -1)
+        return (self.influence @ pressures).reshape(len(self.points), len(self.soil), -1)
+
+    def settlement(self, pressures) -> SettlementResults:
+        '''
+        immediate (elastic, stress increase / E of every sublayer) and primary consolidation
+        (Cr up to the preconsolidation stress, Cc beyond) settlement of every point and load case
+        '''
+        soil = self.soil
+        stress = np.clip(self.stress_increase(pressures), 0, None)
+        dz = soil.dz[None, :, None]
+        immediate = (stress * dz / soil.elastic_modulus[None, :, None]).sum(axis=1)
+
+        sigma0 = soil.effective_stress[None, :, None]
+        sigma_p = np.maximum(soil.preconsolidation, soil.effective_stress)[None, :, None]
+        final = sigma0 + stress
+        factor = dz / (1 + soil.void_ratio[None, :, None])
+        cc, cr = soil.compression_index[None, :, None], soil.recompression_index[None, :, None]
+        recompression = cr * np.log10(np.minimum(final, sigma_p) / sigma0)
+        virgin = cc * np.log10(np.maximum(final, sigma_p) / sigma_p)
+        consolidation = (factor * (recompression + virgin)).sum(axis=1)
+        return SettlementResults(immediate, consolidation, stress)
@@ -0,0 +1,39 @@
+'''
+Readers and converters for the Revit exporter json files
+'''
+
+from mat_ceng.revit_interop.sections import (
+    get_etabs_column_concrete_section,
+    get_etabs_beam_cross_section,
+    get_etabs_wall_cross_section,
+    get_etabs_floor_cross_section,
+    column_section_names,
+    beam_section_names,
+    wall_section_names,
+    floor_section_names,
+    section_names,
+    SectionDefinition,
+    SectionCatalogue,
+    section_definition)
+from mat_ceng.revit_interop.loader import (
+    ELEMENT_FILES,
+    ElementBatch,
+    iter_json_array,
+    iter_element_batches,
+    iter_export_folder)
+from mat_ceng.revit_interop.element_store import (
+    Categorical,
+    RaggedArray,
+    ElementStore,
+    load_element_stores)
+from mat_ceng.revit_interop.cache import (
+    save_element_store,
+    load_element_store,
+    load_cached_element_store,
+    load_cached_element_stores)
+from mat_ceng.revit_interop.levels import (
+    LevelIndex,
+    LevelAssignment)
+from mat_ceng.revit_interop.connectivity import (
+    ConnectivityGraph,
+    ConnectivityReport)
@@ -0,0 +1,265 @@
+'''
+binary cache of the parsed Revit exporter files
+
+every ElementStore is saved as one .npy file per array plus a manifest.json,
+the arrays are opened with numpy memory mapping so a cached export loads in
+milliseconds and processes reading the same cache share the pages of the files
+
+each save writes a new version folder and then switches the small current.json
+pointer with an atomic rename, so a reader always finds a complete store and
+the files other processes have mapped are never replaced; old versions are
+deleted a few saves later, skipped while they are still in use (Windows)
+
+the cache of a file is rebuilt when its size / mtime changes (check='mtime', default)
+or when its sha256 changes (check='hash', for copied folders where mtimes are not kept)
+
+usage:
+    stores = load_cached_element_stores('test_data')  # parses once, mapped afterwards
+    names = section_names(stores['column'])           # cached with the arrays
+'''
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+
+from mat_ceng.revit_interop.loader import ELEMENT_FILES, PathLike
+from mat_ceng.revit_interop.element_store import ElementStore, Categorical, RaggedArray
+from mat_ceng.revit_interop.sections import section_names, _SECTION_NAMERS
+
+CACHE_VERSION = 2
+CACHE_FOLDER_NAME = '.mat_ceng_cache'
+MANIFEST_NAME = 'manifest.json'
+POINTER_NAME = 'current.json'
+KEEP_VERSIONS = 2 # current + previous, a reader may still be opening the previous one
+
+
+def file_sha256(path:PathLike, chunk_size:int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_info(path:PathLike, with_hash:bool = True) -> dict:
+    stat = os.stat(path)
+    info = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        info['sha256'] = file_sha256(path)
+    return info
+
+
+# --- write ---
+def _save_array(folder:pathlib.Path, name:str, values:np.ndarray) -> str:
+    np.save(folder / name, np.ascontiguousarray(values), allow_pickle=False)
+    return name + '.npy'
+
+
+def _save_column(folder:pathlib.Path, name:str, values) -> dict:
+    if isinstance(values, Categorical):
+        return {'type': 'categorical',
+                'categories': [str(x) for x in values.categories],
+                'codes': _save_array(folder, name, values.codes)}
+    if isinstance(values, RaggedArray):
+        entry = {'type': 'ragged', 'offsets': _save_array(folder, name + '.offsets', values.offsets)}
+        if values.nested:
+            entry['loop_offsets'] = _save_array(folder, name + '.loop_offsets', values.values.offsets)
+            entry['values'] = _save_array(folder, name + '.values', values.values.values)
+        else:
+            entry['values'] = _save_array(folder, name + '.values', values.values)
+        return entry
+    return {'type': 'numeric', 'values': _save_array(folder, name, values)}
+
+
+def _read_pointer(folder:pathlib.Path) -> Optional[dict]:
+    try:
+        with open(folder / POINTER_NAME, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_pointer(folder:pathlib.Path, pointer:dict, attempts:int = 20) -> None:
+    '''atomic switch of the pointer file (a new file renamed over the old one)'''
+    handle, temp = tempfile.mkstemp(prefix=POINTER_NAME + '.', dir=folder)
+    try:
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            json.dump(pointer, file)
+        for attempt in range(attempts):
+            try:
+                os.replace(temp, folder / POINTER_NAME)
+                return
+            except PermissionError:
+                # windows: a reader has the pointer open for a moment
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(0.05)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+def _remove_versions(folder:pathlib.Path, names:list) -> list:
+    '''deletes old version folders, returns the ones still in use (memory mapped on windows)'''
+    kept = []
+    for name in names:
+        try:
+            shutil.rmtree(folder / name)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            kept.append(name)
+    return kept
+
+
+def save_element_store(store:ElementStore, folder:PathLike, source:Optional[dict] = None) -> None:
+    '''
+    write store to a new version folder inside folder and switch the current.json pointer to it
+    (atomic rename, readers never see half a cache and the mapped files of a previous
+    version stay in place); versions older than the previous one are deleted when not in use
+
+    source: _source_info() of the exporter file, used to validate the cache
+    '''
+    folder = pathlib.Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    version = pathlib.Path(tempfile.mkdtemp(prefix=f'v{time.time_ns()}.', dir=folder))
+    try:
+        manifest = {'version': CACHE_VERSION, 'kind': store.kind, 'source': source or {}}
+        if store.ids.dtype == object:
+            manifest['ids'] = {'type': 'str', 'values': [str(x) for x in store.ids]}
+        else:
+            manifest['ids'] = {'type': 'int', 'values': _save_array(version, 'ids', store.ids)}
+        # file names are positions, field keys may hold '.' and any other character
+        manifest['fields'] = [dict(key=key, **_save_column(version, f'f{i}', values))
+                              for i, (key, values) in enumerate(store.fields.items())]
+        keys = list(store.fields)
+        manifest['missing'] = [{'key': key, 'values': _save_array(version, f'f{keys.index(key)}.missing', mask)}
+                               for key, mask in store.missing.items()]
+        manifest['derived'] = [dict(key=key, **_save_column(version, f'd{i}', values))
+                               for i, (key, values) in enumerate(store.derived.items())]
+        with open(version / MANIFEST_NAME, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file)
+        previous = _read_pointer(folder) or {}
+        history = [x for x in [previous.get('current')] + previous.get('previous', []) if x]
+        _write_pointer(folder, {'current': version.name, 'previous': history})
+    except BaseException:
+        shutil.rmtree(version, ignore_errors=True)
+        raise
+    # only versions that have been replaced at least KEEP_VERSIONS - 1 saves ago
+    keep = KEEP_VERSIONS - 1
+    stale = _remove_versions(folder, history[keep:])
+    if stale:
+        pointer = _read_pointer(folder)
+        if pointer and pointer.get('current') == version.name:
+            _write_pointer(folder, {'current': version.name, 'previous': history[:keep] + stale})
+
+
+def _version_folder(folder:pathlib.Path) -> pathlib.Path:
+    '''folder of the current version, or folder itself for a store saved directly in it'''
+    pointer = _read_pointer(folder)
+    return folder / pointer['current'] if pointer and pointer.get('current') else folder
+
+
+# --- read ---
+def _load_array(folder:pathlib.Path, name:str, mmap:bool) -> np.ndarray:
+    return np.load(folder / name, mmap_mode='r' if mmap else None, allow_pickle=False)
+
+
+def _load_column(folder:pathlib.Path, entry:dict, mmap:bool):
+    if entry['type'] == 'categorical':
+        return Categorical(entry['categories'], _load_array(folder, entry['codes'], mmap))
+    if entry['type'] == 'ragged':
+        values = _load_array(folder, entry['values'], mmap)
+        if 'loop_offsets' in entry:
+            values = RaggedArray(values, _load_array(folder, entry['loop_offsets'], mmap))
+        return RaggedArray(values, _load_array(folder, entry['offsets'], mmap))
+    return _load_array(folder, entry['values'], mmap)
+
+
+def read_manifest(folder:PathLike) -> Optional[dict]:
+    try:
+        with open(_version_folder(pathlib.Path(folder)) / MANIFEST_NAME, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def load_element_store(folder:PathLike, mmap:bool = True) -> ElementStore:
+    '''ElementStore saved by save_element_store, arrays memory mapped read only'''
+    folder = _version_folder(pathlib.Path(folder))
+    manifest = read_manifest(folder)
+    if manifest is None or manifest.get('version') != CACHE_VERSION:
+        raise ValueError(f'{folder}: not an element store cache of version {CACHE_VERSION}')
+    if manifest['ids']['type'] == 'str':
+        ids = np.array(manifest['ids']['values'], dtype=object)
+    else:
+        ids = _load_array(folder, manifest['ids']['values'], mmap)
+    fields = {x['key']: _load_column(folder, x, mmap) for x in manifest['fields']}
+    derived = {x['key']: _load_column(folder, x, mmap) for x in manifest['derived']}
+    missing = {x['key']: _load_array(folder, x['values'], mmap) for x in manifest.get('missing', [])}
+    return ElementStore(manifest['kind'], ids, fields, derived, missing)
+
+
+def is_cache_valid(manifest:Optional[dict], source_path:PathLike, check:str = 'mtime') -> bool:
+    if manifest is None or manifest.get('version') != CACHE_VERSION:
+        return False
+    cached = manifest.get('source', {})
+    if check == 'mtime':
+        current = _source_info(source_path, with_hash=False)
+        return cached.get('size') == current['size'] and cached.get('mtime_ns') == current['mtime_ns']
+    if check == 'hash':
+        return cached.get('sha256') == file_sha256(source_path)
+    raise ValueError(f'check must be "mtime" or "hash", not "{check}"')
+
+
+def load_cached_element_store(path:PathLike,
+                              cache_folder:Optional[PathLike] = None,
+                              kind:Optional[str] = None,
+                              check:str = 'mtime',
+                              mmap:bool = True,
+                              batch_size:int = 1000) -> ElementStore:
+    '''
+    ElementStore of one exporter file, from the cache if it is still valid
+
+    path: exporter json file
+    cache_folder: folder holding the caches, '.mat_ceng_cache' next to the file by default
+    check: 'mtime' (size + mtime) or 'hash' (sha256 of the file)
+    '''
+    path = pathlib.Path(path)
+    cache_folder = pathlib.Path(cache_folder) if cache_folder else path.parent / CACHE_FOLDER_NAME
+    folder = cache_folder / path.stem
+    if is_cache_valid(read_manifest(folder), path, check):
+        return load_element_store(folder, mmap=mmap)
+
+    source = _source_info(path)
+    store = ElementStore.from_file(path, batch_size=batch_size, kind=kind)
+    if store.kind in _SECTION_NAMERS:
+        section_names(store)
+    save_element_store(store, folder, source)
+    return load_element_store(folder, mmap=mmap) if mmap else store
+
+
+def load_cached_element_stores(folder:PathLike,
+                               kinds:Optional[list[str]] = None,
+                               cache_folder:Optional[PathLike] = None,
+                               check:str = 'mtime',
+                               mmap:bool = True) -> dict[str, ElementStore]:
+    '''
+    same as load_element_stores, through the binary cache
+    '''
+    folder = pathlib.Path(folder)
+    stores = {}
+    for kind, file_name in ELEMENT_FILES.items():
+        if kinds is not None and kind not in kinds:
+            continue
+        path = folder / file_name
+        if path.exists():
+            stores[kind] = load_cached_element_store(path, cache_folder, kind=kind, check=check, mmap=mmap)
+    return stores
@@ -0,0 +1,311 @@
+'''
+connectivity graph of the Revit exporter frames and load path checks
+
+nodes are the columns, beams and (optionally) walls of an export, the edges come from
+- column_above / column_below of column_data.json
+- columns of beam_data.json
+- beam ends lying on another beam or on a wall, and column bases standing on a beam or
+  wall (found with a shapely STRtree, the exporter does not record these supports)
+
+the graph is a symmetric scipy CSR matrix, the checks are vectorized or use
+scipy.sparse.csgraph, so a full export is checked in (near) linear time
+
+usage:
+    stores = load_element_stores('test_data', kinds=['column', 'beam', 'wall'])
+    graph = ConnectivityGraph.from_stores(stores['column'], stores['beam'], stores.get('wall'))
+    report = graph.check()
+    report.unsupported_beams, report.floating_columns, report.floating_clusters
+'''
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import shapely
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from mat_ceng.revit_interop.element_store import Categorical, ElementStore, MISSING_REFERENCE, RaggedArray
+
+COLUMN, BEAM, WALL = 0, 1, 2
+NODE_KINDS = ('column', 'beam', 'wall')
+
+
+def _references(values) -> np.ndarray:
+    '''referenced ids as an object array, None where there is no reference'''
+    if isinstance(values, Categorical): # string ids, or a field that is None on every row
+        return values.decode()
+    values = np.asarray(values, dtype=np.int64)
+    refs = values.astype(object)
+    refs[values == MISSING_REFERENCE] = None
+    return refs
+
+
+def _store_rows(store:ElementStore, refs:np.ndarray) -> np.ndarray:
+    '''row of every referenced id in the store (through the store index), -1 if it is missing or not there'''
+    return np.fromiter((-1 if x is None else store.index.get(str(x), -1) for x in refs.tolist()),
+                       dtype=np.int64, count=len(refs))
+
+
+def _column_reach(columns:ElementStore, tolerance:float) -> np.ndarray:
+    '''plan distance from the column axis within which a beam end bears on the column'''
+    half = np.zeros(len(columns))
+    for name in ('b', 'h'):
+        if name in columns.fields and isinstance(columns[name], np.ndarray):
+            half = np.maximum(half, np.nan_to_num(np.asarray(columns[name], dtype=float)) / 2)
+    return half + tolerance
+
+
+def _polylines(store:ElementStore) -> list:
+    '''2D shapely lines of the x / y polylines of a beam or wall store'''
+    x, y = store['x'], store['y']
+    coords = np.column_stack([x.values, y.values])
+    lines = []
+    for row in range(len(store)):
+        start, stop = x.offsets[row], x.offsets[row + 1]
+        lines.append(shapely.LineString(coords[start:stop]) if stop - start >= 2 else shapely.Point(coords[start]))
+    return lines
+
+
+def _end_points(store:ElementStore) -> tuple[np.ndarray, np.ndarray]:
+    '''(first, last) polyline point of every row, as rows of a flat point array and its owners'''
+    x = store['x']
+    lengths = x.lengths()
+    valid = np.flatnonzero(lengths > 0)
+    first = x.offsets[:-1][valid]
+    last = x.offsets[1:][valid] - 1
+    owners = np.concatenate([valid, valid])
+    points = np.concatenate([first, last])
+    return points, owners
+
+
+@dataclass
+class ConnectivityReport:
+    unsupported_beams: np.ndarray # beam ids with an end not resting on a column, wall or beam
+    dangling_references: list # (kind, element id, field, missing id)
+    asymmetric_stacks: list # (column id, column_above id), the column above does not point back
+    floating_columns: np.ndarray # column ids without a column below, above the foundation and not on a beam / wall
+    floating_clusters: list = field(default_factory=list) # element ids of every cluster without a foundation support
+
+    @property
+    def is_consistent(self) -> bool:
+        return not (len(self.unsupported_beams) or self.dangling_references or self.asymmetric_stacks
+                    or len(self.floating_columns) or self.floating_clusters)
+
+    def summary(self) -> dict:
+        return {
+            'unsupported_beams': len(self.unsupported_beams),
+            'dangling_references': len(self.dangling_references),
+            'asymmetric_stacks': len(self.asymmetric_stacks),
+            'floating_columns': len(self.floating_columns),
+            'floating_clusters': len(self.floating_clusters),
+        }
+
+
+class ConnectivityGraph:
+    '''
+    undirected graph of columns, beams and walls in CSR form
+
+    node rows: columns first, then beams, then walls (same order as the stores)
+    '''
+    def __init__(self, kinds:np.ndarray, ids:np.ndarray, adjacency:sparse.csr_matrix,
+                 grounded:np.ndarray, supported:np.ndarray, stacked:np.ndarray,
+                 free_end:Optional[np.ndarray] = None):
+        self.kinds = kinds # COLUMN / BEAM / WALL per node
+        self.ids = ids # revit id per node, object array
+        self.adjacency = adjacency
+        self.grounded = grounded # True for the nodes standing on the foundation
+        self.supported = supported # True for the columns standing on a beam or wall
+        self.stacked = stacked # True for the columns with an existing column_below
+        # True for the beams with an end not resting on a column below, a wall or another beam
+        self.free_end = free_end if free_end is not None else np.zeros(len(kinds), dtype=bool)
+        self.dangling_references = []
+        self.asymmetric_stacks = []
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def indptr(self) -> np.ndarray:
+        return self.adjacency.indptr
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self.adjacency.indices
+
+    def degree(self) -> np.ndarray:
+        return np.diff(self.adjacency.indptr)
+
+    def neighbours(self, node:int) -> np.ndarray:
+        return self.adjacency.indices[self.adjacency.indptr[node]:self.adjacency.indptr[node + 1]]
+
+    def node(self, kind:str, element_id) -> int:
+        rows = np.flatnonzero((self.kinds == NODE_KINDS.index(kind)) & (self.ids == str(element_id)))
+        if len(rows) == 0:
+            raise KeyError(f'{kind} {element_id} is not in the graph')
+        return int(rows[0])
+
+    @classmethod
+    def from_stores(cls,
+                    columns:ElementStore,
+                    beams:ElementStore,
+                    walls:Optional[ElementStore] = None,
+                    foundation_elevation:Optional[float] = None,
+                    tolerance:float = 10.0) -> 'ConnectivityGraph':
+        '''
+        columns, beams, walls: ElementStores of column_data.json, beam_data.json, wall_data.json
+        foundation_elevation: z of the supports, lowest column / wall base if not given
+        tolerance: plan and elevation tolerance of the geometric supports, model units
+        '''
+        n_col, n_beam = len(columns), len(beams)
+        n_wall = len(walls) if walls is not None else 0
+        beam_base, wall_base = n_col, n_col + n_beam
+        kinds = np.concatenate([np.full(n_col, COLUMN), np.full(n_beam, BEAM), np.full(n_wall, WALL)]).astype(np.int8)
+        ids = np.array([str(x) for x in columns.ids.tolist()] + [str(x) for x in beams.ids.tolist()]
+                       + ([str(x) for x in walls.ids.tolist()] if n_wall else []), dtype=object)
+        edges_a, edges_b = [], []
+        dangling, asymmetric = [], []
+        stacked = np.zeros(n_col + n_beam + n_wall, dtype=bool)
+
+        column_ids = columns.ids.tolist()
+        below_refs = (_references(columns['column_below']) if 'column_below' in columns.fields
+                      else np.full(n_col, None, dtype=object))
+        below_rows = _store_rows(columns, below_refs)
+
+        # column stacks
+        for name in ('column_above', 'column_below'):
+            if name not in columns.fields:
+                continue
+            refs = _references(columns[name])
+            has_ref = np.not_equal(refs, None)
+            rows = _store_rows(columns, refs)
+            for row in np.flatnonzero(has_ref & (rows < 0)).tolist():
+                dangling.append(('column', column_ids[row], name, refs[row]))
+            linked = np.flatnonzero(has_ref & (rows >= 0))
+            edges_a.append(linked)
+            edges_b.append(rows[linked])
+            if name == 'column_below':
+                stacked[linked] = True
+            if name == 'column_above' and 'column_below' in columns.fields:
+                for row in linked[below_rows[rows[linked]] != linked].tolist():
+                    asymmetric.append((column_ids[row], refs[row]))
+
+        # beams framing into columns
+        if n_beam and isinstance(beams.fields.get('columns'), RaggedArray):
+            refs = beams['columns']
+            owners = np.repeat(np.arange(n_beam), refs.lengths())
+            ref_ids = _references(refs.values)
+            rows = _store_rows(columns, ref_ids)
+            beam_ids = beams.ids.tolist()
+            for item in np.flatnonzero(rows < 0).tolist():
+                dangling.append(('beam', beam_ids[owners[item]], 'columns', ref_ids[item]))
+            found = rows >= 0
+            edges_a.append(beam_base + owners[found])
+            edges_b.append(rows[found])
+
+        # geometric supports: beam ends on beams / walls, column bases on beams / walls
+        # every beam end must bear on a column below it, a wall or another beam
+        supported = np.zeros(n_col + n_beam + n_wall, dtype=bool)
+        free_end = np.zeros(n_col + n_beam + n_wall, dtype=bool)
+        if n_beam:
+            beam_lines = _polylines(beams)
+            beam_z = np.asarray(beams['z'], dtype=float)
+            beam_tree = shapely.STRtree(beam_lines)
+            points, end_owners = _end_points(beams)
+            end_xy = shapely.points(beams['x'].values[points], beams['y'].values[points])
+            end_z = beam_z[end_owners]
+            end_supported = np.zeros(len(points), dtype=bool)
+            pairs = beam_tree.query(end_xy, predicate='dwithin', distance=tolerance)
+            keep = (end_owners[pairs[0]] != pairs[1]) & (np.abs(end_z[pairs[0]] - beam_z[pairs[1]]) <= tolerance)
+            edges_a.append(beam_base + end_owners[pairs[0][keep]])
+            edges_b.append(beam_base + pairs[1][keep])
+            end_supported[pairs[0][keep]] = True
+            if n_col:
+                # columns reaching up to the beam, not the ones standing on it
+                reach = _column_reach(columns, tolerance)
+                column_xy = np.column_stack([columns['x'], columns['y']]).astype(float)
+                pairs = shapely.STRtree(shapely.points(column_xy)).query(
+                    end_xy, predicate='dwithin', distance=float(reach.max()))
+                end_plan = np.column_stack([beams['x'].values[points], beams['y'].values[points]])
+                distance = np.hypot(*(end_plan[pairs[0]] - column_xy[pairs[1]]).T)
+                z = end_z[pairs[0]]
+                keep = ((distance <= reach[pairs[1]]) & (np.asarray(columns['z_top'])[pairs[1]] >= z - tolerance)
+                        & (np.asarray(columns['z_base'])[pairs[1]] < z - tolerance))
+                end_supported[pairs[0][keep]] = True
+                base_xy = shapely.points(columns['x'], columns['y'])
+                pairs = beam_tree.query(base_xy, predicate='dwithin', distance=tolerance)
+                keep = np.abs(np.asarray(columns['z_base'])[pairs[0]] - beam_z[pairs[1]]) <= tolerance
+                edges_a.append(pairs[0][keep])
+                edges_b.append(beam_base + pairs[1][keep])
+                supported[pairs[0][keep]] = True
+        if n_wall:
+            wall_tree = shapely.STRtree(_polylines(walls))
+            wall_bottom = np.asarray(walls['z_base'], dtype=float) - tolerance
+            wall_top = np.asarray(walls['z_top'], dtype=float) + tolerance
+            if n_beam:
+                pairs = wall_tree.query(end_xy, predicate='dwithin', distance=tolerance)
+                z = end_z[pairs[0]]
+                keep = (z >= wall_bottom[pairs[1]]) & (z <= wall_top[pairs[1]])
+                edges_a.append(beam_base + end_owners[pairs[0][keep]])
+                edges_b.append(wall_base + pairs[1][keep])
+                end_supported[pairs[0][keep]] = True
+            if n_col:
+                base_xy = shapely.points(columns['x'], columns['y'])
+                pairs = wall_tree.query(base_xy, predicate='dwithin', distance=tolerance)
+                z = np.asarray(columns['z_base'], dtype=float)[pairs[0]]
+                keep = (z >= wall_bottom[pairs[1]]) & (z <= wall_top[pairs[1]])
+                edges_a.append(pairs[0][keep])
+                edges_b.append(wall_base + pairs[1][keep])
+                supported[pairs[0][keep]] = True
+
+        if n_beam:
+            # both ends of a beam are in points, beams without a polyline have none
+            free_end[beam_base:wall_base] = np.bincount(end_owners[end_supported], minlength=n_beam) < 2
+        # foundation supports
+        bases = [np.asarray(columns['z_base'], dtype=float)] if n_col else []
+        if n_wall:
+            bases.append(np.asarray(walls['z_base'], dtype=float))
+        all_bases = np.concatenate(bases) if bases else np.zeros(0)
+        if foundation_elevation is None:
+            foundation_elevation = float(all_bases.min()) if len(all_bases) else 0.0
+        grounded = np.zeros(n_col + n_beam + n_wall, dtype=bool)
+        if n_col:
+            no_below = np.equal(below_refs, None)
+            grounded[:n_col] = no_below & (np.asarray(columns['z_base']) <= foundation_elevation + tolerance)
+        if n_wall:
+            grounded[wall_base:] = np.asarray(walls['z_base']) <= foundation_elevation + tolerance
+
+        a = np.concatenate(edges_a).astype(np.int64) if edges_a else np.zeros(0, dtype=np.int64)
+        b = np.concatenate(edges_b).astype(np.int64) if edges_b else np.zeros(0, dtype=np.int64)
+        n = n_col + n_beam + n_wall
+        adjacency = sparse.coo_matrix((np.ones(2 * len(a), dtype=np.int8),
+                                       (np.concatenate([a, b]), np.concatenate([b, a]))), shape=(n, n)).tocsr()
+        adjacency.data[:] = 1 # duplicated edges are summed by tocsr()
+        graph = cls(kinds, ids, adjacency, grounded, supported, stacked, free_end)
+        graph.dangling_references = dangling
+        graph.asymmetric_stacks = asymmetric
+        return graph
+
+    def components(self) -> tuple[int, np.ndarray]:
+        '''number of connected clusters and the cluster label of every node'''
+        return csgraph.connected_components(self.adjacency, directed=False)
+
+    def check(self) -> ConnectivityReport:
+        '''load path checks, see ConnectivityReport'''
+        unsupported = (self.kinds == BEAM) & self.free_end
+        floating_columns = (self.kinds == COLUMN) & ~self.stacked & ~self.grounded & ~self.supported
+
+        # clusters without a single foundation support
+        count, labels = self.components()
+        grounded_clusters = np.zeros(count, dtype=bool)
+        grounded_clusters[labels[self.grounded]] = True
+        floating_nodes = np.flatnonzero(~grounded_clusters[labels])
+        floating_nodes = floating_nodes[np.argsort(labels[floating_nodes], kind='stable')]
+        split = np.flatnonzero(np.diff(labels[floating_nodes])) + 1
+        clusters = [self.ids[x].tolist() for x in np.split(floating_nodes, split)] if len(floating_nodes) else []
+
+        return ConnectivityReport(
+            unsupported_beams=self.ids[unsupported],
+            dangling_references=list(self.dangling_references),
+            asymmetric_stacks=list(self.asymmetric_stacks),
+            floating_columns=self.ids[floating_columns],
+            floating_clusters=clusters)
@@ -0,0 +1,374 @@
+'''
+compact columnar store for the Revit exporter elements
+
+every element kind (columns, beams, walls, floors, line and area loads) is kept as
+- typed numpy arrays for the scalar fields (x, b, h, z_base, ...)
+- categorical codes for the repeated names (level, material_grade, name, ...)
+- flat coordinate buffers with offsets for the lists (x, y, cross_section_coord, ...)
+plus an id -> row index, so lookups and filters do not scan a list of dicts
+
+usage:
+    stores = load_element_stores('test_data')
+    columns = stores['column']
+    rows = columns.where(base_level='GROUND FRAMING FLOOR PLAN', b=(600, 1000))
+    outline = columns['cross_section_coord.x'][columns.row(6055928)]
+'''
+import pathlib
+from array import array
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from mat_ceng.revit_interop.loader import ElementBatch, ELEMENT_FILES, iter_element_batches
+from mat_ceng.utils.geometry_helpers import _gather_ranges
+
+# fields holding revit element ids, stored as int64 with -1 for None
+REFERENCE_FIELDS = {'column_above', 'column_below', 'columns'}
+MISSING_REFERENCE = -1
+
+
+class Categorical:
+    '''
+    repeated strings stored once; codes index categories, -1 for None
+    '''
+    def __init__(self, categories:Iterable[str], codes:np.ndarray):
+        self.categories = np.array(list(categories), dtype=object)
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self._lookup = {name: code for code, name in enumerate(self.categories)}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row:int) -> Optional[str]:
+        code = self.codes[row]
+        return None if code < 0 else self.categories[code]
+
+    def decode(self) -> np.ndarray:
+        values = np.empty(len(self.codes), dtype=object)
+        valid = self.codes >= 0
+        values[valid] = self.categories[self.codes[valid]]
+        return values
+
+    def code_of(self, name:str) -> int:
+        return self._lookup.get(name, -2) # -2 never matches, not even missing values
+
+    def isin(self, names) -> np.ndarray:
+        if isinstance(names, str) or names is None:
+            names = [names]
+        codes = [MISSING_REFERENCE if x is None else self.code_of(x) for x in names]
+        return np.isin(self.codes, codes)
+
+    def take(self, rows:np.ndarray) -> 'Categorical':
+        return Categorical(self.categories, self.codes[rows])
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(len(x) for x in self.categories)
+
+
+class RaggedArray:
+    '''
+    list of variable length arrays in one flat buffer
+    item i is values[offsets[i]:offsets[i+1]]; values is itself a RaggedArray for nested lists (floor loops)
+    '''
+    def __init__(self, values:Union[np.ndarray, 'RaggedArray'], offsets:np.ndarray):
+        self.values = values
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nested(self) -> bool:
+        return isinstance(self.values, RaggedArray)
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def __getitem__(self, row:int):
+        start, stop = self.offsets[row], self.offsets[row + 1]
+        if self.nested:
+            return [self.values[i] for i in range(start, stop)]
+        return self.values[start:stop]
+
+    def take(self, rows:np.ndarray) -> 'RaggedArray':
+        rows = np.asarray(rows, dtype=np.int64)
+        counts = self.lengths()[rows]
+        items = _gather_ranges(self.offsets[rows], counts)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        values = self.values.take(items) if self.nested else self.values[items]
+        return RaggedArray(values, offsets)
+
+    def tolist(self, row:int):
+        item = self[row]
+        return [x.tolist() for x in item] if self.nested else item.tolist()
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.values.nbytes
+
+
+# --- builders used while streaming the batches ---
+class _BoolBuilder:
+    '''bool values, None rows are False with a missing flag'''
+    def __init__(self, key:str, missing_rows:int):
+        self.values = array('b', [0] * missing_rows)
+        self.missing = array('b', [1] * missing_rows)
+
+    def append(self, value):
+        if value is not None and not isinstance(value, bool):
+            raise TypeError(f'expected a bool, got {type(value).__name__}')
+        self.values.append(bool(value))
+        self.missing.append(value is None)
+
+    def build(self):
+        return np.frombuffer(self.values, dtype=np.int8).astype(bool)
+
+    def missing_mask(self) -> np.ndarray:
+        return np.frombuffer(self.missing, dtype=np.int8).astype(bool)
+
+
+class _NumericBuilder:
+    def __init__(self, key:str, missing_rows:int):
+        self.reference = key.split('.')[-1] in REFERENCE_FIELDS
+        self.missing = MISSING_REFERENCE if self.reference else float('nan')
+        self.values = array('q' if self.reference else 'd', [self.missing] * missing_rows)
+
+    def append(self, value):
+        self.values.append(self.missing if value is None else value)
+
+    def build(self):
+        return np.frombuffer(self.values, dtype=np.int64 if self.reference else np.float64).copy()
+
+    def missing_mask(self) -> None:
+        return None # nan / MISSING_REFERENCE
+
+
+class _CategoryBuilder:
+    def __init__(self, key:str, missing_rows:int):
+        self.lookup = {}
+        self.codes = array('i', [-1] * missing_rows)
+
+    def append(self, value):
+        if value is None:
+            self.codes.append(-1)
+            return
+        value = str(value)
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.lookup)
+        self.codes.append(code)
+
+    def build(self):
+        return Categorical(self.lookup, np.frombuffer(self.codes, dtype=np.int32).copy())
+
+    def missing_mask(self) -> None:
+        return None # code -1
+
+
+class _RaggedBuilder:
+    def __init__(self, key:str, missing_rows:int, nested:bool):
+        self.reference = key.split('.')[-1] in REFERENCE_FIELDS
+        self.nested = nested
+        self.values = array('q' if self.reference else 'd')
+        self.offsets = array('q', [0] * (missing_rows + 1))
+        self.loop_offsets = array('q', [0])
+        self.missing = array('b', [1] * missing_rows) # None, not an empty list
+
+    def append(self, value):
+        self.missing.append(value is None)
+        value = value or []
+        if self.nested:
+            for loop in value:
+                self.values.extend(loop)
+                self.loop_offsets.append(len(self.values))
+            self.offsets.append(len(self.loop_offsets) - 1)
+        else:
+            self.values.extend(value)
+            self.offsets.append(len(self.values))
+
+    def build(self):
+        values = np.frombuffer(self.values, dtype=np.int64 if self.reference else np.float64).copy()
+        offsets = np.frombuffer(self.offsets, dtype=np.int64).copy()
+        if self.nested:
+            values = RaggedArray(values, np.frombuffer(self.loop_offsets, dtype=np.int64).copy())
+        return RaggedArray(values, offsets)
+
+    def missing_mask(self) -> np.ndarray:
+        return np.frombuffer(self.missing, dtype=np.int8).astype(bool)
+
+
+def _flatten(data:dict, prefix:str = '') -> dict:
+    flat = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{prefix}{key}.'))
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+def _new_builder(key:str, value, missing_rows:int):
+    if isinstance(value, bool):
+        return _BoolBuilder(key, missing_rows)
+    if isinstance(value, (int, float)):
+        return _NumericBuilder(key, missing_rows)
+    if isinstance(value, str):
+        return _CategoryBuilder(key, missing_rows)
+    if isinstance(value, list):
+        first = next((x for x in value if x is not None), None)
+        return _RaggedBuilder(key, missing_rows, nested=isinstance(first, list))
+    raise ValueError(f'field "{key}": unsupported value type {type(value).__name__}')
+
+
+class ElementStore:
+    '''
+    columnar storage of one element kind with an id -> row index
+    '''
+    def __init__(self, kind:str, ids:np.ndarray, fields:dict, derived:Optional[dict] = None,
+                 missing:Optional[dict] = None):
+        self.kind = kind
+        self.ids = ids
+        self.fields = fields
+        self.derived = derived if derived is not None else {} # computed columns (section names), not in get()
+        # row masks of the None values of the bool and list fields, which have no missing marker
+        self.missing = missing if missing is not None else {}
+        self.index = {str(element_id): row for row, element_id in enumerate(ids.tolist())}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, key:str):
+        return self.fields[key]
+
+    def __contains__(self, element_id) -> bool:
+        return str(element_id) in self.index
+
+    def row(self, element_id) -> int:
+        return self.index[str(element_id)]
+
+    def rows(self, element_ids:Iterable) -> np.ndarray:
+        return np.fromiter((self.index[str(x)] for x in element_ids), dtype=np.int64)
+
+    def mask(self, **conditions) -> np.ndarray:
+        '''
+        boolean row mask, all conditions must hold
+        categorical: name or list of names; numeric: value or (min, max) inclusive
+        '''
+        selected = np.ones(len(self), dtype=bool)
+        for key, condition in conditions.items():
+            values = self.fields[key]
+            if isinstance(values, Categorical):
+                selected &= values.isin(condition)
+            elif isinstance(values, np.ndarray):
+                if isinstance(condition, tuple):
+                    selected &= (values >= condition[0]) & (values <= condition[1])
+                else:
+                    selected &= values == condition
+            else:
+                raise ValueError(f'field "{key}" is a coordinate list and can not be filtered')
+        return selected
+
+    def where(self, **conditions) -> np.ndarray:
+        '''row numbers matching the conditions, see mask()'''
+        return np.flatnonzero(self.mask(**conditions))
+
+    def take(self, rows:np.ndarray) -> 'ElementStore':
+        rows = np.asarray(rows, dtype=np.int64)
+        def take(values):
+            return values.take(rows) if not isinstance(values, np.ndarray) else values[rows]
+        return ElementStore(self.kind, self.ids[rows], {k: take(v) for k, v in self.fields.items()},
+                            {k: take(v) for k, v in self.derived.items()},
+                            {k: v[rows] for k, v in self.missing.items()})
+
+    def get(self, element_id) -> dict:
+        '''element as the exporter dict, for the helpers that take (id, data) pairs'''
+        row = self.row(element_id)
+        data = {}
+        for key, values in self.fields.items():
+            if key in self.missing and self.missing[key][row]:
+                value = None
+            elif isinstance(values, Categorical):
+                value = values[row]
+            elif isinstance(values, RaggedArray):
+                value = values.tolist(row)
+            else:
+                value = values[row].item()
+                if key.split('.')[-1] in REFERENCE_FIELDS:
+                    value = None if value == MISSING_REFERENCE else value
+                elif value != value: # nan
+                    value = None
+            target = data
+            *parents, name = key.split('.')
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[name] = value
+        return data
+
+    def pairs(self) -> Iterable:
+        for element_id in self.ids.tolist():
+            yield element_id, self.get(element_id)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + sum(x.nbytes for x in self.fields.values())
+
+    @classmethod
+    def from_batches(cls, batches:Iterable[ElementBatch], kind:Optional[str] = None) -> 'ElementStore':
+        ids = []
+        builders = {}
+        pending = {} # fields only seen as None so far -> number of rows
+        count = 0
+        for batch in batches:
+            kind = kind or batch.kind
+            for element_id, data in batch:
+                ids.append(element_id)
+                flat = _flatten(data)
+                for key, value in flat.items():
+                    builder = builders.get(key)
+                    if builder is None:
+                        if value is None:
+                            pending.setdefault(key, count)
+                            continue
+                        builder = builders[key] = _new_builder(key, value, count)
+                        pending.pop(key, None)
+                    try:
+                        builder.append(value)
+                    except TypeError as e:
+                        raise ValueError(f'{kind} {element_id}: field "{key}" changed type: {e}') from e
+                count += 1
+                for key, builder in builders.items():
+                    # keys missing from this element
+                    if key not in flat:
+                        builder.append(None)
+
+        fields = {key: builder.build() for key, builder in builders.items()}
+        missing = {key: mask for key, mask in ((k, b.missing_mask()) for k, b in builders.items())
+                   if mask is not None and mask.any()}
+        for key in pending:
+            # never had a value (e.g. rebar in a model without rebar data)
+            fields[key] = Categorical([], np.full(count, -1, dtype=np.int32))
+        if all(isinstance(x, int) for x in ids):
+            ids = np.array(ids, dtype=np.int64)
+        else:
+            ids = np.array([str(x) for x in ids], dtype=object)
+        return cls(kind or 'unknown', ids, fields, missing=missing)
+
+    @classmethod
+    def from_file(cls, path, batch_size:int = 1000, kind:Optional[str] = None) -> 'ElementStore':
+        return cls.from_batches(iter_element_batches(path, batch_size=batch_size, kind=kind), kind=kind)
+
+
+def load_element_stores(folder, kinds:Optional[list[str]] = None, batch_size:int = 1000) -> dict[str, ElementStore]:
+    '''
+    ElementStore for every exporter file found in folder, keyed by element kind
+    '''
+    folder = pathlib.Path(folder)
+    stores = {}
+    for kind, file_name in ELEMENT_FILES.items():
+        if kinds is not None and kind not in kinds:
+            continue
+        path = folder / file_name
+        if path.exists():
+            stores[kind] = ElementStore.from_file(path, batch_size=batch_size, kind=kind)
+    return stores
@@ -0,0 +1,138 @@
+'''
+level index for the Revit exporter levels
+
+analytical_levels.json: [[level_name, elevation], ...], the levels used as ETABS stories
+mapped_levels.json: {revit_level_name: {level_elevation, refrence_level_name, refrence_level_elevation}}
+    every Revit level with the analytical level it is modelled on
+
+the elevations are sorted once, elements are assigned to levels for whole z arrays
+with np.searchsorted instead of one name / z comparison per element
+
+usage:
+    levels = LevelIndex.from_folder('test_data')
+    assigned = levels.assign(columns['z_top'], tolerance=10.0)
+    columns.ids[assigned.between]                     # elements not on any level
+    base, names, heights = levels.story_definition()  # for set_etabs_stories()
+'''
+import json
+import pathlib
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from mat_ceng.revit_interop.loader import PathLike
+from mat_ceng.revit_interop.element_store import Categorical
+
+ANALYTICAL_LEVELS_FILE = 'analytical_levels.json'
+MAPPED_LEVELS_FILE = 'mapped_levels.json'
+
+
+@dataclass
+class LevelAssignment:
+    rows: np.ndarray # level row of every z, -1 if there are no levels
+    names: np.ndarray # level names, object array
+    offsets: np.ndarray # z - level elevation
+    between: np.ndarray # True if |offset| > tolerance, the element is between levels
+
+
+class LevelIndex:
+    '''
+    levels sorted by elevation, with the analytical (reference) level of every mapped level
+    '''
+    def __init__(self, names:Iterable[str], elevations:Iterable[float], mapping:Optional[dict] = None):
+        names = list(names)
+        elevations = np.asarray(list(elevations), dtype=float)
+        if len(names) != len(elevations):
+            raise ValueError('levels: one elevation per level name is needed')
+        order = np.argsort(elevations, kind='stable')
+        self.names = np.array(names, dtype=object)[order]
+        self.elevations = elevations[order]
+        self.index = {name: row for row, name in enumerate(self.names)}
+        if len(self.index) != len(self.names):
+            raise ValueError('levels: duplicate level names')
+        # revit level name -> analytical level name
+        self.mapping = dict(mapping or {})
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_analytical(cls, levels:Iterable, mapped_levels:Optional[dict] = None) -> 'LevelIndex':
+        '''levels: analytical_levels.json content, mapped_levels: mapped_levels.json content'''
+        levels = list(levels)
+        mapping = {name: data['refrence_level_name'] for name, data in (mapped_levels or {}).items()}
+        return cls([x[0] for x in levels], [x[1] for x in levels], mapping)
+
+    @classmethod
+    def from_folder(cls, folder:PathLike) -> 'LevelIndex':
+        folder = pathlib.Path(folder)
+        with open(folder / ANALYTICAL_LEVELS_FILE, 'r') as file:
+            levels = json.load(file)
+        mapped_levels = None
+        if (folder / MAPPED_LEVELS_FILE).exists():
+            with open(folder / MAPPED_LEVELS_FILE, 'r') as file:
+                mapped_levels = json.load(file)
+        return cls.from_analytical(levels, mapped_levels)
+
+    def elevation(self, name:str) -> float:
+        return float(self.elevations[self.index[self.mapping.get(name, name)]])
+
+    def nearest(self, z) -> np.ndarray:
+        '''row of the closest level for every z'''
+        z = np.asarray(z, dtype=float)
+        if len(self) == 0:
+            return np.full(z.shape, -1, dtype=np.int64)
+        upper = np.clip(np.searchsorted(self.elevations, z), 1, max(len(self) - 1, 1))
+        lower = upper - 1
+        if len(self) == 1:
+            return np.zeros(z.shape, dtype=np.int64)
+        use_upper = np.abs(self.elevations[upper] - z) < np.abs(z - self.elevations[lower])
+        return np.where(use_upper, upper, lower).astype(np.int64)
+
+    def assign(self, z, tolerance:float = 1.0) -> LevelAssignment:
+        '''closest level of every z, flagging the ones farther than tolerance from it'''
+        z = np.asarray(z, dtype=float)
+        rows = self.nearest(z)
+        if len(self) == 0:
+            return LevelAssignment(rows, np.full(z.shape, None, dtype=object), np.full(z.shape, np.nan),
+                                   np.ones(z.shape, dtype=bool))
+        offsets = z - self.elevations[rows]
+        return LevelAssignment(rows, self.names[rows], offsets, ~(np.abs(offsets) <= tolerance))
+
+    def story_rows(self, z, tolerance:float = 1.0) -> np.ndarray:
+        '''
+        story of every z as ETABS assigns it: the lowest level at or above z - tolerance
+        -1 for z at or below the base level (no story), len(self) above the top level
+        '''
+        rows = np.searchsorted(self.elevations, np.asarray(z, dtype=float) - tolerance, side='left')
+        return np.where(rows == 0, -1, rows)
+
+    def story_names(self, z, tolerance:float = 1.0) -> np.ndarray:
+        rows = self.story_rows(z, tolerance)
+        names = np.full(rows.shape, None, dtype=object)
+        valid = (rows >= 0) & (rows < len(self))
+        names[valid] = self.names[rows[valid]]
+        return names
+
+    def reference_names(self, level_names:Union[Categorical, Iterable[str]]) -> np.ndarray:
+        '''analytical level of every Revit level name, the name itself if it is not mapped'''
+        if isinstance(level_names, Categorical):
+            # one dict lookup per category, not per element
+            mapped = np.array([self.mapping.get(x, x) for x in level_names.categories] + [None], dtype=object)
+            return mapped[level_names.codes]
+        return np.array([None if x is None else self.mapping.get(x, x) for x in level_names], dtype=object)
+
+    def rows_of(self, level_names:Union[Categorical, Iterable[str]]) -> np.ndarray:
+        '''level row of every Revit level name (after mapping), -1 if unknown'''
+        names = self.reference_names(level_names)
+        return np.fromiter((self.index.get(x, -1) for x in names), dtype=np.int64, count=len(names))
+
+    def story_definition(self) -> tuple[float, list[str], list[float]]:
+        '''
+        base elevation, story names and story heights for SetStories_2
+        the lowest level is the base, every other level is the top of a story
+        '''
+        if len(self) == 0:
+            raise ValueError('levels: no levels to build stories from')
+        return float(self.elevations[0]), list(self.names[1:]), np.diff(self.elevations).tolist()
@@ -0,0 +1,149 @@
+'''
+streaming reader for the Revit exporter json files
+
+the exporter writes lists of [id, {...}] pairs (column_data.json, beam_data.json, ...),
+the file is parsed one pair at a time so peak memory follows the batch size, not the file size
+'''
+import json
+import pathlib
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Union
+
+# element kind -> exporter file name
+ELEMENT_FILES = {
+    'column': 'column_data.json',
+    'beam': 'beam_data.json',
+    'wall': 'wall_data.json',
+    'floor': 'floor_data.json',
+    'line_load': 'line_load_data.json',
+    'area_load': 'area_load_data.json',
+    'column_section': 'column_cross_section_data.json',
+    'beam_section': 'beam_cross_section_data.json',
+    'wall_section': 'wall_cross_section_data.json',
+    'floor_section': 'floor_cross_section_data.json',
+}
+
+PathLike = Union[str, pathlib.Path]
+
+
+@dataclass
+class ElementBatch:
+    kind: str # one of ELEMENT_FILES keys, or the file stem for other files
+    ids: list = field(default_factory=list) # revit element ids as written by the exporter
+    data: list = field(default_factory=list) # element dicts, same order as ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        # same (id, data) pairs as json.load gives, so the notebook helpers work on a batch
+        return iter(zip(self.ids, self.data))
+
+
+def get_element_kind(path:PathLike) -> str:
+    name = pathlib.Path(path).name
+    for kind, file_name in ELEMENT_FILES.items():
+        if file_name == name:
+            return kind
+    return pathlib.Path(path).stem
+
+
+def iter_json_array(path:PathLike, chunk_size:int = 1 << 16) -> Iterator:
+    '''
+    yield the items of a top level json array one by one
+
+    only the item being decoded is kept in memory, plus one read chunk
+    '''
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as file:
+        buffer = ''
+        pos = 0
+        eof = False
+        state = 'start' # start -> first -> (item -> separator)* -> done
+
+        def read_more(size:int) -> bool:
+            nonlocal buffer, pos, eof
+            buffer = buffer[pos:]
+            pos = 0
+            chunk = file.read(size)
+            if not chunk:
+                eof = True
+                return False
+            buffer += chunk
+            return True
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos >= len(buffer):
+                if not read_more(chunk_size):
+                    raise ValueError(f'{path}: unexpected end of file, the json array is not closed')
+                continue
+
+            char = buffer[pos]
+            if state == 'start':
+                if char != '[':
+                    raise ValueError(f'{path}: expected a json array of [id, data] pairs')
+                pos += 1
+                state = 'first'
+            elif state == 'separator':
+                if char == ',':
+                    pos += 1
+                    state = 'item'
+                elif char == ']':
+                    return
+                else:
+                    raise ValueError(f'{path}: expected "," or "]" at offset {pos}')
+            else:
+                if char == ']' and state == 'first':
+                    return
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # item is split over the chunk boundary, grow the read size geometrically
+                    if not read_more(max(chunk_size, len(buffer))):
+                        raise
+                    continue
+                if end == len(buffer) and not eof:
+                    # a number can end exactly at the chunk boundary ('12' of '123')
+                    read_more(chunk_size)
+                    continue
+                yield value
+                pos = end # decoded text is dropped by the next read_more()
+                state = 'separator'
+
+
+def iter_element_batches(path:PathLike,
+                         batch_size:int = 1000,
+                         kind:Optional[str] = None,
+                         chunk_size:int = 1 << 16) -> Iterator[ElementBatch]:
+    '''
+    yield ElementBatch objects of up to batch_size elements from an exporter file
+
+    path: exporter json file with a list of [id, data] pairs
+    kind: element kind, taken from the file name if not given (column_data.json -> 'column')
+    '''
+    kind = kind or get_element_kind(path)
+    batch = ElementBatch(kind)
+    for item in iter_json_array(path, chunk_size=chunk_size):
+        element_id, data = item
+        batch.ids.append(element_id)
+        batch.data.append(data)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = ElementBatch(kind)
+    if len(batch):
+        yield batch
+
+
+def iter_export_folder(folder:PathLike, kinds:Optional[list[str]] = None, batch_size:int = 1000) -> Iterator[ElementBatch]:
+    '''
+    yield batches for every exporter file found in folder, in ELEMENT_FILES order
+    '''
+    folder = pathlib.Path(folder)
+    for kind, file_name in ELEMENT_FILES.items():
+        if kinds is not None and kind not in kinds:
+            continue
+        path = folder / file_name
+        if path.exists():
+            yield from iter_element_batches(path, batch_size=batch_size, kind=kind)
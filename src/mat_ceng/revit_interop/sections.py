@@ -0,0 +1,262 @@
+'''
+ETABS section names for the Revit exporter data
+
+every function takes a (revit_id, data) pair as found in the exporter json lists,
+the *_section_names functions take a whole ElementStore
+'''
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+def get_etabs_column_concrete_section(section_data) -> str:
+    size = str(section_data[1]['name']).split('_')[-1]
+    if str(section_data[1]['material_grade']).upper().startswith('FC'):
+        if size.upper().startswith('D'):
+            size = size[1:]
+        name = f"C {size}-{section_data[1]['rebar']}-{section_data[1]['material_grade']}"
+    else:
+        name = f"C {size}-{section_data[1]['material_grade']}"
+    return name
+
+
+def get_etabs_beam_cross_section(section_data) -> str:
+    grade:str = section_data[1]['material_grade']
+    if grade.upper().startswith('FC'):
+        b = round(float(section_data[1]['b']))
+        h = round(float(section_data[1]['h']))
+        size = f"{b}X{h}"
+        name = f"B {size}-{grade}"
+    else:
+        name = f"B {section_data[1]['name'][4:]}-{grade}"
+    return name
+
+
+def get_etabs_wall_cross_section(section_data) -> str:
+    grade:str = section_data[1]['material_grade']
+    if grade.upper().startswith('FC'):
+        thk = round(float(section_data[1]['thk']))
+        name = f"W {thk}-{grade}"
+    else:
+        name = f"W {section_data[1]['name'][8:]}-{grade}"
+    return name
+
+
+def get_etabs_floor_cross_section(section_data) -> str:
+    grade:str = section_data[1]['material_grade']
+    if grade.upper().startswith('FC'):
+        thk = round(float(section_data[1]['thk']))
+        name = f"S {thk}-{grade}"
+    else:
+        name = f"S {section_data[1]['name'][8:]}-{grade}"
+    return name
+
+
+def _unique_rows(store, keys:list[str]) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    first row of every unique combination of the fields in keys and the
+    combination of every row, fields missing from the store are ignored
+    '''
+    from mat_ceng.revit_interop.element_store import Categorical
+    columns = []
+    for key in keys:
+        values = store.fields.get(key)
+        if values is None:
+            continue
+        columns.append(values.codes.astype(np.float64) if isinstance(values, Categorical) else values)
+    if len(store) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    table = np.column_stack(columns) if columns else np.zeros((len(store), 1))
+    _, first, inverse = np.unique(table, axis=0, return_index=True, return_inverse=True)
+    return first, inverse.reshape(-1)
+
+
+def _section_names_by_unique_rows(store, keys:list[str], namer) -> np.ndarray:
+    '''
+    build the section name once per unique combination of the fields in keys
+    and broadcast it to all rows of the ElementStore
+    '''
+    if len(store) == 0:
+        return np.zeros(0, dtype=object)
+    first, inverse = _unique_rows(store, keys)
+    names = np.array([namer((store.ids[row], store.get(store.ids[row]))) for row in first], dtype=object)
+    return names[inverse]
+
+
+def column_section_names(store) -> np.ndarray:
+    '''ETABS section name of every column of a column ElementStore'''
+    return _section_names_by_unique_rows(store, ['name', 'material_grade', 'rebar'], get_etabs_column_concrete_section)
+
+
+def beam_section_names(store) -> np.ndarray:
+    '''ETABS section name of every beam of a beam ElementStore'''
+    return _section_names_by_unique_rows(store, ['name', 'material_grade', 'b', 'h'], get_etabs_beam_cross_section)
+
+
+def wall_section_names(store) -> np.ndarray:
+    '''ETABS section name of every wall of a wall ElementStore'''
+    return _section_names_by_unique_rows(store, ['name', 'material_grade', 'thk'], get_etabs_wall_cross_section)
+
+
+def floor_section_names(store) -> np.ndarray:
+    '''ETABS section name of every floor of a floor ElementStore'''
+    return _section_names_by_unique_rows(store, ['name', 'material_grade', 'thk'], get_etabs_floor_cross_section)
+
+
+_SECTION_NAMERS = {
+    'column': column_section_names,
+    'beam': beam_section_names,
+    'wall': wall_section_names,
+    'floor': floor_section_names,
+}
+
+
+def section_names(store) -> np.ndarray:
+    '''
+    ETABS section names of an ElementStore by its kind, kept in store.derived
+    so they are built once per store (and saved with the binary cache)
+    '''
+    from mat_ceng.revit_interop.element_store import Categorical
+    names = store.derived.get('section_name')
+    if names is None:
+        if store.kind not in _SECTION_NAMERS:
+            raise ValueError(f'no ETABS section names for "{store.kind}" elements')
+        values = _SECTION_NAMERS[store.kind](store)
+        categories, codes = np.unique(values.astype(str), return_inverse=True) if len(values) else ([], [])
+        names = store.derived['section_name'] = Categorical(categories, codes)
+    return names.decode()
+
+
+# --- section catalogue ---
+# rebar values the exporter writes for columns without rebar data
+_EMPTY_REBAR = {'t@', 't', 'T', 'T@'}
+# fields a section definition depends on, per element kind
+SECTION_FIELDS = {
+    'column': ['name', 'material_grade', 'rebar', 'b', 'h'],
+    'beam': ['name', 'material_grade', 'b', 'h'],
+    'wall': ['name', 'material_grade', 'thk'],
+    'floor': ['name', 'material_grade', 'thk'],
+}
+FRAME_KINDS = ('column', 'beam')
+AREA_KINDS = ('wall', 'floor')
+
+
+@dataclass(frozen=True)
+class SectionDefinition:
+    kind: str # 'column', 'beam', 'wall' or 'floor'
+    name: str # ETABS property name
+    shape: str # 'rectangle', 'circle' (frames), 'wall', 'slab' (areas)
+    material: str
+    depth: float = 0.0 # t3, diameter of circles, mm
+    width: float = 0.0 # t2, mm
+    thickness: float = 0.0 # walls and floors, mm
+    rebar: Optional[str] = None # column rebar as 'countTsize', e.g. '12T20'
+
+
+def section_definition(kind:str, section_data) -> SectionDefinition:
+    '''
+    SectionDefinition of a (revit_id, data) pair, same rules as the notebook add_*_sections helpers
+    '''
+    data = section_data[1]
+    material = str(data['material_grade'])
+    if kind == 'column':
+        rebar = data.get('rebar')
+        rebar = None if not rebar or rebar in _EMPTY_REBAR else str(rebar)
+        name = get_etabs_column_concrete_section(section_data)
+        if data.get('h'):
+            return SectionDefinition(kind, name, 'rectangle', material, float(data['h']), float(data['b']), rebar=rebar)
+        return SectionDefinition(kind, name, 'circle', material, float(data['b']), rebar=rebar)
+    if kind == 'beam':
+        name = get_etabs_beam_cross_section(section_data)
+        return SectionDefinition(kind, name, 'rectangle', material, float(data['h']), float(data['b']))
+    if kind == 'wall':
+        name = get_etabs_wall_cross_section(section_data)
+        return SectionDefinition(kind, name, 'wall', material, thickness=float(round(float(data['thk']))))
+    if kind == 'floor':
+        name = get_etabs_floor_cross_section(section_data)
+        return SectionDefinition(kind, name, 'slab', material, thickness=float(round(float(data['thk']))))
+    raise ValueError(f'no ETABS sections for "{kind}" elements')
+
+
+class SectionCatalogue:
+    '''
+    unique section definitions of an export, with the section code of every element
+
+    usage:
+        catalogue = SectionCatalogue.from_stores(load_element_stores('test_data'))
+        catalogue.definitions                  # one per ETABS property
+        codes = catalogue.codes['column']      # int32 code of every column row
+        catalogue.names(codes)                 # ETABS property names
+    '''
+    def __init__(self):
+        self.definitions:list[SectionDefinition] = []
+        self.codes:dict[str, np.ndarray] = {} # element kind -> code of every row, -1 without a section
+        self.conflicts:list[tuple[SectionDefinition, SectionDefinition]] = [] # same name, other definition
+        self._code_of:dict[SectionDefinition, int] = {}
+        self._code_of_name:dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.definitions)
+
+    def __getitem__(self, code:int) -> SectionDefinition:
+        return self.definitions[code]
+
+    def add(self, definition:SectionDefinition) -> int:
+        '''code of the definition, added if it is new'''
+        code = self._code_of.get(definition)
+        if code is not None:
+            return code
+        code = self._code_of_name.get(definition.name)
+        if code is not None:
+            # ETABS keeps one property per name, the first definition wins
+            self.conflicts.append((self.definitions[code], definition))
+            self._code_of[definition] = code
+            return code
+        code = self._code_of[definition] = self._code_of_name[definition.name] = len(self.definitions)
+        self.definitions.append(definition)
+        return code
+
+    def code(self, name:str) -> int:
+        return self._code_of_name.get(name, -1)
+
+    def names(self, codes:np.ndarray) -> np.ndarray:
+        '''ETABS property name of every code, None for -1'''
+        names = np.array([x.name for x in self.definitions] + [None], dtype=object)
+        return names[np.asarray(codes)]
+
+    def of_kinds(self, kinds:Iterable[str]) -> list[SectionDefinition]:
+        return [x for x in self.definitions if x.kind in kinds]
+
+    @property
+    def frame_definitions(self) -> list[SectionDefinition]:
+        return self.of_kinds(FRAME_KINDS)
+
+    @property
+    def area_definitions(self) -> list[SectionDefinition]:
+        return self.of_kinds(AREA_KINDS)
+
+    def add_store(self, store) -> np.ndarray:
+        '''
+        add the sections of an ElementStore, one definition is built per unique
+        combination of the SECTION_FIELDS, not per element
+        '''
+        if store.kind not in SECTION_FIELDS:
+            raise ValueError(f'no ETABS sections for "{store.kind}" elements')
+        first, inverse = _unique_rows(store, SECTION_FIELDS[store.kind])
+        unique_codes = np.empty(len(first), dtype=np.int32)
+        for unique in np.argsort(first).tolist(): # definitions in element order
+            element_id = store.ids[first[unique]]
+            unique_codes[unique] = self.add(section_definition(store.kind, (element_id, store.get(element_id))))
+        codes = unique_codes[inverse] if len(inverse) else np.zeros(0, dtype=np.int32)
+        self.codes[store.kind] = codes
+        return codes
+
+    @classmethod
+    def from_stores(cls, stores:dict) -> 'SectionCatalogue':
+        '''stores: load_element_stores() result, the column, beam, wall and floor stores are used'''
+        catalogue = cls()
+        for kind in SECTION_FIELDS:
+            if kind in stores:
+                catalogue.add_store(stores[kind])
+        return catalogue
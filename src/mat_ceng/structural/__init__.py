@@ -0,0 +1,10 @@
+'''
+Structural analysis and design helpers
+'''
+
+from mat_ceng.structural.beam_analysis import (
+    BeamResults, ContinuousBeam, InfluenceLines, concrete_modulus, pattern_loads)
+from mat_ceng.structural.slab_design import (
+    SlabMesh, SlabResults, mesh_slab, analyse_slab, plate_rigidity, plate_element_stiffness,
+    assemble_plate_stiffness, PlateFactor,
+    PunchingResults, check_punching_shear)
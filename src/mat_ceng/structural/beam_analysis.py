@@ -0,0 +1,421 @@
+'''
+continuous beam analysis, direct stiffness method
+
+every span is divided into Euler-Bernoulli elements (2 dof per node: deflection, rotation),
+the stiffness of the free dofs is stored banded (bandwidth 3) and factorised once per beam,
+all load cases / live load patterns are then solved together as right hand sides
+
+units: N, mm (EI in N·mm², line loads in N/mm)
+signs: loads and deflections positive downwards, sagging moment positive,
+       shear positive when the forces left of the section act upwards
+
+influence lines (unit load at every node, unit line load on every span) are solved once per
+beam geometry and cached, moving load / live load pattern envelopes are then matrix products
+
+usage:
+    beam = ContinuousBeam([6000, 8000, 6000], EI=ec * b * h**3 / 12)
+    loads, names = pattern_loads(dead=30.0, live=15.0, span_count=3)
+    results = beam.solve(loads)
+    results.envelope()['moment_max']
+
+    lines = beam.influence_lines()
+    lines.moving_load_envelope(axle_offsets=[0, 1800], axle_loads=[60e3, 60e3], step=100)
+    lines.pattern_envelope(dead=30.0, live=15.0)
+'''
+from dataclasses import dataclass
+import functools
+import math
+from typing import Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+from scipy.linalg import cholesky_banded, cho_solve_banded, LinAlgError
+
+BANDWIDTH = 3 # upper bandwidth of the stiffness with 2 dof per node
+
+
+@dataclass
+class BeamResults:
+    x: np.ndarray # (s,) station positions, mm; nodes are repeated so jumps at supports / point loads show
+    span: np.ndarray # (s,) span of every station
+    shear: np.ndarray # (s, c) N
+    moment: np.ndarray # (s, c) N·mm
+    deflection: np.ndarray # (s, c) mm
+    reactions: np.ndarray # (r, c) upward support forces, N
+    support_moments: np.ndarray # (2, c) reaction moments of the fixed ends, counterclockwise, 0 if pinned, N·mm
+
+    def envelope(self) -> dict:
+        '''max / min of every station over all the load cases'''
+        return {
+            'moment_max': self.moment.max(axis=1),
+            'moment_min': self.moment.min(axis=1),
+            'shear_max': self.shear.max(axis=1),
+            'shear_min': self.shear.min(axis=1),
+            'deflection_max': self.deflection.max(axis=1),
+        }
+
+
+def concrete_modulus(fc:float) -> float:
+    '''ACI318-19 19.2.2.1(b), normalweight concrete, MPa'''
+    return 4700 * math.sqrt(fc)
+
+
+def pattern_loads(dead, live, span_count:int) -> tuple[np.ndarray, list[str]]:
+    '''
+    factored line loads (span_count, patterns) for the live load arrangements of ACI318-19 6.4.3.2
+    all spans loaded, live load on alternate spans (max positive moments)
+    and on every pair of adjacent spans (max negative moments at the support between them)
+
+    dead, live: factored loads, N/mm, scalar or one value per span
+    '''
+    dead = np.broadcast_to(np.asarray(dead, dtype=float), (span_count,))
+    live = np.broadcast_to(np.asarray(live, dtype=float), (span_count,))
+    spans = np.arange(span_count)
+    patterns = [np.ones(span_count, dtype=bool)]
+    names = ['all']
+    if span_count > 1:
+        patterns += [spans % 2 == 0, spans % 2 == 1]
+        names += ['alternate_odd', 'alternate_even']
+    if span_count > 2:
+        for i in range(span_count - 1):
+            patterns.append((spans == i) | (spans == i + 1))
+            names.append(f'adjacent_{i + 1}_{i + 2}')
+    live_on = np.column_stack(patterns)
+    return dead[:, None] + live[:, None] * live_on, names
+
+
+class ContinuousBeam:
+    '''
+    straight beam over supports at the span ends
+
+    spans: span lengths, mm
+    EI: flexural stiffness, N·mm², scalar or one value per span
+    supports: (spans + 1,) True where the span end has a vertical support, all by default;
+              False at an end gives a cantilever
+    fixed_ends: rotation restrained at the (first, last) end
+    elements_per_span: elements of every span
+    extra_nodes: positions of additional nodes, e.g. point load positions
+    '''
+    def __init__(self, spans:Sequence[float], EI, supports:Optional[Sequence[bool]] = None,
+                 fixed_ends:tuple[bool, bool] = (False, False), elements_per_span:int = 8,
+                 extra_nodes:Optional[Sequence[float]] = None):
+        spans = np.asarray(spans, dtype=float).reshape(-1)
+        if len(spans) == 0 or np.any(spans <= 0):
+            raise ValueError('beam: span lengths must be positive')
+        self.spans = spans
+        self.span_ends = np.concatenate([[0.0], np.cumsum(spans)])
+        self.length = float(self.span_ends[-1])
+        self.EI = np.broadcast_to(np.asarray(EI, dtype=float), spans.shape).copy()
+        self.supports = np.ones(len(spans) + 1, dtype=bool) if supports is None else np.asarray(supports, dtype=bool)
+        if len(self.supports) != len(spans) + 1:
+            raise ValueError('beam: one support flag per span end is needed')
+        self.fixed_ends = tuple(bool(x) for x in fixed_ends)
+        self.elements_per_span = int(elements_per_span)
+        self.extra_nodes = () if extra_nodes is None else tuple(float(x) for x in np.ravel(extra_nodes))
+        if self.supports.sum() + any(self.fixed_ends) < 2 or not self.supports.any():
+            raise ValueError('beam: unstable, the supports do not restrain the beam')
+
+        x = [np.linspace(a, b, elements_per_span + 1) for a, b in zip(self.span_ends[:-1], self.span_ends[1:])]
+        if extra_nodes is not None:
+            x.append(np.clip(np.asarray(extra_nodes, dtype=float), 0.0, self.length))
+        x = np.unique(np.concatenate(x))
+        # merge nodes closer than a micron, the span ends win
+        keep = np.concatenate([[True], np.diff(x) > 1e-3])
+        x = x[keep]
+        x[np.searchsorted(x, self.span_ends - 1e-3)] = self.span_ends
+        self.x = x
+        self.element_length = np.diff(x)
+        self.element_span = np.clip(np.searchsorted(self.span_ends, x[:-1] + 0.5 * self.element_length) - 1,
+                                    0, len(spans) - 1)
+        self.element_EI = self.EI[self.element_span]
+        self.support_nodes = np.searchsorted(x, self.span_ends[self.supports])
+
+        n_dof = 2 * len(x)
+        restrained = [2 * self.support_nodes]
+        if self.fixed_ends[0]:
+            restrained.append([1])
+        if self.fixed_ends[1]:
+            restrained.append([n_dof - 1])
+        self.restrained = np.unique(np.concatenate(restrained)).astype(np.int64)
+        self.free = np.setdiff1d(np.arange(n_dof), self.restrained)
+        self.element_dofs = 2 * np.arange(len(x) - 1)[:, None] + np.arange(4)
+        self.stiffness = self._assemble()
+        self._factor = None
+
+    @property
+    def node_count(self) -> int:
+        return len(self.x)
+
+    @property
+    def dof_count(self) -> int:
+        return 2 * len(self.x)
+
+    def element_stiffness(self) -> np.ndarray:
+        '''(e, 4, 4) element stiffness matrices, dof order v1, θ1, v2, θ2'''
+        L = self.element_length[:, None, None]
+        base = np.array([[12, 6, -12, 6], [6, 4, -6, 2], [-12, -6, 12, -6], [6, 2, -6, 4]], dtype=float)
+        power = np.array([[3, 2, 3, 2], [2, 1, 2, 1], [3, 2, 3, 2], [2, 1, 2, 1]])
+        return self.element_EI[:, None, None] * base / L ** power
+
+    def _assemble(self) -> sparse.csr_matrix:
+        ke = self.element_stiffness()
+        rows = np.repeat(self.element_dofs, 4, axis=1).reshape(-1)
+        cols = np.tile(self.element_dofs, (1, 4)).reshape(-1)
+        return sparse.coo_matrix((ke.reshape(-1), (rows, cols)), shape=(self.dof_count, self.dof_count)).tocsr()
+
+    @property
+    def factor(self) -> np.ndarray:
+        '''banded Cholesky factor of the free dof stiffness, computed on first use'''
+        if self._factor is None:
+            K = self.stiffness[self.free][:, self.free].tocsr()
+            banded = np.zeros((BANDWIDTH + 1, len(self.free)))
+            for k in range(min(BANDWIDTH, len(self.free) - 1) + 1):
+                banded[BANDWIDTH - k, k:] = K.diagonal(k)
+            try:
+                self._factor = cholesky_banded(banded, lower=False)
+            except LinAlgError:
+                raise ValueError('beam: unstable, the supports do not restrain the beam') from None
+        return self._factor
+
+    def node_of(self, x) -> np.ndarray:
+        '''node index of every position, positions must be nodes (see extra_nodes)'''
+        x = np.asarray(x, dtype=float).reshape(-1)
+        nodes = np.clip(np.searchsorted(self.x, x), 0, len(self.x) - 1)
+        closer = (nodes > 0) & (np.abs(self.x[nodes - 1] - x) < np.abs(self.x[nodes] - x))
+        nodes = np.where(closer, nodes - 1, nodes)
+        if np.any(np.abs(self.x[nodes] - x) > 1e-3):
+            raise ValueError('beam: point loads must be at nodes, add their positions to extra_nodes')
+        return nodes
+
+    def _line_loads(self, span_loads, case_count:Optional[int]) -> np.ndarray:
+        if span_loads is None:
+            return np.zeros((len(self.element_length), case_count or 1))
+        w = np.asarray(span_loads, dtype=float)
+        if w.ndim == 1:
+            w = w[:, None]
+        if w.shape[0] != len(self.spans):
+            raise ValueError('beam: span loads need one row per span')
+        return w[self.element_span]
+
+    def solve(self, span_loads=None, point_loads=None, point_x=None, stations_per_element:int = 3) -> BeamResults:
+        '''
+        all load cases in one solve with the stored factorisation
+
+        span_loads: (spans, c) or (spans,) uniform line loads, N/mm
+        point_loads: (p, c) or (p,) point loads, N, at the positions point_x (nodes of the beam)
+        stations_per_element: result stations per element, element ends included
+        '''
+        case_count = None
+        if point_loads is not None:
+            P = np.asarray(point_loads, dtype=float)
+            P = P[:, None] if P.ndim == 1 else P
+            case_count = P.shape[1]
+        w = self._line_loads(span_loads, case_count)
+        cases = w.shape[1]
+        # element loads upwards, as the dofs
+        p = -w
+        L = self.element_length[:, None]
+        equivalent = np.stack([p * L / 2, p * L ** 2 / 12, p * L / 2, -p * L ** 2 / 12], axis=1) # (e, 4, c)
+        F = np.zeros((self.dof_count, cases))
+        np.add.at(F, self.element_dofs.reshape(-1), equivalent.reshape(-1, cases))
+        if point_loads is not None:
+            if P.shape[1] != cases:
+                raise ValueError('beam: point loads and span loads need the same number of cases')
+            np.add.at(F, 2 * self.node_of(point_x), -P)
+
+        d = np.zeros((self.dof_count, cases))
+        d[self.free] = cho_solve_banded((self.factor, False), F[self.free])
+        support_forces = self.stiffness @ d - F
+        reactions = support_forces[2 * self.support_nodes]
+        support_moments = np.zeros((2, cases))
+        if self.fixed_ends[0]:
+            support_moments[0] = support_forces[1]
+        if self.fixed_ends[1]:
+            support_moments[1] = support_forces[-1]
+
+        de = d[self.element_dofs] # (e, 4, c)
+        end_forces = np.einsum('eij,ejc->eic', self.element_stiffness(), de) - equivalent
+        xi = np.linspace(0.0, 1.0, stations_per_element)
+        xl = L[:, :, None] * xi # (e, 1, s) local station positions
+        V1 = end_forces[:, 0, :, None]
+        M1 = end_forces[:, 1, :, None]
+        pe = p[:, :, None]
+        shear = V1 + pe * xl
+        moment = -M1 + V1 * xl + pe * xl ** 2 / 2
+        ones = np.ones_like(L)
+        N = np.stack([ones * (1 - 3 * xi ** 2 + 2 * xi ** 3),
+                      L * (xi - 2 * xi ** 2 + xi ** 3),
+                      ones * (3 * xi ** 2 - 2 * xi ** 3),
+                      L * (-xi ** 2 + xi ** 3)], axis=1) # (e, 4, s) hermite shape functions
+        v = np.einsum('eks,ekc->ecs', N, de)
+        v += pe * xl ** 2 * (L[:, :, None] - xl) ** 2 / (24 * self.element_EI[:, None, None])
+
+        def stations(values):
+            return values.transpose(0, 2, 1).reshape(-1, cases)
+
+        x = (self.x[:-1, None] + self.element_length[:, None] * xi).reshape(-1)
+        span = np.repeat(self.element_span, stations_per_element)
+        return BeamResults(x, span, stations(shear), stations(moment), -stations(v), reactions, support_moments)
+
+    @property
+    def geometry_key(self) -> tuple:
+        '''hashable description of the beam, equal for beams with the same influence lines'''
+        return (tuple(self.spans.tolist()), tuple(self.EI.tolist()), tuple(self.supports.tolist()),
+                self.fixed_ends, self.elements_per_span, self.extra_nodes)
+
+    def influence_lines(self, stations_per_element:int = 3) -> 'InfluenceLines':
+        '''influence lines of the beam, shared by all the beams with the same geometry_key'''
+        return _cached_influence_lines(self.geometry_key, stations_per_element)
+
+    @classmethod
+    def from_beam_data(cls, beam, support_xy=None, tolerance:float = 50.0, E:Optional[float] = None,
+                       stiffness_modifier:float = 1.0, **kwargs) -> 'ContinuousBeam':
+        '''
+        beam of the Revit exporter (beam_data.json item: [id, data])
+        supports at both ends and at every support_xy point (e.g. column centres)
+        closer than tolerance to the beam axis, EI from b / h and the concrete grade
+        '''
+        data = beam[1]
+        start = np.array([data['x'][0], data['y'][0]], dtype=float)
+        end = np.array([data['x'][-1], data['y'][-1]], dtype=float)
+        axis = end - start
+        length = float(np.hypot(*axis))
+        stations = [0.0, length]
+        if support_xy is not None and len(support_xy):
+            points = np.asarray(support_xy, dtype=float).reshape(-1, 2) - start
+            t = points @ axis / length
+            offset = np.abs(points[:, 0] * axis[1] - points[:, 1] * axis[0]) / length
+            inside = (offset <= tolerance) & (t > tolerance) & (t < length - tolerance)
+            stations += t[inside].tolist()
+        stations = np.unique(stations)
+        if E is None:
+            E = concrete_modulus(float(str(data['material_grade']).upper().replace('FC', '')))
+        EI = stiffness_modifier * E * data['b'] * data['h'] ** 3 / 12
+        return cls(np.diff(stations), EI, **kwargs)
+
+
+def _read_only(*arrays):
+    for values in arrays:
+        values.flags.writeable = False
+
+
+@dataclass
+class InfluenceLines:
+    '''
+    responses at the result stations (rows) of a unit downward load at every node (columns)
+    and of a unit line load on every span (span_* arrays)
+    '''
+    x: np.ndarray # (s,) stations, as BeamResults.x
+    span: np.ndarray # (s,) span of every station
+    load_x: np.ndarray # (n,) node positions, the unit load positions
+    span_ends: np.ndarray # (spans + 1,)
+    moment: np.ndarray # (s, n)
+    shear: np.ndarray # (s, n)
+    deflection: np.ndarray # (s, n)
+    reactions: np.ndarray # (r, n)
+    span_moment: np.ndarray # (s, spans)
+    span_shear: np.ndarray # (s, spans)
+    span_deflection: np.ndarray # (s, spans)
+    span_reactions: np.ndarray # (r, spans)
+
+    @classmethod
+    def from_beam(cls, beam:ContinuousBeam, stations_per_element:int = 3) -> 'InfluenceLines':
+        nodes = beam.solve(point_loads=np.eye(beam.node_count), point_x=beam.x,
+                           stations_per_element=stations_per_element)
+        spans = beam.solve(np.eye(len(beam.spans)), stations_per_element=stations_per_element)
+        lines = cls(nodes.x, nodes.span, beam.x.copy(), beam.span_ends.copy(),
+                    nodes.moment, nodes.shear, nodes.deflection, nodes.reactions,
+                    spans.moment, spans.shear, spans.deflection, spans.reactions)
+        # shared through the cache, must not be changed by the callers
+        _read_only(*vars(lines).values())
+        return lines
+
+    def load_weights(self, positions, loads=None) -> np.ndarray:
+        '''
+        (n, p) nodal loads equivalent to point loads at positions, split linearly between the
+        two nodes around every load; loads off the beam are dropped
+        positions: (p,) or (p, a) positions of a axles per load position; loads: (a,) axle loads
+        '''
+        positions = np.asarray(positions, dtype=float)
+        if positions.ndim == 1:
+            positions = positions[:, None]
+        loads = np.ones(positions.shape[1]) if loads is None else np.asarray(loads, dtype=float)
+        columns = np.broadcast_to(np.arange(len(positions))[:, None], positions.shape)
+        on_beam = (positions >= self.load_x[0]) & (positions <= self.load_x[-1])
+        left = np.clip(np.searchsorted(self.load_x, positions, side='right') - 1, 0, len(self.load_x) - 2)
+        t = (positions - self.load_x[left]) / (self.load_x[left + 1] - self.load_x[left])
+        magnitude = np.where(on_beam, np.broadcast_to(loads, positions.shape), 0.0)
+        weights = np.zeros((len(self.load_x), len(positions)))
+        np.add.at(weights, (left, columns), magnitude * (1 - t))
+        np.add.at(weights, (left + 1, columns), magnitude * t)
+        return weights
+
+    def point_load_response(self, positions, loads=None) -> BeamResults:
+        '''
+        responses to one point load (or axle group) per column of positions, see load_weights
+        exact at the nodes, linear between them
+        '''
+        weights = self.load_weights(positions, loads)
+        return BeamResults(self.x, self.span, self.shear @ weights, self.moment @ weights,
+                           self.deflection @ weights, self.reactions @ weights, np.zeros((2, weights.shape[1])))
+
+    def moving_load_envelope(self, axle_offsets, axle_loads, step:float = 100.0,
+                             both_directions:bool = True) -> dict:
+        '''
+        envelope of a vehicle crossing the beam
+
+        axle_offsets: distance of every axle behind the first one, mm
+        axle_loads: axle loads, N
+        step: distance between the vehicle positions, mm
+        both_directions: the vehicle also crosses from the far end
+        '''
+        axle_offsets = np.asarray(axle_offsets, dtype=float)
+        length = self.load_x[-1] - self.load_x[0]
+        lead = self.load_x[0] + np.arange(0.0, length + axle_offsets.max() + step, step)
+        positions = lead[:, None] - axle_offsets
+        if both_directions:
+            positions = np.vstack([positions, self.load_x[0] + self.load_x[-1] - positions])
+        return _envelope(self.point_load_response(positions, axle_loads))
+
+    def pattern_envelope(self, dead, live) -> dict:
+        '''
+        envelope of the dead load on all spans with the live load on any combination of spans
+        (the spans with a favourable influence are left unloaded at every station)
+
+        dead, live: factored line loads, N/mm, scalar or one value per span
+        '''
+        span_count = self.span_moment.shape[1]
+        dead = np.broadcast_to(np.asarray(dead, dtype=float), (span_count,))
+        live = np.broadcast_to(np.asarray(live, dtype=float), (span_count,))
+
+        def bounds(lines):
+            base = lines @ dead
+            return base + np.clip(lines, 0, None) @ live, base + np.clip(lines, None, 0) @ live
+
+        moment_max, moment_min = bounds(self.span_moment)
+        shear_max, shear_min = bounds(self.span_shear)
+        deflection_max, _ = bounds(self.span_deflection)
+        reaction_max, reaction_min = bounds(self.span_reactions)
+        return {
+            'moment_max': moment_max,
+            'moment_min': moment_min,
+            'shear_max': shear_max,
+            'shear_min': shear_min,
+            'deflection_max': deflection_max,
+            'reaction_max': reaction_max,
+            'reaction_min': reaction_min,
+        }
+
+
+def _envelope(results:BeamResults) -> dict:
+    envelope = results.envelope()
+    envelope['reaction_max'] = results.reactions.max(axis=1)
+    envelope['reaction_min'] = results.reactions.min(axis=1)
+    return envelope
+
+
+@functools.lru_cache(maxsize=512)
+def _cached_influence_lines(geometry_key:tuple, stations_per_element:int) -> InfluenceLines:
+    spans, EI, supports, fixed_ends, elements_per_span, extra_nodes = geometry_key
+    beam = ContinuousBeam(spans, EI, supports, fixed_ends, elements_per_span, extra_nodes or None)
+    return InfluenceLines.from_beam(beam, stations_per_element)
@@ -0,0 +1,448 @@
+'''
+flat slab analysis with plate bending finite elements
+
+the slab of floor_data (same input as get_column_area_loads) is meshed with a uniform grid
+of rectangular ACM plate elements (12 dof: w, dw/dx, dw/dy per corner) clipped to the slab
+outline and openings (cells with their centre inside the slab), so every element has the same
+stiffness matrix and the sparse assembly / memory grow linearly with the element count;
+the nodes inside the column and wall outlines are vertical supports
+
+the direct solver orders the grid by nested dissection (grid lines as separators) before the
+sparse LU, which keeps the fill-in near n log n; the iterative solver keeps memory linear
+
+assumed unit is mm for length, KPA for area loading, KN for force, KN.m/m for moments
+signs: loads and deflections positive downwards, sagging moments positive
+
+usage:
+    results = analyse_slab(floor_data, occupancy_loading, thickness=250.0, mesh_size=500.0)
+    results.column_reactions   # (columns, load cases), compare with get_column_area_loads
+'''
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import shapely
+from shapely import Polygon, STRtree
+from scipy import sparse
+from scipy.sparse import linalg as sparse_linalg
+
+from mat_ceng.structural.beam_analysis import concrete_modulus
+
+# ACM element polynomial terms x^p * y^q
+_ACM_TERMS = np.array([[0, 0], [1, 0], [0, 1], [2, 0], [1, 1], [0, 2],
+                       [3, 0], [2, 1], [1, 2], [0, 3], [3, 1], [1, 3]])
+# corner order of the elements, counterclockwise from the lower left
+_CORNERS = np.array([[0, 0], [1, 0], [1, 1], [0, 1]])
+
+
+def _terms(xi, eta, dx:int = 0, dy:int = 0) -> np.ndarray:
+    '''derivative d^dx/dxi^dx d^dy/deta^dy of every polynomial term at the points (k, 12)'''
+    xi, eta = np.atleast_1d(xi).astype(float), np.atleast_1d(eta).astype(float)
+    p, q = _ACM_TERMS[:, 0], _ACM_TERMS[:, 1]
+    coefficient = np.ones(len(_ACM_TERMS))
+    for k in range(dx):
+        coefficient *= np.clip(p - k, 0, None)
+    for k in range(dy):
+        coefficient *= np.clip(q - k, 0, None)
+    px, qy = np.clip(p - dx, 0, None), np.clip(q - dy, 0, None)
+    return coefficient * xi[:, None] ** px * eta[:, None] ** qy
+
+
+def _shape_coefficients(a:float, b:float) -> np.ndarray:
+    '''(12, 12) inverse of the corner dof matrix, N = terms @ result, in unit coordinates'''
+    rows = []
+    for xi, eta in _CORNERS:
+        rows += [_terms(xi, eta)[0], _terms(xi, eta, 1, 0)[0] / a, _terms(xi, eta, 0, 1)[0] / b]
+    return np.linalg.inv(np.array(rows))
+
+
+def _curvature_matrix(a:float, b:float, xi, eta) -> np.ndarray:
+    '''(k, 3, 12) curvatures -[w_xx, w_yy, 2 w_xy] from the element dofs'''
+    inverse = _shape_coefficients(a, b)
+    return -np.stack([_terms(xi, eta, 2, 0) @ inverse / a ** 2,
+                      _terms(xi, eta, 0, 2) @ inverse / b ** 2,
+                      2 * _terms(xi, eta, 1, 1) @ inverse / (a * b)], axis=1)
+
+
+def plate_rigidity(E:float, thickness:float, poisson:float) -> np.ndarray:
+    '''(3, 3) bending rigidity of an isotropic plate, N.mm'''
+    D = E * thickness ** 3 / (12 * (1 - poisson ** 2))
+    return D * np.array([[1, poisson, 0], [poisson, 1, 0], [0, 0, (1 - poisson) / 2]])
+
+
+def plate_element_stiffness(a:float, b:float, rigidity:np.ndarray) -> np.ndarray:
+    '''(12, 12) ACM rectangle stiffness, a x b element, 3x3 gauss points (exact)'''
+    points, weights = np.polynomial.legendre.leggauss(3)
+    points, weights = (points + 1) / 2, weights / 2
+    xi, eta = [x.reshape(-1) for x in np.meshgrid(points, points, indexing='ij')]
+    w = np.outer(weights, weights).reshape(-1) * a * b
+    B = _curvature_matrix(a, b, xi, eta)
+    return np.einsum('k,kij,jl,klm->im', w, B.transpose(0, 2, 1), rigidity, B)
+
+
+def plate_element_load(a:float, b:float) -> np.ndarray:
+    '''(12,) consistent nodal loads of a unit pressure on an a x b element'''
+    points, weights = np.polynomial.legendre.leggauss(3)
+    points, weights = (points + 1) / 2, weights / 2
+    xi, eta = [x.reshape(-1) for x in np.meshgrid(points, points, indexing='ij')]
+    w = np.outer(weights, weights).reshape(-1) * a * b
+    return w @ (_terms(xi, eta) @ _shape_coefficients(a, b))
+
+
+@dataclass
+class SlabMesh:
+    nodes: np.ndarray # (n, 2) node coordinates
+    elements: np.ndarray # (e, 4) corner nodes, counterclockwise from the lower left
+    size: tuple # (a, b) element size
+    centres: np.ndarray # (e, 2) element centres
+
+    def __len__(self):
+        return len(self.elements)
+
+    @property
+    def element_dofs(self) -> np.ndarray:
+        '''(e, 12) global dofs, 3 per node'''
+        return (3 * self.elements[:, :, None] + np.arange(3)).reshape(len(self.elements), 12)
+
+
+def mesh_slab(slab:Polygon, mesh_size:float = 500.0) -> SlabMesh:
+    '''uniform grid of the slab bounding box, keeping the cells with their centre inside the slab'''
+    x0, y0, x1, y1 = slab.bounds
+    nx = max(int(np.ceil((x1 - x0) / mesh_size)), 1)
+    ny = max(int(np.ceil((y1 - y0) / mesh_size)), 1)
+    a, b = (x1 - x0) / nx, (y1 - y0) / ny
+    i, j = [x.reshape(-1) for x in np.meshgrid(np.arange(nx), np.arange(ny), indexing='ij')]
+    centres = np.column_stack([x0 + (i + 0.5) * a, y0 + (j + 0.5) * b])
+    inside = shapely.contains_xy(slab, centres[:, 0], centres[:, 1])
+    i, j, centres = i[inside], j[inside], centres[inside]
+    grid = np.stack([i, i + 1, i + 1, i], axis=1) * (ny + 1) + np.stack([j, j, j + 1, j + 1], axis=1)
+    used, elements = np.unique(grid, return_inverse=True)
+    nodes = np.column_stack([x0 + (used // (ny + 1)) * a, y0 + (used % (ny + 1)) * b])
+    return SlabMesh(nodes, elements.reshape(-1, 4).astype(np.int64), (a, b), centres)
+
+
+def nested_dissection_order(nodes:np.ndarray, leaf_size:int = 64) -> np.ndarray:
+    '''
+    node order of a grid: both halves first, the grid line separating them last, recursively
+    '''
+    order = []
+
+    def split(rows):
+        points = nodes[rows]
+        axis = int(np.argmax(np.ptp(points, axis=0))) if len(rows) else 0
+        lines = np.unique(points[:, axis])
+        if len(rows) <= leaf_size or len(lines) < 3:
+            order.append(rows)
+            return
+        cut = lines[len(lines) // 2]
+        split(rows[points[:, axis] < cut])
+        split(rows[points[:, axis] > cut])
+        order.append(rows[points[:, axis] == cut])
+
+    split(np.arange(len(nodes)))
+    return np.concatenate(order)
+
+
+def assemble_plate_stiffness(mesh:SlabMesh, element_stiffness:np.ndarray) -> sparse.csr_matrix:
+    '''global stiffness of the mesh, all elements share element_stiffness'''
+    dofs = mesh.element_dofs
+    n_dof = 3 * len(mesh.nodes)
+    rows = np.repeat(dofs, 12, axis=1).reshape(-1)
+    cols = np.tile(dofs, (1, 12)).reshape(-1)
+    values = np.tile(element_stiffness.reshape(-1), len(mesh))
+    return sparse.coo_matrix((values, (rows, cols)), shape=(n_dof, n_dof)).tocsr()
+
+
+class PlateFactor:
+    '''
+    sparse LU of a plate stiffness (free dofs) in nested dissection order
+    the ordering is kept, refactor() only repeats the numeric factorisation
+    '''
+    def __init__(self, mesh:SlabMesh, K_free:sparse.spmatrix, free:Optional[np.ndarray] = None):
+        n_dof = 3 * len(mesh.nodes)
+        free = np.arange(n_dof) if free is None else np.asarray(free)
+        rank = np.empty(n_dof, dtype=np.int64)
+        rank[(3 * nested_dissection_order(mesh.nodes)[:, None] + np.arange(3)).reshape(-1)] = np.arange(n_dof)
+        self.order = np.argsort(rank[free])
+        self.refactor(K_free)
+
+    @classmethod
+    def with_order(cls, order:np.ndarray, K_free:sparse.spmatrix) -> 'PlateFactor':
+        '''factorisation of a matrix with the pattern (and free dofs) of another one, reusing its order'''
+        factor = cls.__new__(cls)
+        factor.order = order
+        factor.refactor(K_free)
+        return factor
+
+    def refactor(self, K_free:sparse.spmatrix) -> None:
+        K = sparse.csr_matrix(K_free)[self.order][:, self.order].tocsc()
+        self.lu = sparse_linalg.splu(K, permc_spec='NATURAL', diag_pivot_thresh=0.0,
+                                     options={'SymmetricMode': True})
+
+    def solve(self, F:np.ndarray) -> np.ndarray:
+        x = np.empty_like(F, dtype=float)
+        x[self.order] = self.lu.solve(np.asarray(F, dtype=float)[self.order])
+        return x
+
+
+def _support_nodes(mesh:SlabMesh, outlines:list[Polygon]) -> np.ndarray:
+    '''
+    (pairs, 2) [outline, node] of the nodes inside every outline,
+    the node closest to the centroid for outlines smaller than the mesh
+    '''
+    if not outlines:
+        return np.zeros((0, 2), dtype=np.int64)
+    tolerance = 1e-6 * max(mesh.size)
+    points = shapely.points(mesh.nodes)
+    outline_of, node = STRtree(points).query([x.buffer(tolerance) for x in outlines], predicate='contains')
+    missing = np.setdiff1d(np.arange(len(outlines)), outline_of)
+    if len(missing):
+        centroids = shapely.points([outlines[k].centroid.coords[0] for k in missing])
+        nearest = STRtree(points).nearest(centroids)
+        outline_of, node = np.concatenate([outline_of, missing]), np.concatenate([node, nearest])
+    # a node shared by two outlines supports the first one only
+    _, first = np.unique(node, return_index=True)
+    return np.column_stack([outline_of[first], node[first]]).astype(np.int64)
+
+
+@dataclass
+class SlabResults:
+    mesh: SlabMesh
+    cases: list # load case names
+    deflection: np.ndarray # (n, c) node deflections, mm
+    moments: np.ndarray # (e, 3, c) mx, my, mxy at the element centres, KN.m/m
+    column_reactions: np.ndarray # (columns, c) KN, in floor_data['columns'] order
+    wall_reactions: np.ndarray # (walls, c) KN
+
+    def moment_envelope(self) -> dict:
+        return {'mx_max': self.moments[:, 0].max(axis=1), 'mx_min': self.moments[:, 0].min(axis=1),
+                'my_max': self.moments[:, 1].max(axis=1), 'my_min': self.moments[:, 1].min(axis=1)}
+
+
+def _element_pressures(floor_data:dict, centres:np.ndarray, occupancy_loading:Optional[dict],
+                       pressure, multiple_occupancy_categories:bool) -> tuple[np.ndarray, list]:
+    '''(e, c) pressure of every element, KPA'''
+    if occupancy_loading is None:
+        pressure = np.atleast_1d(np.asarray(1.0 if pressure is None else pressure, dtype=float))
+        return np.broadcast_to(pressure, (len(centres), len(pressure))), [f'case_{i + 1}' for i in range(len(pressure))]
+    cases = list(next(iter(occupancy_loading.values())).keys())
+    vectors = {occupancy: np.array(list(loads.values()), dtype=float) for occupancy, loads in occupancy_loading.items()}
+    pressures = np.zeros((len(centres), len(cases)))
+    assigned = np.zeros(len(centres), dtype=bool)
+    occupancies = ['heavy_occupancy', 'light_occupancy'] if multiple_occupancy_categories else ['light_occupancy']
+    for occupancy in occupancies:
+        outline = floor_data.get(occupancy, []) if multiple_occupancy_categories else None
+        if occupancy not in vectors:
+            continue
+        if outline is None:
+            inside = np.ones(len(centres), dtype=bool)
+        elif len(outline):
+            inside = shapely.contains_xy(Polygon(outline), centres[:, 0], centres[:, 1])
+        else:
+            continue
+        inside &= ~assigned
+        pressures[inside] = vectors[occupancy]
+        assigned |= inside
+    return pressures, cases
+
+
+def analyse_slab(floor_data:dict,
+                 occupancy_loading:Optional[dict] = None,
+                 thickness:float = 250.0,
+                 fc:float = 40.0,
+                 poisson:float = 0.2,
+                 mesh_size:float = 500.0,
+                 include_openings:bool = True,
+                 multiple_occupancy_categories:bool = True,
+                 pressure=None,
+                 solver:str = 'direct') -> SlabResults:
+    '''
+    plate bending analysis of the slab of floor_data supported on its columns and walls
+
+    floor_data: json or dict for slab outline, openings, walls, columns, occupancy load areas
+    occupancy_loading: json or dict for occupancy categories and uniform area load values as per load cases,
+                       elements take the heavy occupancy load inside its outline, the light one elsewhere
+    thickness: slab thickness, mm; fc: concrete strength, MPa (E from ACI318-19 19.2.2.1)
+    mesh_size: target element size, mm
+    pressure: uniform area loads, KPA, one per load case, used when occupancy_loading is None
+    solver: 'direct' (sparse LU, factorised once for all load cases) or 'iterative' (conjugate gradient)
+    '''
+    slab_outline = Polygon(floor_data.get('slab_outline', []))
+    holes = [opening for opening in floor_data.get('slab_openings', [])] if include_openings else []
+    slab = Polygon(slab_outline.exterior.coords, holes=holes)
+    columns = [Polygon(outline) for outline in floor_data.get('columns', [])]
+    walls = [Polygon(outline) for outline in floor_data.get('walls', [])]
+
+    mesh = mesh_slab(slab, mesh_size)
+    a, b = mesh.size
+    rigidity = plate_rigidity(concrete_modulus(fc), thickness, poisson)
+    ke = plate_element_stiffness(a, b, rigidity)
+    fe = plate_element_load(a, b)
+
+    dofs = mesh.element_dofs
+    n_dof = 3 * len(mesh.nodes)
+    K = assemble_plate_stiffness(mesh, ke)
+
+    # KPA -> N/mm²
+    pressures, cases = _element_pressures(floor_data, mesh.centres, occupancy_loading, pressure,
+                                          multiple_occupancy_categories)
+    F = np.zeros((n_dof, pressures.shape[1]))
+    np.add.at(F, dofs.reshape(-1), (fe[None, :, None] * pressures[:, None, :] * 1e-3).reshape(-1, pressures.shape[1]))
+
+    column_nodes = _support_nodes(mesh, columns)
+    wall_nodes = _support_nodes(mesh, walls)
+    wall_nodes = wall_nodes[~np.isin(wall_nodes[:, 1], column_nodes[:, 1])]
+    restrained = 3 * np.concatenate([column_nodes[:, 1], wall_nodes[:, 1]])
+    if len(restrained) < 3:
+        raise ValueError('slab: at least three supported nodes are needed')
+    free = np.setdiff1d(np.arange(n_dof), restrained)
+
+    K_free = K[free][:, free].tocsc()
+    d = np.zeros_like(F)
+    if solver == 'direct':
+        d[free] = PlateFactor(mesh, K_free, free).solve(F[free])
+    elif solver == 'iterative':
+        diagonal = K_free.diagonal()
+        preconditioner = sparse_linalg.LinearOperator(K_free.shape, matvec=lambda x: x / diagonal)
+        for case in range(F.shape[1]):
+            solution, info = sparse_linalg.cg(K_free, F[free, case], rtol=1e-10, maxiter=20 * len(free),
+                                              M=preconditioner)
+            if info != 0:
+                raise RuntimeError(f'slab: conjugate gradient did not converge for case {cases[case]}')
+            d[free, case] = solution
+    else:
+        raise ValueError(f'solver must be "direct" or "iterative", not "{solver}"')
+
+    reactions = (F[restrained] - K[restrained] @ d) * 1e-3 # upward, N -> KN
+    column_count = len(column_nodes)
+    column_reactions = np.zeros((len(columns), F.shape[1]))
+    np.add.at(column_reactions, column_nodes[:, 0], reactions[:column_count])
+    wall_reactions = np.zeros((len(walls), F.shape[1]))
+    np.add.at(wall_reactions, wall_nodes[:, 0], reactions[column_count:])
+
+    B = _curvature_matrix(a, b, 0.5, 0.5)[0]
+    moments = np.einsum('ij,jk,ekc->eic', rigidity, B, d[dofs]) * 1e-3 # N.mm/mm -> KN.m/m
+    return SlabResults(mesh, cases, d[0::3], moments, column_reactions, wall_reactions)
+
+
+# --- punching shear, ACI318-19 22.6 ---
+ALPHA_S = {'interior': 40, 'edge': 30, 'corner': 20} # 22.6.5.3
+
+
+@dataclass
+class PunchingResults:
+    critical_sections: np.ndarray # (k,) effective critical perimeters, shapely geometries
+    perimeter: np.ndarray # (k,) b0, mm
+    effective_depth: float # d, mm
+    location: np.ndarray # (k,) 'interior', 'edge' or 'corner'
+    beta: np.ndarray # (k,) long / short side of the column
+    phi_vc: np.ndarray # (k,) design two-way shear strength, MPa
+    vu: np.ndarray # (k, m) factored shear stress of every combination, MPa
+    vu_force: np.ndarray # (k, m) factored shear force at the critical section, KN
+
+    @property
+    def ratio(self) -> np.ndarray:
+        '''(k, m) vu / phi vc'''
+        return self.vu / self.phi_vc[:, None]
+
+    @property
+    def governing(self) -> np.ndarray:
+        '''(k,) governing combination of every column'''
+        return np.argmax(self.ratio, axis=1)
+
+    @property
+    def passes(self) -> np.ndarray:
+        return self.ratio.max(axis=1) <= 1.0
+
+
+def _column_sides(outlines:np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    '''long and short side of the minimum rotated rectangle of every outline'''
+    envelopes = shapely.oriented_envelope(outlines)
+    coords = shapely.get_coordinates(shapely.get_exterior_ring(envelopes)).reshape(len(outlines), -1, 2)[:, :3]
+    sides = np.linalg.norm(np.diff(coords, axis=1), axis=2)
+    return sides.max(axis=1), sides.min(axis=1)
+
+
+def _opening_shadows(centroids:np.ndarray, openings:list[Polygon], distance:float) -> list:
+    '''
+    (column, shadow) pairs: the region between the tangents from the column centroid to every
+    opening closer than distance (22.6.4.3), where the critical perimeter is not effective
+    '''
+    if not openings:
+        return []
+    points = shapely.points(centroids)
+    column, opening = STRtree(openings).query(points, predicate='dwithin', distance=distance)
+    shadows = shapely.convex_hull(shapely.union(points[column], np.array(openings, dtype=object)[opening]))
+    return list(zip(column.tolist(), shadows))
+
+
+def check_punching_shear(column_areas:list,
+                         floor_data:dict,
+                         effective_depth:float,
+                         thickness:float,
+                         load_factors,
+                         fc:float = 40.0,
+                         lambda_concrete:float = 1.0,
+                         phi:float = 0.75,
+                         include_openings:bool = True,
+                         deduct_inner_load:bool = True,
+                         size_effect:bool = True) -> PunchingResults:
+    '''
+    two-way shear of every column of get_column_area_loads, without unbalanced moment transfer
+
+    column_areas: ColumnArea list (column outline, trib area, column load per load case, KN)
+    floor_data: slab outline and openings, as for get_column_area_loads
+    effective_depth: d, mm; thickness: h, mm, openings closer than 4h are deducted (22.6.4.3)
+    load_factors: (m, cases) load factors of every combination, or (cases,) for one
+    deduct_inner_load: the load of the trib area inside the critical section is not punching
+    size_effect: lambda_s of 22.5.5.1.3 (slabs without minimum shear reinforcement)
+
+    critical sections are at d/2 from the column faces (22.6.4.1), the parts outside the slab
+    or in the shadow of an opening are not effective; the location (alpha_s, 22.6.5.3) follows
+    the slab edges alone: columns whose section stays inside the slab outline are interior,
+    the ones losing less than half of it to the edges edge columns, the others corner columns,
+    openings only reduce b0
+    '''
+    d = float(effective_depth)
+    load_factors = np.atleast_2d(np.asarray(load_factors, dtype=float))
+    slab_outline = Polygon(floor_data.get('slab_outline', []))
+    openings = [Polygon(x) for x in floor_data.get('slab_openings', [])] if include_openings else []
+    slab = Polygon(slab_outline.exterior.coords, holes=[x.exterior.coords for x in openings])
+
+    outlines = np.array([x.column_outline for x in column_areas], dtype=object)
+    trib_areas = np.array([x.trib_area for x in column_areas], dtype=object)
+    loads = np.array([np.asarray(x.column_load, dtype=float) * x.load_scale_factor for x in column_areas])
+    loads = loads.reshape(len(column_areas), -1)
+
+    sections = shapely.buffer(outlines, d / 2, join_style='mitre')
+    rings = shapely.boundary(sections)
+    full_perimeter = shapely.length(rings)
+    inside_edges = shapely.intersection(rings, shapely.buffer(slab_outline, -1e-6 * d))
+    share = shapely.length(inside_edges) / full_perimeter
+    location = np.where(share >= 0.99, 'interior', np.where(share >= 0.5, 'edge', 'corner')).astype(object)
+
+    effective = shapely.intersection(inside_edges, shapely.buffer(slab, -1e-6 * d))
+    for column, shadow in _opening_shadows(shapely.get_coordinates(shapely.centroid(outlines)), openings, 4 * thickness):
+        effective[column] = shapely.difference(effective[column], shadow)
+    perimeter = shapely.length(effective)
+
+    alpha_s = np.where(location == 'interior', ALPHA_S['interior'],
+                       np.where(location == 'edge', ALPHA_S['edge'], ALPHA_S['corner']))
+    long_side, short_side = _column_sides(outlines)
+    beta = long_side / short_side
+
+    # 22.6.5.2, MPa
+    lambda_s = min(np.sqrt(2 / (1 + 0.004 * d)), 1.0) if size_effect else 1.0
+    root_fc = lambda_s * lambda_concrete * np.sqrt(min(fc, 69.0)) # 22.5.3.1 sqrt(fc) <= 8.3 MPa
+    vc = np.minimum.reduce([
+        np.full(len(outlines), 0.33 * root_fc),
+        (0.17 + 0.33 / beta) * root_fc,
+        0.083 * (2 + alpha_s * d / np.where(perimeter > 0, perimeter, np.inf)) * root_fc])
+
+    if deduct_inner_load:
+        inner = shapely.area(shapely.intersection(sections, trib_areas)) / shapely.area(trib_areas)
+        loads = loads * (1 - np.clip(inner, 0, 1))[:, None]
+    vu_force = loads @ load_factors.T
+    with np.errstate(divide='ignore'):
+        vu = vu_force * 1e3 / (perimeter * d)[:, None]
+    return PunchingResults(effective, perimeter, d, location, beta, phi * vc, vu, vu_force)
@@ -0,0 +1,7 @@
+'''
+Surveying computations: coordinate transformations, network adjustment, streamed point files
+'''
+
+from mat_ceng.surveying.transformations import Helmert2D, Helmert3D, rotation_matrix
+from mat_ceng.surveying.adjustment import AdjustmentResults, SurveyNetwork, adjust_levelling
+from mat_ceng.surveying.survey_io import read_points_csv, transform_csv
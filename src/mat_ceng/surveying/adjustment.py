@@ -0,0 +1,261 @@
+'''
+least squares adjustment of survey networks with sparse normal equations
+
+horizontal networks (traverses are networks of angles and distances): distances, bearings and
+angles between named points, Gauss-Newton iterations on the coordinates of the free points,
+the observation equations of every kind are evaluated for all observations at once and the
+normal matrix is assembled and factorised as a sparse matrix
+
+levelling networks: height differences, one linear sparse solve
+
+x east, y north, bearings clockwise from north, angles clockwise from the backsight, in radians
+
+usage:
+    network = SurveyNetwork(names, approximate_xy, fixed=['A', 'B'])
+    network.add_distances(start, end, distances, sigma=0.003)
+    network.add_angles(at, backsight, foresight, angles, sigma=np.radians(5 / 3600))
+    results = network.adjust()
+'''
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+
+@dataclass
+class AdjustmentResults:
+    names: list
+    coordinates: np.ndarray # (n, 2) or (n,) for levelling
+    residuals: np.ndarray # adjusted - observed, in the order the observations were added
+    sigma0: float # a posteriori standard deviation of unit weight
+    iterations: int
+    standard_deviations: Optional[np.ndarray] = None # of the coordinates, 0 for the fixed points
+    free: Optional[np.ndarray] = None # unknown mask, same shape as coordinates
+
+    @property
+    def redundancy(self) -> int:
+        return int(self.residuals.size - np.count_nonzero(self.free))
+
+
+def _index(names:list) -> dict:
+    index = {name: i for i, name in enumerate(names)}
+    if len(index) != len(names):
+        raise ValueError('point names are not unique')
+    return index
+
+
+def _lookup(index:dict, labels:Iterable) -> np.ndarray:
+    try:
+        return np.fromiter((index[x] for x in labels), dtype=np.int64)
+    except KeyError as error:
+        raise KeyError(f'unknown point {error.args[0]}') from None
+
+
+def _wrap(angle:np.ndarray) -> np.ndarray:
+    return (angle + np.pi) % (2 * np.pi) - np.pi
+
+
+def _factor(N:sp.spmatrix):
+    try:
+        return splu(N.tocsc())
+    except RuntimeError:
+        raise ValueError('singular normal equations, the network datum is not defined '
+                         '(fix more points or add observations)') from None
+
+
+def _diagonal_inverse(factor, n:int, chunk_size:int = 256) -> np.ndarray:
+    '''diagonal of N^-1, solving for chunks of identity columns'''
+    diagonal = np.empty(n)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        columns = np.zeros((n, stop - start))
+        columns[np.arange(start, stop), np.arange(stop - start)] = 1.0
+        diagonal[start:stop] = factor.solve(columns)[np.arange(start, stop), np.arange(stop - start)]
+    return diagonal
+
+
+def _solve_normal(A:sp.spmatrix, weights:np.ndarray, misclosure:np.ndarray) -> tuple:
+    At = A.T.tocsr()
+    N = (At @ sp.diags(weights) @ A).tocsc()
+    factor = _factor(N)
+    return factor, factor.solve(At @ (weights * misclosure))
+
+
+class SurveyNetwork:
+    '''
+    horizontal network, names (n,) points with approximate coordinates (n, 2)
+    fixed: names of the control points held fixed
+    '''
+    def __init__(self, names:Iterable, coordinates, fixed:Iterable = ()):
+        self.names = list(names)
+        self.index = _index(self.names)
+        self.coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2).copy()
+        if len(self.coordinates) != len(self.names):
+            raise ValueError(f'{len(self.names)} names and {len(self.coordinates)} coordinates')
+        self.fixed = np.zeros(len(self.names), dtype=bool)
+        self.fixed[_lookup(self.index, fixed)] = True
+        self._observations = {'distance': [], 'bearing': [], 'angle': []}
+        self._order = [] # (kind, count) in the order the observations were added
+
+    def _add(self, kind:str, points:list, values, sigma):
+        values = np.asarray(values, dtype=float).reshape(-1)
+        points = [_lookup(self.index, x) for x in points]
+        if any(len(x) != len(values) for x in points):
+            raise ValueError(f'{kind} observations: points and values have different lengths')
+        sigma = np.broadcast_to(np.asarray(sigma, dtype=float), values.shape)
+        self._observations[kind].append((points, values, sigma))
+        self._order.append((kind, len(values)))
+
+    def add_distances(self, start, end, distances, sigma=0.003):
+        '''horizontal distances, m'''
+        self._add('distance', [start, end], distances, sigma)
+
+    def add_bearings(self, start, end, bearings, sigma=np.radians(5 / 3600)):
+        '''grid bearings (azimuths) from start to end, radians'''
+        self._add('bearing', [start, end], bearings, sigma)
+
+    def add_angles(self, at, backsight, foresight, angles, sigma=np.radians(5 / 3600)):
+        '''horizontal angles at the station from the backsight to the foresight, clockwise, radians'''
+        self._add('angle', [at, backsight, foresight], angles, sigma)
+
+    def _stack(self, kind:str, count:int) -> tuple:
+        observations = self._observations[kind]
+        if not observations:
+            return [np.zeros(0, dtype=np.int64)] * count, np.zeros(0), np.zeros(0)
+        points = [np.concatenate([x[0][i] for x in observations]) for i in range(count)]
+        return points, np.concatenate([x[1] for x in observations]), np.concatenate([x[2] for x in observations])
+
+    @staticmethod
+    def _bearing(xy:np.ndarray, start:np.ndarray, end:np.ndarray) -> tuple:
+        '''bearing and its derivatives with respect to (x, y) of the end point'''
+        dx, dy = (xy[end] - xy[start]).T
+        d2 = dx * dx + dy * dy
+        return np.arctan2(dx, dy), dy / d2, -dx / d2
+
+    def _equations(self, xy:np.ndarray) -> tuple:
+        '''
+        sparse jacobian over the 2n coordinates, computed and observed values, sigma and
+        an angular flag of every observation, grouped by kind
+        '''
+        rows, cols, data, computed, observed, sigma, angular = [], [], [], [], [], [], []
+        start_row = 0
+
+        def add(points, derivatives, value, obs, sd, wrap):
+            nonlocal start_row
+            row = start_row + np.arange(len(obs))
+            for point, (ddx, ddy) in zip(points, derivatives):
+                rows.extend([row, row])
+                cols.extend([2 * point, 2 * point + 1])
+                data.extend([ddx, ddy])
+            computed.append(value)
+            observed.append(obs)
+            sigma.append(sd)
+            angular.append(np.full(len(obs), wrap))
+            start_row += len(obs)
+
+        (start, end), obs, sd = self._stack('distance', 2)
+        dx, dy = (xy[end] - xy[start]).T
+        d = np.hypot(dx, dy)
+        add([start, end], [(-dx / d, -dy / d), (dx / d, dy / d)], d, obs, sd, False)
+
+        (start, end), obs, sd = self._stack('bearing', 2)
+        value, ddx, ddy = self._bearing(xy, start, end)
+        add([start, end], [(-ddx, -ddy), (ddx, ddy)], value, obs, sd, True)
+
+        (at, back, fore), obs, sd = self._stack('angle', 3)
+        back_bearing, bx, by = self._bearing(xy, at, back)
+        fore_bearing, fx, fy = self._bearing(xy, at, fore)
+        add([at, back, fore], [(bx - fx, by - fy), (-bx, -by), (fx, fy)],
+            fore_bearing - back_bearing, obs, sd, True)
+
+        n = 2 * len(xy)
+        A = sp.coo_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+                          shape=(start_row, n)).tocsr()
+        return A, np.concatenate(computed), np.concatenate(observed), np.concatenate(sigma), np.concatenate(angular)
+
+    def _kind_order(self) -> np.ndarray:
+        '''observation rows (grouped by kind) in the order the observations were added'''
+        kinds = list(self._observations)
+        sizes = {kind: sum(len(x[1]) for x in self._observations[kind]) for kind in kinds}
+        offsets = dict(zip(kinds, np.cumsum([0] + [sizes[k] for k in kinds])[:-1]))
+        order = []
+        for kind, count in self._order:
+            order.append(np.arange(offsets[kind], offsets[kind] + count))
+            offsets[kind] += count
+        return np.concatenate(order) if order else np.zeros(0, dtype=np.int64)
+
+    def adjust(self, max_iterations:int = 10, tolerance:float = 1e-6,
+               standard_deviations:bool = False) -> AdjustmentResults:
+        '''
+        Gauss-Newton iterations until the largest coordinate correction is below the tolerance (m)
+        standard_deviations: diagonal of the cofactor matrix, one extra solve per 256 unknowns
+        '''
+        xy = self.coordinates.copy()
+        free = np.repeat(~self.fixed, 2)
+        unknowns = np.flatnonzero(free)
+        if not len(unknowns):
+            raise ValueError('no free points to adjust')
+        for iteration in range(1, max_iterations + 1):
+            A, computed, observed, sigma, angular = self._equations(xy)
+            misclosure = observed - computed
+            misclosure[angular] = _wrap(misclosure[angular])
+            weights = 1 / sigma ** 2
+            factor, correction = _solve_normal(A[:, unknowns], weights, misclosure)
+            xy.reshape(-1)[unknowns] += correction
+            if np.abs(correction).max() < tolerance:
+                break
+        A, computed, observed, sigma, angular = self._equations(xy)
+        residuals = computed - observed
+        residuals[angular] = _wrap(residuals[angular])
+        redundancy = len(residuals) - len(unknowns)
+        sigma0 = float(np.sqrt(residuals ** 2 @ (1 / sigma ** 2) / redundancy)) if redundancy > 0 else np.nan
+        deviations = None
+        if standard_deviations:
+            deviations = np.zeros(2 * len(xy))
+            deviations[unknowns] = np.sqrt(_diagonal_inverse(factor, len(unknowns))) * (
+                sigma0 if redundancy > 0 else 1.0)
+            deviations = deviations.reshape(-1, 2)
+        return AdjustmentResults(self.names, xy, residuals[self._kind_order()], sigma0, iteration,
+                                 deviations, free.reshape(-1, 2))
+
+
+def adjust_levelling(names:Iterable, heights, fixed:Iterable, start, end, height_differences,
+                     sigma=None, distances=None, standard_deviations:bool = False) -> AdjustmentResults:
+    '''
+    levelling network, observed height differences end - start
+    heights: (n,) known heights of the fixed points, the free values are ignored
+    sigma: standard deviation of every height difference, or from the lengths (km) as 1 mm / sqrt(km)
+    '''
+    names = list(names)
+    index = _index(names)
+    heights = np.asarray(heights, dtype=float).reshape(-1).copy()
+    dh = np.asarray(height_differences, dtype=float).reshape(-1)
+    start, end = _lookup(index, start), _lookup(index, end)
+    if sigma is None:
+        sigma = 1e-3 * np.sqrt(np.asarray(distances, dtype=float)) if distances is not None else 1e-3
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=float), dh.shape)
+    is_fixed = np.zeros(len(names), dtype=bool)
+    is_fixed[_lookup(index, fixed)] = True
+    unknowns = np.flatnonzero(~is_fixed)
+    if not len(unknowns):
+        raise ValueError('no free points to adjust')
+    rows = np.arange(len(dh))
+    A = sp.coo_matrix((np.concatenate([-np.ones(len(dh)), np.ones(len(dh))]),
+                       (np.concatenate([rows, rows]), np.concatenate([start, end]))),
+                      shape=(len(dh), len(names))).tocsr()
+    heights[~is_fixed] = 0.0
+    misclosure = dh - A @ heights
+    weights = 1 / sigma ** 2
+    factor, solution = _solve_normal(A[:, unknowns], weights, misclosure)
+    heights[unknowns] = solution
+    residuals = A @ heights - dh
+    redundancy = len(dh) - len(unknowns)
+    sigma0 = float(np.sqrt(residuals ** 2 @ weights / redundancy)) if redundancy > 0 else np.nan
+    deviations = None
+    if standard_deviations:
+        deviations = np.zeros(len(names))
+        deviations[unknowns] = np.sqrt(_diagonal_inverse(factor, len(unknowns))) * (
+            sigma0 if redundancy > 0 else 1.0)
+    return AdjustmentResults(names, heights, residuals, sigma0, 1, deviations, ~is_fixed)
@@ -0,0 +1,51 @@
+'''
+streaming of large point CSV files (total station / GNSS exports) in chunks of rows,
+so million point datasets are transformed in bounded memory
+
+usage:
+    for names, xyz in read_points_csv('gnss.csv', columns=('E', 'N', 'H'), name_column='ID'):
+        ...
+    transform_csv('local.csv', 'project.csv', Helmert2D.fit(local_control, project_control).apply,
+                  columns=('x', 'y'))
+'''
+from typing import Callable, Iterator, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 200_000
+
+
+def read_points_csv(path, columns:Sequence[str] = ('x', 'y'), name_column:Optional[str] = None,
+                    chunk_size:int = DEFAULT_CHUNK_SIZE, **read_csv_kwargs) -> Iterator[tuple]:
+    '''
+    (names, coordinates) of every chunk of rows, names None without a name column,
+    coordinates (rows, len(columns)) floats
+    '''
+    import pandas as pd
+
+    usecols = list(columns) + ([name_column] if name_column is not None else [])
+    dtype = {column: float for column in columns}
+    if name_column is not None:
+        dtype[name_column] = str
+    with pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunk_size, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            names = chunk[name_column].to_numpy() if name_column is not None else None
+            yield names, chunk[list(columns)].to_numpy(dtype=float)
+
+
+def transform_csv(source, target, transform:Callable[[np.ndarray], np.ndarray],
+                  columns:Sequence[str] = ('x', 'y'), chunk_size:int = DEFAULT_CHUNK_SIZE,
+                  **read_csv_kwargs) -> int:
+    '''
+    applies transform ((rows, len(columns)) -> same shape) to the coordinate columns of every chunk
+    and appends the chunk, with all its other columns, to the target file; returns the number of rows
+    '''
+    import pandas as pd
+
+    rows = 0
+    with pd.read_csv(source, chunksize=chunk_size, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            chunk[list(columns)] = transform(chunk[list(columns)].to_numpy(dtype=float))
+            chunk.to_csv(target, mode='w' if rows == 0 else 'a', header=rows == 0, index=False)
+            rows += len(chunk)
+    return rows
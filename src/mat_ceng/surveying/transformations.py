@@ -0,0 +1,136 @@
+'''
+vectorized coordinate transformations, 2D / 3D Helmert (similarity) transformations
+fitted to control points by weighted least squares, local grid <-> project coordinates
+
+points are (n, 2) or (n, 3) arrays, angles in radians (counterclockwise, position vector convention)
+
+usage:
+    transform = Helmert2D.fit(local_control, project_control)
+    project = transform.apply(local)
+    local = transform.inverse().apply(project)
+    grid = Helmert2D.from_grid(local_origin=(0, 0), project_origin=(350120.0, 3712050.0), rotation=0.3)
+'''
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+def _weights(weights:Optional[np.ndarray], n:int) -> np.ndarray:
+    if weights is None:
+        return np.ones(n)
+    weights = np.asarray(weights, dtype=float).reshape(-1)
+    if len(weights) != n:
+        raise ValueError(f'{len(weights)} weights for {n} control points')
+    return weights
+
+
+def _control(source, target, dimension:int, minimum:int) -> tuple:
+    source = np.asarray(source, dtype=float).reshape(-1, dimension)
+    target = np.asarray(target, dtype=float).reshape(-1, dimension)
+    if len(source) != len(target):
+        raise ValueError(f'{len(source)} source and {len(target)} target control points')
+    if len(source) < minimum:
+        raise ValueError(f'at least {minimum} control points are needed, got {len(source)}')
+    return source, target
+
+
+def rotation_matrix(rx:float, ry:float, rz:float) -> np.ndarray:
+    '''R = Rz @ Ry @ Rx, rotations about the x, y, z axes'''
+    cx, sx, cy, sy, cz, sz = np.cos(rx), np.sin(rx), np.cos(ry), np.sin(ry), np.cos(rz), np.sin(rz)
+    Rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    Ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    Rz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    return Rz @ Ry @ Rx
+
+
+@dataclass(frozen=True)
+class Helmert2D:
+    '''
+    x' = scale * R(rotation) @ x + (tx, ty)
+    '''
+    tx: float = 0.0
+    ty: float = 0.0
+    scale: float = 1.0
+    rotation: float = 0.0
+
+    @property
+    def matrix(self) -> np.ndarray:
+        c, s = self.scale * np.cos(self.rotation), self.scale * np.sin(self.rotation)
+        return np.array([[c, -s], [s, c]])
+
+    def apply(self, points) -> np.ndarray:
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        return points @ self.matrix.T + (self.tx, self.ty)
+
+    def inverse(self) -> 'Helmert2D':
+        scale, rotation = 1 / self.scale, -self.rotation
+        inverse = Helmert2D(0.0, 0.0, scale, rotation)
+        tx, ty = -inverse.matrix @ (self.tx, self.ty)
+        return Helmert2D(float(tx), float(ty), scale, rotation)
+
+    @classmethod
+    def from_grid(cls, local_origin, project_origin, rotation:float = 0.0, scale:float = 1.0) -> 'Helmert2D':
+        '''local grid -> project coordinates, the local origin maps to the project origin'''
+        transform = cls(0.0, 0.0, scale, rotation)
+        tx, ty = np.asarray(project_origin, dtype=float) - transform.matrix @ np.asarray(local_origin, dtype=float)
+        return cls(float(tx), float(ty), scale, rotation)
+
+    @classmethod
+    def fit(cls, source, target, weights=None) -> 'Helmert2D':
+        '''weighted least squares transformation of the source control points to the target ones'''
+        source, target = _control(source, target, 2, 2)
+        w = _weights(weights, len(source))
+        source_mean = w @ source / w.sum()
+        target_mean = w @ target / w.sum()
+        xs, ys = (source - source_mean).T
+        xt, yt = (target - target_mean).T
+        norm = w @ (xs * xs + ys * ys)
+        a = w @ (xs * xt + ys * yt) / norm
+        b = w @ (xs * yt - ys * xt) / norm
+        tx, ty = target_mean - np.array([[a, -b], [b, a]]) @ source_mean
+        return cls(float(tx), float(ty), float(np.hypot(a, b)), float(np.arctan2(b, a)))
+
+
+@dataclass(frozen=True)
+class Helmert3D:
+    '''
+    x' = scale * rotation @ x + translation
+    '''
+    translation: np.ndarray
+    scale: float
+    rotation: np.ndarray # (3, 3) rotation matrix
+
+    def apply(self, points) -> np.ndarray:
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        return points @ (self.scale * self.rotation).T + self.translation
+
+    def inverse(self) -> 'Helmert3D':
+        rotation = self.rotation.T
+        return Helmert3D(-rotation @ self.translation / self.scale, 1 / self.scale, rotation)
+
+    @property
+    def angles(self) -> tuple:
+        '''(rx, ry, rz) of rotation_matrix'''
+        R = self.rotation
+        return float(np.arctan2(R[2, 1], R[2, 2])), float(np.arcsin(-R[2, 0])), float(np.arctan2(R[1, 0], R[0, 0]))
+
+    @classmethod
+    def from_parameters(cls, tx:float, ty:float, tz:float, scale_ppm:float = 0.0,
+                        rx:float = 0.0, ry:float = 0.0, rz:float = 0.0) -> 'Helmert3D':
+        '''seven parameter transformation, scale as parts per million'''
+        return cls(np.array([tx, ty, tz], dtype=float), 1 + scale_ppm * 1e-6, rotation_matrix(rx, ry, rz))
+
+    @classmethod
+    def fit(cls, source, target, weights=None) -> 'Helmert3D':
+        '''weighted least squares transformation of the source control points to the target ones (SVD)'''
+        source, target = _control(source, target, 3, 3)
+        w = _weights(weights, len(source))
+        source_mean = w @ source / w.sum()
+        target_mean = w @ target / w.sum()
+        s, t = source - source_mean, target - target_mean
+        U, S, Vt = np.linalg.svd((s * w[:, None]).T @ t)
+        D = np.diag([1.0, 1.0, np.sign(np.linalg.det(Vt.T @ U.T))])
+        rotation = Vt.T @ D @ U.T
+        scale = float(np.trace(np.diag(S) @ D) / (w @ (s * s).sum(axis=1)))
+        return cls(target_mean - scale * rotation @ source_mean, scale, rotation)
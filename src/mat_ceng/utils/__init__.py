@@ -0,0 +1,7 @@
+'''
+General helpers shared by the mat_ceng modules
+'''
+
+from mat_ceng.utils.geometry_helpers import (SnapResult, PointSnapper, snap_points,
+                                          SimplifyResult, simplify_polylines, simplify_loops,
+                                          SectionProperties, polygon_properties, loop_properties)
@@ -0,0 +1,286 @@
+'''
+Vectorized geometry helpers for the Revit / ETABS workflows
+
+assumed unit is mm for length
+'''
+from dataclasses import dataclass
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+@dataclass
+class SnapResult:
+    points: np.ndarray # (n, 3) snapped coordinates, unchanged where nothing was in range
+    target_index: np.ndarray # (n,) row of the target point used, -1 if not snapped
+    distance: np.ndarray # (n,) snap distance, inf if not snapped
+
+
+class PointSnapper:
+    '''
+    KD-tree over the target points (e.g. all ETABS joints) reused for any number of snapping batches
+
+    follows get_nearest_point of the columns_to_etabs workflow:
+    - a point is moved to the nearest target within min_snap_distance
+    - targets closer than epsilon are the point itself (already on a joint) and are skipped
+    '''
+    def __init__(self, targets, min_snap_distance:float = 500.0, epsilon:float = 0.1, neighbours:int = 4):
+        self.targets = np.asarray(targets, dtype=float).reshape(-1, 3)
+        self.min_snap_distance = min_snap_distance
+        self.epsilon = epsilon
+        self.neighbours = neighbours
+        self.tree = cKDTree(self.targets)
+
+    def snap(self, points) -> SnapResult:
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        count = len(points)
+        target_index = np.full(count, -1, dtype=np.int64)
+        distance = np.full(count, np.inf)
+        if count == 0 or len(self.targets) == 0:
+            return SnapResult(points.copy(), target_index, distance)
+
+        # inclusive upper bound, the workflow snaps when distance <= min_snap_distance
+        upper_bound = np.nextafter(self.min_snap_distance, np.inf)
+        pending = np.arange(count)
+        k = min(self.neighbours, len(self.targets))
+        while len(pending):
+            d, i = self.tree.query(points[pending], k=k, distance_upper_bound=upper_bound)
+            d = d.reshape(len(pending), -1)
+            i = i.reshape(len(pending), -1)
+            d = np.where(d < self.epsilon, np.inf, d) # self exclusion
+            best = np.argmin(d, axis=1)
+            best_distance = d[np.arange(len(pending)), best]
+            found = np.isfinite(best_distance)
+            target_index[pending[found]] = i[found, best[found]]
+            distance[pending[found]] = best_distance[found]
+
+            # every neighbour was excluded but more targets may be in range: widen the search
+            excluded_only = ~found & (i[:, -1] < len(self.targets))
+            if not excluded_only.any() or k == len(self.targets):
+                break
+            pending = pending[excluded_only]
+            k = min(k * 4, len(self.targets))
+
+        snapped = points.copy()
+        hit = target_index >= 0
+        snapped[hit] = self.targets[target_index[hit]]
+        return SnapResult(snapped, target_index, distance)
+
+
+def snap_points(points, targets, min_snap_distance:float = 500.0, epsilon:float = 0.1) -> np.ndarray:
+    '''
+    batch version of get_nearest_point: returns the (n, 3) snapped coordinates of all points
+    '''
+    return PointSnapper(targets, min_snap_distance, epsilon).snap(points).points
+
+
+@dataclass
+class SimplifyResult:
+    coords: np.ndarray # (m, d) kept points of all polylines
+    offsets: np.ndarray # (n + 1,) polyline i is coords[offsets[i]:offsets[i+1]]
+    keep: np.ndarray # (N,) True for the input points that were kept
+    original_counts: np.ndarray # (n,) input points per polyline
+    max_deviation: np.ndarray # (n,) largest distance of a removed point to the simplified polyline
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i:int) -> np.ndarray:
+        return self.coords[self.offsets[i]:self.offsets[i + 1]]
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def reduction(self) -> float:
+        '''share of the input points removed'''
+        total = self.original_counts.sum()
+        return float(1.0 - len(self.coords) / total) if total else 0.0
+
+
+def _gather_ranges(starts:np.ndarray, counts:np.ndarray) -> np.ndarray:
+    '''indices of the concatenated ranges [start, start + count)'''
+    if len(counts) == 0:
+        return np.zeros(0, dtype=np.int64)
+    begin = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return np.repeat(starts - begin, counts) + np.arange(counts.sum())
+
+
+def _segment_distance(points:np.ndarray, a:np.ndarray, b:np.ndarray) -> np.ndarray:
+    '''distance of every point to the segment a-b of the same row, any dimension'''
+    ab = b - a
+    length2 = np.einsum('ij,ij->i', ab, ab)
+    t = np.einsum('ij,ij->i', points - a, ab) / np.where(length2 > 0, length2, 1.0)
+    t = np.clip(np.where(length2 > 0, t, 0.0), 0.0, 1.0)
+    diff = points - (a + t[:, None] * ab)
+    return np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
+
+def simplify_polylines(coords, offsets, tolerance:float, closed=None) -> SimplifyResult:
+    '''
+    Douglas-Peucker simplification of many polylines / rings in one batch
+
+    all the open intervals of all polylines are refined together, one numpy pass per
+    recursion level, so the python work does not grow with the number of polylines
+
+    coords: (N, d) points of all polylines, d = 2 or 3
+    offsets: (n + 1,) polyline i is coords[offsets[i]:offsets[i+1]]
+    tolerance: largest allowed distance of a removed point to the simplified polyline
+    closed: (n,) bool, rings keep at least 3 distinct points;
+            by default a polyline is a ring when its last point repeats the first
+    '''
+    coords = np.asarray(coords, dtype=float)
+    coords = coords.reshape(len(coords), -1)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    n = len(offsets) - 1
+    starts, ends = offsets[:-1], offsets[1:] - 1
+    counts = ends - starts + 1
+    if closed is None:
+        closed = np.zeros(n, dtype=bool)
+        valid = counts >= 4
+        closed[valid] = np.all(np.abs(coords[starts[valid]] - coords[ends[valid]]) <= 1e-9, axis=1)
+    closed = np.broadcast_to(np.asarray(closed, dtype=bool), (n,))
+
+    keep = np.zeros(len(coords), dtype=bool)
+    valid = counts > 0
+    keep[starts[valid]] = True
+    keep[ends[valid]] = True
+    max_deviation = np.zeros(n)
+
+    # open intervals (s, e) with the owning polyline and the recursion level
+    active = counts >= 3
+    s, e, owner = starts[active], ends[active], np.flatnonzero(active)
+    level = np.zeros(len(s), dtype=np.int64)
+    while len(s):
+        inner = e - s - 1
+        points = _gather_ranges(s + 1, inner)
+        interval = np.repeat(np.arange(len(s)), inner)
+        d = _segment_distance(coords[points], coords[s[interval]], coords[e[interval]])
+        first = np.concatenate([[0], np.cumsum(inner)[:-1]])
+        largest = np.maximum.reduceat(d, first)
+        # first point reaching the largest distance in every interval
+        hits = np.flatnonzero(d == largest[interval])
+        _, first_hit = np.unique(interval[hits], return_index=True)
+        split_at = points[hits[first_hit]]
+
+        # rings: the first two levels always split, so a ring keeps 3 distinct points
+        split = (largest > tolerance) | (closed[owner] & (level < 2))
+        keep[split_at[split]] = True
+        np.maximum.at(max_deviation, owner[~split], largest[~split])
+
+        m = split_at[split]
+        s, e = np.concatenate([s[split], m]), np.concatenate([m, e[split]])
+        owner = np.concatenate([owner[split], owner[split]])
+        level = np.concatenate([level[split], level[split]]) + 1
+        active = e - s > 1
+        s, e, owner, level = s[active], e[active], owner[active], level[active]
+
+    kept_per_polyline = np.add.reduceat(keep.astype(np.int64), starts[valid]) if valid.any() else np.zeros(0, np.int64)
+    new_counts = np.zeros(n, dtype=np.int64)
+    new_counts[valid] = kept_per_polyline
+    return SimplifyResult(coords[keep], np.concatenate([[0], np.cumsum(new_counts)]), keep, counts, max_deviation)
+
+
+def simplify_loops(loops, tolerance:float, closed=None) -> SimplifyResult:
+    '''
+    simplify_polylines for a list of (k_i, d) point arrays, e.g. area load or slab outlines
+    '''
+    loops = [np.asarray(x, dtype=float) for x in loops]
+    if not loops:
+        return simplify_polylines(np.zeros((0, 2)), np.zeros(1, dtype=np.int64), tolerance)
+    offsets = np.concatenate([[0], np.cumsum([len(x) for x in loops])])
+    dims = max(x.shape[1] if x.ndim == 2 else 1 for x in loops)
+    coords = np.concatenate([x.reshape(-1, dims) for x in loops])
+    return simplify_polylines(coords, offsets, tolerance, closed)
+
+
+@dataclass
+class SectionProperties:
+    area: np.ndarray # (n,)
+    centroid: np.ndarray # (n, 2)
+    Ixx: np.ndarray # (n,) about the centroidal x axis
+    Iyy: np.ndarray # (n,) about the centroidal y axis
+    Ixy: np.ndarray # (n,) centroidal product of inertia
+    I1: np.ndarray # (n,) major principal moment of inertia
+    I2: np.ndarray # (n,) minor principal moment of inertia
+    angle: np.ndarray # (n,) angle of the major principal axis from the x axis, radians (-pi/2, pi/2]
+    depth_1: np.ndarray # (n,) extent of the section perpendicular to the major axis (depth for bending about it)
+    depth_2: np.ndarray # (n,) extent of the section perpendicular to the minor axis
+
+    def __len__(self):
+        return len(self.area)
+
+
+def polygon_properties(coords, offsets) -> SectionProperties:
+    '''
+    area, centroid and centroidal / principal moments of inertia of many polygons at once
+    (shoelace formula on the edges of all polygons, summed per polygon with bincount)
+
+    coords: (N, 2) vertices of all polygons, either orientation, the closing point may be repeated
+    offsets: (n + 1,) polygon i is coords[offsets[i]:offsets[i+1]]
+    '''
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    n = len(offsets) - 1
+    counts = np.diff(offsets)
+    owner = np.repeat(np.arange(n), counts)
+    # next vertex of the same polygon, the last one wraps to the first
+    following = np.arange(len(coords)) + 1
+    following[offsets[1:][counts > 0] - 1] = offsets[:-1][counts > 0]
+    # relative to the first vertex of every polygon, model coordinates are large
+    origin = np.zeros((n, 2))
+    origin[counts > 0] = coords[offsets[:-1][counts > 0]]
+    local = coords - origin[owner]
+    x0, y0 = local.T
+    x1, y1 = local[following].T
+    cross = x0 * y1 - x1 * y0
+
+    def total(values):
+        return np.bincount(owner, weights=values, minlength=n)
+
+    signed_area = total(cross) / 2
+    sign = np.where(signed_area < 0, -1.0, 1.0)
+    area = np.abs(signed_area)
+    safe = np.where(area > 0, signed_area, 1.0)
+    cx = total((x0 + x1) * cross) / (6 * safe)
+    cy = total((y0 + y1) * cross) / (6 * safe)
+    Ix = sign * total((y0 * y0 + y0 * y1 + y1 * y1) * cross) / 12
+    Iy = sign * total((x0 * x0 + x0 * x1 + x1 * x1) * cross) / 12
+    Pxy = sign * total((x0 * y1 + 2 * x0 * y0 + 2 * x1 * y1 + x1 * y0) * cross) / 24
+    Ixx = Ix - area * cy * cy
+    Iyy = Iy - area * cx * cx
+    Ixy = Pxy - area * cx * cy
+
+    average = (Ixx + Iyy) / 2
+    radius = np.hypot((Ixx - Iyy) / 2, Ixy)
+    angle = np.arctan2(-Ixy, (Ixx - Iyy) / 2) / 2
+    # extents across the principal axes
+    u = np.column_stack([np.cos(angle), np.sin(angle)])
+    along = np.einsum('ij,ij->i', local, u[owner])
+    across = np.einsum('ij,ij->i', local, np.column_stack([-u[:, 1], u[:, 0]])[owner])
+
+    def extent(values):
+        high, low = np.full(n, -np.inf), np.full(n, np.inf)
+        np.maximum.at(high, owner, values)
+        np.minimum.at(low, owner, values)
+        return np.where(counts > 0, high - low, 0.0)
+
+    return SectionProperties(area, np.column_stack([cx, cy]) + origin, Ixx, Iyy, Ixy,
+                             average + radius, average - radius, angle, extent(across), extent(along))
+
+
+def _loop_points(loop) -> np.ndarray:
+    if isinstance(loop, dict): # exporter form {'x': [...], 'y': [...]}
+        return np.column_stack([np.asarray(loop['x'], dtype=float), np.asarray(loop['y'], dtype=float)])
+    return np.asarray(loop, dtype=float).reshape(-1, 2)
+
+
+def loop_properties(loops) -> SectionProperties:
+    '''
+    polygon_properties for a list of (k_i, 2) point arrays or {'x': [...], 'y': [...]} dicts,
+    e.g. the cross_section_coord outlines of the Revit export
+    '''
+    loops = [_loop_points(x) for x in loops]
+    offsets = np.concatenate([[0], np.cumsum([len(x) for x in loops])]).astype(np.int64)
+    coords = np.concatenate(loops) if loops else np.zeros((0, 2))
+    return polygon_properties(coords, offsets)
@@ -0,0 +1,388 @@
+import pytest
+
+
+class _Recorder:
+    '''
+    records every API call as (interface, method, args) on the owning model
+    '''
+    def __init__(self, model, interface):
+        self._model = model
+        self._interface = interface
+
+    def _record(self, method, *args, **kwargs):
+        self._model.calls.append((self._interface, method, args))
+
+
+class _PointObj(_Recorder):
+    def GetAllPoints(self, **kwargs):
+        self._record('GetAllPoints')
+        names = list(self._model.points)
+        xyz = [self._model.points[x] for x in names]
+        return (0, len(names), names,
+                [p[0] for p in xyz], [p[1] for p in xyz], [p[2] for p in xyz])
+
+
+    def AddCartesian(self, x, y, z, Name='', UserName='', CSys='Global', *args):
+        self._record('AddCartesian', x, y, z)
+        return (0, self._model.point_at((x, y, z)))
+
+
+class _EditFrame(_Recorder):
+    def ChangeConnectivity(self, name, point_i, point_j):
+        self._record('ChangeConnectivity', name, point_i, point_j)
+        if name not in self._model.frames or point_i not in self._model.points or point_j not in self._model.points:
+            return 1
+        self._model.frames[name].update(i=point_i, j=point_j)
+        return 0
+
+
+class _EditArea(_Recorder):
+    def ChangeConnectivity(self, name, count, points):
+        self._record('ChangeConnectivity', name, tuple(points))
+        if name not in self._model.areas or any(x not in self._model.points for x in points):
+            return (1, points)
+        self._model.areas[name]['points'] = list(points)
+        return (0, points)
+
+
+class _EditPoint(_Recorder):
+    def ChangeCoordinates_1(self, name, x, y, z, no_refresh=False):
+        self._record('ChangeCoordinates_1', name, x, y, z)
+        if name not in self._model.points:
+            return 1
+        self._model.points[name] = (x, y, z)
+        return 0
+
+
+class _FrameObj(_Recorder):
+    def GetAllFrames(self, **kwargs):
+        self._record('GetAllFrames')
+        names = list(self._model.frames)
+        f = [self._model.frames[x] for x in names]
+        pnt = self._model.points
+        return (0, len(names), names,
+                [x['prop'] for x in f],
+                [x.get('story', '') for x in f],
+                [x['i'] for x in f],
+                [x['j'] for x in f],
+                [pnt[x['i']][0] for x in f], [pnt[x['i']][1] for x in f], [pnt[x['i']][2] for x in f],
+                [pnt[x['j']][0] for x in f], [pnt[x['j']][1] for x in f], [pnt[x['j']][2] for x in f],
+                [x.get('angle', 0.0) for x in f],
+                *[[0.0] * len(names) for _ in range(6)],
+                [10] * len(names))
+
+    def AddByCoord(self, XI, YI, ZI, XJ, YJ, ZJ, Name='', PropName='Default', UserName='', CSys='Global'):
+        self._record('AddByCoord', UserName, PropName)
+        name = UserName or str(len(self._model.frames) + 1)
+        self._model.frames[name] = {
+            'prop': PropName,
+            'i': self._model.point_at((XI, YI, ZI)),
+            'j': self._model.point_at((XJ, YJ, ZJ)),
+        }
+        return (0, name)
+
+    def Delete(self, name, *args):
+        self._record('Delete', name)
+        return 0 if self._model.frames.pop(name, None) else 1
+
+    def SetSection(self, name, prop_name, *args):
+        self._record('SetSection', name, prop_name)
+        if name not in self._model.frames:
+            return 1
+        self._model.frames[name]['prop'] = prop_name
+        return 0
+
+    def SetGroupAssign(self, name, group_name, *args):
+        self._record('SetGroupAssign', name, group_name)
+        if name not in self._model.frames or group_name not in self._model.groups:
+            return 1
+        self._model.groups[group_name].append(name)
+        return 0
+
+    def SetLocalAxes(self, name, angle, *args):
+        self._record('SetLocalAxes', name, angle)
+        if name not in self._model.frames:
+            return 1
+        self._model.frames[name]['angle'] = angle
+        return 0
+
+
+class _PropFrame(_Recorder):
+    def GetNameList(self, NumberNames=0, MyName=None):
+        self._record('GetNameList')
+        return (0, len(self._model.frame_properties), list(self._model.frame_properties))
+
+    def SetRectangle(self, name, material, t3, t2, *args):
+        self._record('SetRectangle', name, material, t3, t2)
+        self._model.frame_properties[name] = {'shape': 'rectangle', 'material': material, 't3': t3, 't2': t2}
+        return 0
+
+    def SetCircle(self, name, material, t3, *args):
+        self._record('SetCircle', name, material, t3)
+        self._model.frame_properties[name] = {'shape': 'circle', 'material': material, 't3': t3}
+        return 0
+
+    def SetRebarColumn(self, **kwargs):
+        self._record('SetRebarColumn', kwargs['Name'])
+        self._model.frame_properties[kwargs['Name']]['rebar'] = kwargs
+        return (0,)
+
+    def SetRebarBeam(self, **kwargs):
+        self._record('SetRebarBeam', kwargs['Name'])
+        return 0
+
+    def SetModifiers(self, name, values):
+        self._record('SetModifiers', name, tuple(values))
+        self._model.frame_properties[name]['modifiers'] = list(values)
+        return (0, values)
+
+
+class _PropArea(_Recorder):
+    def GetNameList(self, NumberNames=0, MyName=None):
+        self._record('GetNameList')
+        return (0, len(self._model.area_properties), list(self._model.area_properties))
+
+    def SetWall(self, Name, WallPropType, ShellType, MatProp, Thickness, color=-1, notes='', GUID=''):
+        self._record('SetWall', Name)
+        self._model.area_properties[Name] = {'shape': 'wall', 'material': MatProp, 'thickness': Thickness}
+        return 0
+
+    def SetSlab(self, Name, SlabType, ShellType, MatProp, Thickness, color=-1, notes='', GUID=''):
+        self._record('SetSlab', Name)
+        self._model.area_properties[Name] = {'shape': 'slab', 'material': MatProp, 'thickness': Thickness}
+        return 0
+
+    def SetModifiers(self, name, values):
+        self._record('SetModifiers', name, tuple(values))
+        self._model.area_properties[name]['modifiers'] = list(values)
+        return (0, values)
+
+
+class _GroupDef(_Recorder):
+    def GetNameList(self, NumberNames=0, MyName=None):
+        self._record('GetNameList')
+        return (0, len(self._model.groups), list(self._model.groups))
+
+    def SetGroup_1(self, Name, *args, **kwargs):
+        self._record('SetGroup_1', Name)
+        self._model.groups.setdefault(Name, [])
+        return 0
+
+    def GetAssignments(self, Name, NumberItems=0, ObjectType=None, ObjectName=None):
+        self._record('GetAssignments', Name)
+        if Name not in self._model.groups:
+            return (1, 0, [], [])
+        names = self._model.group_members(Name)
+        types = [self._model.object_type(x) for x in names]
+        return (0, len(names), types, names)
+
+    def Clear(self, Name):
+        self._record('Clear', Name)
+        if Name not in self._model.groups:
+            return 1
+        self._model.groups[Name] = []
+        return 0
+
+    def Delete(self, Name):
+        self._record('Delete', Name)
+        return 0 if self._model.groups.pop(Name, None) is not None else 1
+
+
+class _SelectObj(_Recorder):
+    def GetSelected(self, NumberItems=0, ObjectType=None, ObjectName=None):
+        self._record('GetSelected')
+        names = list(self._model.selected)
+        return (0, len(names), [self._model.object_type(x) for x in names], names)
+
+
+class _AreaObj(_Recorder):
+    def GetAllAreas(self, **kwargs):
+        self._record('GetAllAreas')
+        names = list(self._model.areas)
+        delimiter, point_names = [], []
+        for name in names:
+            point_names.extend(self._model.areas[name]['points'])
+            delimiter.append(len(point_names) - 1)
+        pnt = self._model.points
+        return (0, len(names), names, [1] * len(names), len(point_names), delimiter, point_names,
+                [pnt[x][0] for x in point_names],
+                [pnt[x][1] for x in point_names],
+                [pnt[x][2] for x in point_names])
+
+    def AddByCoord(self, NumberPoints, X, Y, Z, Name='', PropName='Default', UserName='', CSys='Global'):
+        self._record('AddByCoord', UserName, PropName)
+        name = UserName or str(len(self._model.areas) + 1)
+        self._model.areas[name] = {
+            'prop': PropName,
+            'points': [self._model.point_at(xyz) for xyz in zip(X, Y, Z)],
+        }
+        return (0, X, Y, Z, name)
+
+    def Delete(self, name, *args):
+        self._record('Delete', name)
+        return 0 if self._model.areas.pop(name, None) else 1
+
+    def SetGroupAssign(self, name, group_name, *args):
+        self._record('SetGroupAssign', name, group_name)
+        if name not in self._model.areas or group_name not in self._model.groups:
+            return 1
+        self._model.groups[group_name].append(name)
+        return 0
+
+    def SetProperty(self, name, prop_name, *args):
+        self._record('SetProperty', name, prop_name)
+        if name not in self._model.areas:
+            return 1
+        self._model.areas[name]['prop'] = prop_name
+        return 0
+
+
+class _DatabaseTables(_Recorder):
+    def GetTableForDisplayArray(self, TableKey, FieldKeyList, GroupName, TableVersion,
+                                FieldsKeysIncluded, NumberRecords, TableData):
+        self._record('GetTableForDisplayArray', TableKey)
+        table = self._model.tables[TableKey]
+        fields = list(table)
+        records = list(zip(*table.values()))
+        data = [str(value) for record in records for value in record]
+        return (0, FieldKeyList, 1, fields, len(records), data)
+
+
+class _ResultsSetup(_Recorder):
+    def DeselectAllCasesAndCombosForOutput(self):
+        self._record('DeselectAllCasesAndCombosForOutput')
+        self._model.selected_for_output = []
+        return 0
+
+    def SetComboSelectedForOutput(self, name, selected=True):
+        self._record('SetComboSelectedForOutput', name)
+        if name not in self._model.results:
+            return 1
+        self._model.selected_for_output.append(name)
+        return 0
+
+    SetCaseSelectedForOutput = SetComboSelectedForOutput
+
+
+class _Results(_Recorder):
+    def __init__(self, model, interface):
+        super().__init__(model, interface)
+        self.Setup = _ResultsSetup(model, 'Results.Setup')
+
+    def FrameForce(self, Name, ItemTypeElm, NumberResults, Obj, ObjSta, Elm, ElmSta,
+                   LoadCase, StepType, StepNum, P, V2, V3, T, M2, M3):
+        self._record('FrameForce', Name, ItemTypeElm)
+        members = set(self._model.selected if ItemTypeElm == 3 else self._model.group_members(Name))
+        rows = [(combo, *row) for combo in self._model.selected_for_output
+                for row in self._model.results[combo] if row[0] in members]
+        columns = list(zip(*rows)) or [[] for _ in range(9)]
+        combo, obj, sta, p, v2, v3, t, m2, m3 = columns
+        return (0, len(rows), list(obj), list(sta), list(obj), list(sta), list(combo),
+                [''] * len(rows), [0.0] * len(rows),
+                list(p), list(v2), list(v3), list(t), list(m2), list(m3))
+
+
+class _View(_Recorder):
+    def RefreshView(self, window=0, zoom=False):
+        self._record('RefreshView')
+        return 0
+
+
+class _Story(_Recorder):
+    def GetStories_2(self, **kwargs):
+        self._record('GetStories_2')
+        base, names, heights = self._model.stories
+        elevations = [base + sum(heights[:i + 1]) for i in range(len(heights))]
+        n = len(names)
+        return (0, base, n, list(names), elevations, list(heights),
+                [False] * n, [''] * n, [False] * n, [0.0] * n, [0] * n)
+
+    def SetStories_2(self, base, count, names, heights, *args):
+        self._record('SetStories_2', base, tuple(names), tuple(heights))
+        self._model.stories = (base, list(names), list(heights))
+        return (0, list(names), list(heights), *args)
+
+
+class FakeSapModel:
+    '''
+    minimal in-memory stand-in for the ETABS SapModel used by the csi_interop tests
+    '''
+    def __init__(self):
+        self.calls = []
+        self.points = {
+            '1': (0.0, 0.0, 0.0),
+            '2': (0.0, 0.0, 3000.0),
+            '3': (6000.0, 0.0, 3000.0),
+            '4': (6000.0, 6000.0, 3000.0),
+            '5': (0.0, 6000.0, 3000.0),
+        }
+        self.frames = {
+            'C1': {'prop': 'C 500x800-FC50', 'i': '1', 'j': '2', 'story': 'Story1'},
+            'B1': {'prop': 'B 400X800-FC40', 'i': '2', 'j': '3', 'story': 'Story1'},
+        }
+        self.areas = {
+            'F1': {'prop': 'S 250-FC40', 'points': ['2', '3', '4', '5']},
+        }
+        self.stories = (0.0, ['Story1'], [3000.0]) # base elevation, names, heights
+        self.groups = {'All': []}
+        self.frame_properties = {'C 500x800-FC50': {}, 'B 400X800-FC40': {}}
+        self.area_properties = {'S 250-FC40': {}}
+        self.PointObj = _PointObj(self, 'PointObj')
+        self.EditPoint = _EditPoint(self, 'EditPoint')
+        self.EditFrame = _EditFrame(self, 'EditFrame')
+        self.EditArea = _EditArea(self, 'EditArea')
+        self.FrameObj = _FrameObj(self, 'FrameObj')
+        self.AreaObj = _AreaObj(self, 'AreaObj')
+        self.DatabaseTables = _DatabaseTables(self, 'DatabaseTables')
+        self.Results = _Results(self, 'Results')
+        self.View = _View(self, 'View')
+        self.Story = _Story(self, 'Story')
+        self.GroupDef = _GroupDef(self, 'GroupDef')
+        self.SelectObj = _SelectObj(self, 'SelectObj')
+        self.selected = []
+        self.PropFrame = _PropFrame(self, 'PropFrame')
+        self.PropArea = _PropArea(self, 'PropArea')
+        self.selected_for_output = []
+        # combo -> rows of (frame, station m, P, V2, V3, T, M2, M3) in kN, kN*m
+        self.results = {
+            'ULS': [('C1', 0.0, -1500.0, 10.0, 5.0, 0.0, 40.0, -80.0),
+                    ('C1', 3.0, -1480.0, 10.0, 5.0, 0.0, -20.0, 60.0),
+                    ('B1', 0.0, 0.0, 150.0, 0.0, 1.0, 0.0, -210.0)],
+            'SLS': [('C1', 0.0, -1000.0, 7.0, 3.0, 0.0, 25.0, -50.0),
+                    ('C1', 3.0, -990.0, 7.0, 3.0, 0.0, -12.0, 40.0),
+                    ('B1', 0.0, 0.0, 100.0, 0.0, 0.5, 0.0, -140.0)],
+        }
+
+    @property
+    def tables(self):
+        names = list(self.areas)
+        return {
+            'Area Assignments - Section Properties': {
+                'UniqueName': names,
+                'Section Property': [self.areas[x]['prop'] for x in names],
+            },
+        }
+
+    def point_at(self, xyz):
+        for name, pnt in self.points.items():
+            if max(abs(a - b) for a, b in zip(pnt, xyz)) < 1e-6:
+                return name
+        name = str(len(self.points) + 1)
+        self.points[name] = tuple(xyz)
+        return name
+
+    def object_type(self, name):
+        return 2 if name in self.frames else 5 if name in self.areas else 1
+
+    def group_members(self, name):
+        if name == 'All':
+            return list(self.points) + list(self.frames) + list(self.areas)
+        return list(self.groups.get(name, []))
+
+    def count_calls(self, method):
+        return sum(1 for call in self.calls if call[1] == method)
+
+
+@pytest.fixture
+def fake_sap_model():
+    return FakeSapModel()
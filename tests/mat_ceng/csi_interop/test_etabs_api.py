@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from mat_ceng.csi_interop.etabs_api import ModelSnapshot, get_etabs_stories, set_etabs_stories
+
+
+def test_snapshot_loads_model_in_bulk(fake_sap_model):
+    snapshot = ModelSnapshot.load(fake_sap_model)
+    assert len(fake_sap_model.calls) == 3
+    assert snapshot.points.xyz.shape == (5, 3)
+    np.testing.assert_allclose(snapshot.point_coordinates(['3']), [[6000.0, 0.0, 3000.0]])
+    assert list(snapshot.frame_sections(['B1', 'C1'])) == ['B 400X800-FC40', 'C 500x800-FC50']
+    np.testing.assert_allclose(snapshot.areas.boundary('F1')[:, 2], 3000.0)
+    assert not snapshot.is_dirty
+
+
+def test_snapshot_pushes_only_dirty_rows(fake_sap_model):
+    snapshot = ModelSnapshot.load(fake_sap_model)
+    fake_sap_model.calls.clear()
+
+    snapshot.set_frame_section('B1', 'B 400X800-FC40') # unchanged, not dirty
+    snapshot.set_frame_section('C1', 'C 600x800-FC50')
+    snapshot.move_point('3', (6100.0, 0.0, 3000.0))
+    assert snapshot.dirty_count() == 2
+    np.testing.assert_allclose(snapshot.frames.xyz_j[snapshot.frames.index['B1']], [6100.0, 0.0, 3000.0])
+
+    failed = snapshot.push(refresh_view=False)
+    assert failed == []
+    assert [call[1] for call in fake_sap_model.calls] == ['ChangeCoordinates_1', 'SetSection']
+    assert fake_sap_model.frames['C1']['prop'] == 'C 600x800-FC50'
+    assert fake_sap_model.points['3'] == (6100.0, 0.0, 3000.0)
+    assert not snapshot.is_dirty
+
+
+def test_set_stories_only_when_changed(fake_sap_model):
+    assert get_etabs_stories(fake_sap_model) == (0.0, ['Story1'], pytest.approx([3000.0]))
+    assert not set_etabs_stories(0.0, ['Story1'], [3000.0], SapModel=fake_sap_model)
+    assert set_etabs_stories(-100.0, ['L1', 'L2'], [3100.0, 3000.0], SapModel=fake_sap_model)
+    assert fake_sap_model.stories == (-100.0, ['L1', 'L2'], [3100.0, 3000.0])
+    assert get_etabs_stories(fake_sap_model)[2].tolist() == [3000.0, 6000.0]
+    assert fake_sap_model.count_calls('SetStories_2') == 1
@@ -0,0 +1,52 @@
+import numpy as np
+
+from mat_ceng.csi_interop.etabs_results import (
+    get_frame_forces,
+    iter_frame_forces,
+    column_load_cases)
+
+
+def test_frame_forces_are_read_in_bulk_and_normalised(fake_sap_model):
+    forces = get_frame_forces(['ULS', 'SLS'], SapModel=fake_sap_model)
+    assert fake_sap_model.count_calls('FrameForce') == 1
+    assert len(forces) == 6
+    first = np.flatnonzero((forces.frame == 'C1') & (forces.combo == 'ULS'))[0]
+    assert forces.P[first] == 1500e3 # kN -> N, compression positive
+    assert forces.M3[first] == -80e6 # kN*m -> N*mm
+    assert forces.station[first + 1] == 3000.0 # m -> mm
+
+
+def test_chunked_pull_gives_the_same_table(fake_sap_model):
+    chunks = list(iter_frame_forces(['ULS', 'SLS'], combos_per_call=1, SapModel=fake_sap_model))
+    assert len(chunks) == 2
+    assert fake_sap_model.count_calls('FrameForce') == 2
+    assert sorted(np.concatenate([x.P for x in chunks])) == \
+        sorted(get_frame_forces(['ULS', 'SLS'], SapModel=fake_sap_model).P)
+
+
+def test_frame_batches_are_read_through_temporary_groups(fake_sap_model):
+    whole = get_frame_forces(['ULS', 'SLS'], SapModel=fake_sap_model)
+    calls = len(fake_sap_model.calls)
+    chunks = list(iter_frame_forces(['ULS', 'SLS'], combos_per_call=1, frames_per_call=1, SapModel=fake_sap_model))
+    # 2 combos x 2 frames, every call returns a single frame
+    assert len(chunks) == 4 and all(len(set(x.frame)) == 1 for x in chunks)
+    assert fake_sap_model.count_calls('FrameForce') == 1 + 4
+    assert {call[2][0] for call in fake_sap_model.calls[calls:] if call[1] == 'FrameForce'} == \
+        {'~mat_ceng_frame_forces_0', '~mat_ceng_frame_forces_1'}
+    assert sorted(np.concatenate([x.P for x in chunks])) == sorted(whole.P)
+    # the temporary groups are removed
+    assert list(fake_sap_model.groups) == ['All']
+
+    fake_sap_model.selected = ['C1', 'F1']
+    selected = get_frame_forces(['ULS'], use_selection=True, frames_per_call=1, SapModel=fake_sap_model)
+    assert set(selected.frame) == {'C1'} and fake_sap_model.count_calls('SetGroup_1') == 2
+
+
+def test_column_load_cases_envelope_stations(fake_sap_model):
+    forces = get_frame_forces(['ULS', 'SLS'], SapModel=fake_sap_model)
+    load_cases = column_load_cases(forces, sustained_combo='SLS')
+    uls = load_cases[('C1', 'ULS')]
+    assert uls.Pu == 1500e3
+    assert uls.Pu_sustained == 1000e3
+    assert uls.Mu_22 == 40e6
+    assert uls.Mu_33 == 80e6
@@ -0,0 +1,42 @@
+from mat_ceng.csi_interop.etabs_sections import create_etabs_sections
+from mat_ceng.revit_interop.sections import SectionCatalogue, section_definition
+
+
+def make_catalogue():
+    catalogue = SectionCatalogue()
+    for column_id in range(100):
+        catalogue.add(section_definition('column', (column_id, {
+            'name': 'STR_SCL_500x800', 'b': 800.0, 'h': 500.0, 'rebar': '12T20', 'material_grade': 'FC50'})))
+    catalogue.add(section_definition('column', (1, {
+        'name': 'STR_SCL_D600', 'b': 600.0, 'h': None, 'rebar': '10T25', 'material_grade': 'FC50'})))
+    catalogue.add(section_definition('beam', (2, {
+        'name': 'STR_SFA_400x800', 'b': 400.0, 'h': 800.0, 'material_grade': 'FC40'})))
+    catalogue.add(section_definition('wall', (3, {
+        'name': 'HES_STR_WLL_300_ConcreteWall', 'thk': 300.0, 'material_grade': 'FC40'})))
+    catalogue.add(section_definition('floor', (4, {
+        'name': 'HES_STR_SLB_250_ConcreteSlab', 'thk': 250.0, 'material_grade': 'FC40'})))
+    return catalogue
+
+
+def test_each_unique_section_is_defined_once(fake_sap_model):
+    report = create_etabs_sections(make_catalogue(), SapModel=fake_sap_model)
+    assert report.created == ['C 500x800-12T20-FC50', 'C 600-10T25-FC50', 'W 300-FC40']
+    # already in the model
+    assert report.skipped == ['B 400X800-FC40', 'S 250-FC40']
+    assert fake_sap_model.count_calls('SetRectangle') == 1
+    rectangle = fake_sap_model.frame_properties['C 500x800-12T20-FC50']
+    assert (rectangle['t3'], rectangle['t2']) == (500.0, 800.0)
+    assert rectangle['rebar']['NumberR3Bars'] + rectangle['rebar']['NumberR2Bars'] == 8
+    assert rectangle['modifiers'][4:6] == [0.7, 0.7]
+    assert fake_sap_model.frame_properties['C 600-10T25-FC50']['rebar']['NumberCBars'] == 10
+    assert fake_sap_model.area_properties['W 300-FC40']['thickness'] == 300.0
+    assert report.api_calls == len(fake_sap_model.calls)
+
+
+def test_failed_rebar_or_modifiers_mark_the_section_partial(fake_sap_model, monkeypatch):
+    monkeypatch.setattr(fake_sap_model.PropFrame, 'SetRebarColumn', lambda **kwargs: (1,))
+    monkeypatch.setattr(fake_sap_model.PropArea, 'SetModifiers', lambda name, values: (1, values))
+    report = create_etabs_sections(make_catalogue(), SapModel=fake_sap_model)
+    assert report.created == []
+    assert report.partial == ['C 500x800-12T20-FC50', 'C 600-10T25-FC50', 'W 300-FC40']
+    assert report.failed == []
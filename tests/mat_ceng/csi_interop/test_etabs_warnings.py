@@ -0,0 +1,78 @@
+import pathlib
+
+import numpy as np
+
+from mat_ceng.csi_interop.etabs_warnings import (
+    parse_warning_file,
+    parse_warning_lines,
+    cluster_warnings,
+    add_warning_marks)
+
+sample_warning_file = pathlib.Path(__file__).parents[3] / 'notebooks' / 'modeling_from_revit' / 'sample_warning.txt'
+
+WARNINGS = '''Model check, 6 warnings found
+Point 12 and Point 13 are closer than tolerance. Check at (1.000 2.000 3.000)
+Frame B4 overlaps Frame B5. Check at (1.000 2.000 3.000)
+Frame B4 is very short. Check at (1.010 2.000 3.000)
+unrelated line without a location
+Area F1 is warped. Check at (-5.5, 0, 1.2e1)
+Point 40 is not connected. Check at (1.000 2.000 3.000)
+'''
+
+
+def test_parse_warning_file(tmp_path):
+    path = tmp_path / 'warnings.txt'
+    path.write_text(WARNINGS)
+    table = parse_warning_file(path)
+    assert table.total_warnings == 6
+    assert len(table) == 5
+    np.testing.assert_allclose(table.xyz[3], [-5500.0, 0.0, 12000.0])
+    assert table.line_numbers.tolist() == [2, 3, 4, 6, 7]
+    assert table.messages[1].startswith('Frame B4 overlaps')
+    # empty file, no header
+    assert len(parse_warning_lines([])) == 0
+    # a file starting with a located warning keeps it
+    headless = parse_warning_lines(WARNINGS.splitlines()[1:])
+    assert headless.total_warnings is None
+    assert len(headless) == 5 and headless.line_numbers[0] == 1
+
+
+def test_cluster_nearby_warnings():
+    table = parse_warning_lines(WARNINGS.splitlines())
+    clusters = cluster_warnings(table, tolerance=50.0)
+    assert len(clusters) == 2
+    assert clusters.count.tolist() == [4, 1]
+    np.testing.assert_allclose(clusters.location, [[1002.5, 2000.0, 3000.0], [-5500.0, 0.0, 12000.0]])
+    assert clusters.labels.tolist() == [0, 0, 0, 1, 0]
+    assert clusters.messages[0][-1].startswith('Point 40')
+    # zero tolerance only merges identical locations
+    assert cluster_warnings(table, tolerance=0.0).count.tolist() == [3, 1, 1]
+    df = clusters.to_dataframe(area_names=['7', '8'])
+    assert df.loc['7', 'Count'] == 4
+
+
+def test_sample_warning_file():
+    table = parse_warning_file(sample_warning_file)
+    # the last line has no location
+    assert table.total_warnings == 16
+    assert len(table) == 15
+    np.testing.assert_allclose(table.xyz[0], [35870.0, -33723.0, 16500.0])
+    clusters = cluster_warnings(table, tolerance=50.0)
+    assert len(clusters) == 7
+    assert clusters.count.sum() == 15
+    # repeated joints and the chain of close points 20 mm apart are one mark each
+    assert sorted(clusters.count.tolist()) == [1, 1, 2, 2, 2, 3, 4]
+    roof = clusters.labels[table.line_numbers == 11][0]
+    assert clusters.count[roof] == 4
+    assert all(x.startswith('ROOF FLOOR PLAN') for x in clusters.messages[roof])
+
+
+def test_add_warning_marks(fake_sap_model):
+    clusters = cluster_warnings(parse_warning_lines(WARNINGS.splitlines()), tolerance=50.0)
+    names = add_warning_marks(clusters, SapModel=fake_sap_model)
+    assert len(names) == 2 and all(names)
+    assert fake_sap_model.groups['Warnings'] == names
+    assert fake_sap_model.count_calls('AddByCoord') == 2
+    assert fake_sap_model.count_calls('SetGroup_1') == 1
+    add_warning_marks(clusters, SapModel=fake_sap_model)
+    assert fake_sap_model.count_calls('SetGroup_1') == 1
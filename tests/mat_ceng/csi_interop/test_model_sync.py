@@ -0,0 +1,143 @@
+import copy
+
+from mat_ceng.csi_interop.etabs_api import ModelSnapshot
+from mat_ceng.csi_interop.model_sync import (
+    FrameSpec,
+    column_frame_specs,
+    beam_frame_specs,
+    wall_area_specs,
+    line_load_frame_specs,
+    diff_frames,
+    spec_points,
+    floor_area_specs,
+    simplify_area_specs,
+    sync_revit_to_etabs)
+
+
+def make_columns(count):
+    return [
+        [6000000 + i, {
+            'name': 'STR_SCL_500x800', 'x': 1000.0 * i, 'y': 0.0, 'angle': 0.0,
+            'material_grade': 'FC50', 'rebar': '12T25',
+            'z_base': 0.0, 'z_top': 3000.0}]
+        for i in range(count)]
+
+
+def make_floors():
+    return [[7000000, {
+        'name': 'HES_STR_SLB_250_ConcreteSlab', 'thk': 250.0, 'material_grade': 'FC40', 'z': 3000.0,
+        'x': [[0.0, 6000.0, 6000.0, 0.0, 0.0]], 'y': [[0.0, 0.0, 6000.0, 6000.0, 0.0]]}]]
+
+
+def test_first_sync_adds_everything(fake_sap_model):
+    columns = make_columns(10)
+    report = sync_revit_to_etabs(column_frame_specs(columns), floor_area_specs(make_floors()), fake_sap_model)
+    assert report.plan.summary()['frames_added'] == 10
+    assert report.plan.summary()['areas_added'] == 1
+    assert fake_sap_model.frames['6000003']['prop'] == 'C 500x800-12T25-FC50'
+    # objects not created from Revit ids are never deleted
+    assert 'C1' in fake_sap_model.frames and 'F1' in fake_sap_model.areas
+
+
+def test_revision_only_touches_changed_elements(fake_sap_model):
+    columns = make_columns(50)
+    floors = make_floors()
+    sync_revit_to_etabs(column_frame_specs(columns), floor_area_specs(floors), fake_sap_model)
+
+    revision = copy.deepcopy(columns)
+    revision[0][1]['rebar'] = '16T25' # section change
+    revision[1][1]['x'] += 500.0 # moved
+    del revision[2] # deleted
+    fake_sap_model.calls.clear()
+
+    report = sync_revit_to_etabs(column_frame_specs(revision), floor_area_specs(floors), fake_sap_model)
+
+    assert report.plan.summary() == {
+        'frames_added': 0, 'frames_modified': 2, 'frames_deleted': 1,
+        'areas_added': 0, 'areas_modified': 0, 'areas_deleted': 0}
+    # SetSection + (2 new joints, ChangeConnectivity) for the moved column + Delete + RefreshView
+    assert report.api_calls == 6
+    assert report.failed == []
+    assert fake_sap_model.count_calls('AddByCoord') == 0
+    assert fake_sap_model.frames['6000000']['prop'] == 'C 500x800-16T25-FC50'
+    # moved in place: same object, new joints
+    moved = fake_sap_model.frames['6000001']
+    assert fake_sap_model.points[moved['i']] == (1500.0, 0.0, 0.0)
+    assert '6000002' not in fake_sap_model.frames
+
+    fake_sap_model.calls.clear()
+    report = sync_revit_to_etabs(column_frame_specs(revision), floor_area_specs(floors), fake_sap_model)
+    assert report.plan.is_empty
+    assert report.api_calls == 0
+
+
+def test_dry_run_does_not_write(fake_sap_model):
+    report = sync_revit_to_etabs(column_frame_specs(make_columns(3)), [], fake_sap_model, dry_run=True)
+    assert len(report.plan.frames_added) == 3
+    assert fake_sap_model.count_calls('AddByCoord') == 0
+
+
+def test_simplify_area_specs_drops_collinear_points():
+    floors = make_floors()
+    # midpoints on every edge, one of them 2 mm off the edge
+    floors[0][1]['x'] = [[0.0, 3000.0, 6000.0, 6002.0, 6000.0, 3000.0, 0.0, 0.0, 0.0]]
+    floors[0][1]['y'] = [[0.0, 0.0, 0.0, 3000.0, 6000.0, 6000.0, 6000.0, 3000.0, 0.0]]
+    specs, result = simplify_area_specs(floor_area_specs(floors), tolerance=5.0)
+    assert specs[0].xyz.tolist() == [[0.0, 0.0, 3000.0], [6000.0, 0.0, 3000.0],
+                                     [6000.0, 6000.0, 3000.0], [0.0, 6000.0, 3000.0]]
+    assert result.max_deviation[0] == 2.0
+    specs, result = simplify_area_specs(floor_area_specs(floors), tolerance=1.0)
+    assert len(specs[0].xyz) == 5
+
+
+def test_moved_area_keeps_its_object_and_reuses_joints(fake_sap_model):
+    floors = make_floors()
+    sync_revit_to_etabs([], floor_area_specs(floors), fake_sap_model)
+    fake_sap_model.calls.clear()
+    # moved onto the joints of the existing floor F1 (z = 3000) ...
+    floors[0][1]['x'] = [[0.0, 6000.0, 6000.0, 0.0, 0.0]]
+    floors[0][1]['y'] = [[0.0, 0.0, 6000.0, 6000.0, 0.0]]
+    floors[0][1]['z'] = 3000.0 + 0.5
+    report = sync_revit_to_etabs([], floor_area_specs(floors), fake_sap_model, tolerance=1.0)
+    assert report.plan.summary()['areas_modified'] == 0 # within the tolerance
+    # ... and 10 mm away: new joints
+    floors[0][1]['z'] = 3010.0
+    report = sync_revit_to_etabs([], floor_area_specs(floors), fake_sap_model)
+    assert report.plan.summary()['areas_modified'] == 1
+    assert fake_sap_model.count_calls('Delete') == 0 and fake_sap_model.count_calls('AddByCoord') == 0
+    assert fake_sap_model.count_calls('AddCartesian') == 4
+    assert [fake_sap_model.points[x][2] for x in fake_sap_model.areas['7000000']['points']] == [3010.0] * 4
+
+
+def test_reversed_frame_is_not_modified(fake_sap_model):
+    snapshot = ModelSnapshot.load(fake_sap_model)
+    # B1 runs from joint 2 to joint 3, drawn the other way round
+    spec = FrameSpec('B1', (6000.0, 0.0, 3000.0), (0.0, 0.0, 3000.0), 'B 400X800-FC40')
+    added, modified, deleted = diff_frames([spec], snapshot, is_managed=lambda name: False)
+    assert (added, modified, deleted) == ([], [], [])
+
+
+def test_specs_follow_the_notebook_corrections():
+    walls = [
+        [1000001, {'name': 'HES_STR_WAL_200', 'thk': 200.0, 'material_grade': 'FC40',
+                   'x': [0.0, 5000.0], 'y': [0.0, 0.0], 'z_base': 0.0, 'z_top': 3000.0}],
+        # upper wall 50 mm off the wall below (< 0.4 * 200)
+        [1000002, {'name': 'HES_STR_WAL_200', 'thk': 200.0, 'material_grade': 'FC40',
+                   'x': [50.0, 5000.0], 'y': [30.0, 0.0], 'z_base': 3000.0, 'z_top': 6000.0}],
+    ]
+    beams = [[2000001, {'name': 'STR_BEM_400x800', 'material_grade': 'FC40', 'angle': 0.0, 'z': 3000.0,
+                        'x': [5090.0, 9000.0], 'y': [0.0, 0.0], 'b': 400.0, 'h': 800.0}]]
+    areas = wall_area_specs(walls)
+    upper = [x for x in areas if x.name == '1000002'][0]
+    assert upper.xyz[0].tolist() == [0.0, 0.0, 3000.0]
+    # the input is not modified
+    assert walls[1][1]['x'][0] == 50.0
+
+    frames = beam_frame_specs(beams, walls)
+    # beam end 90 mm from the wall end (< 0.501 * 200) snaps, the far end stays
+    assert frames[0].xyz_i == (5000.0, 0.0, 3000.0) and frames[0].xyz_j == (9000.0, 0.0, 3000.0)
+
+    line_loads = [[3000001, {'line_load_type': 'LL', 'x': [120.0, 4800.0], 'y': [0.0, 0.0],
+                             'z': [3000.0, 3000.0]}]]
+    loads = line_load_frame_specs(line_loads, snap_to=spec_points(frames, areas))
+    assert loads[0].xyz_i == (0.0, 0.0, 3000.0) and loads[0].xyz_j == (5000.0, 0.0, 3000.0)
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+from mat_ceng.csi_interop.model_sync import column_frame_specs, beam_frame_specs, sync_revit_to_etabs, is_revit_name
+from mat_ceng.csi_interop.reconciliation import (
+    FrameSet,
+    columns_frame_set,
+    beams_frame_set,
+    concat_frame_sets,
+    reconcile_frames,
+    reconcile_with_etabs)
+from mat_ceng.revit_interop.element_store import ElementStore
+from mat_ceng.revit_interop.loader import ElementBatch
+
+
+def make_columns(count):
+    return [
+        [6000000 + i, {
+            'name': 'STR_SCL_500x800', 'x': 1000.0 * i, 'y': 0.0, 'angle': 0.0,
+            'material_grade': 'FC50', 'rebar': '12T25' if i % 2 else '8T20',
+            'z_base': 0.0, 'z_top': 3000.0, 'base_level': 'L0', 'top_level': 'L1'}]
+        for i in range(count)]
+
+
+def make_beams():
+    return [
+        [6100000, {'name': 'STR_SFA_400x800', 'x': [0.0, 1000.0, 3000.0], 'y': [0.0, 0.0, 0.0], 'z': 3000.0,
+                   'angle': 0.0, 'b': 400.0, 'h': 800.0, 'material_grade': 'FC40', 'level': 'L1'}],
+        [6100001, {'name': 'STR_SFA_300x600', 'x': [0.0, 0.0], 'y': [0.0, 5000.0], 'z': 3000.0,
+                   'angle': 0.0, 'b': 300.0, 'h': 600.0, 'material_grade': 'FC40', 'level': 'L1'}],
+    ]
+
+
+def make_stores(columns, beams):
+    return {
+        'column': ElementStore.from_batches([ElementBatch('column', *zip(*columns))]),
+        'beam': ElementStore.from_batches([ElementBatch('beam', *zip(*beams))]),
+    }
+
+
+def test_frame_sets_match_sync_specs():
+    columns, beams = make_columns(5), make_beams()
+    stores = make_stores(columns, beams)
+    revit = concat_frame_sets([columns_frame_set(stores['column']), beams_frame_set(stores['beam'])])
+    specs = column_frame_specs(columns) + beam_frame_specs(beams)
+    assert revit.names.tolist() == [x.name for x in specs]
+    assert revit.prop_names.tolist() == [x.prop_name for x in specs]
+    np.testing.assert_allclose(revit.xyz_i, [x.xyz_i for x in specs])
+    np.testing.assert_allclose(revit.xyz_j, [x.xyz_j for x in specs])
+    assert revit.levels.tolist() == ['L1'] * len(specs)
+
+
+def test_beam_ends_snap_to_the_walls_like_the_sync_specs():
+    walls = [
+        [1000001, {'name': 'HES_STR_WAL_200', 'thk': 200.0, 'material_grade': 'FC40',
+                   'x': [0.0, 5000.0], 'y': [0.0, 0.0], 'z_base': 0.0, 'z_top': 3000.0}],
+        # follows the wall below, so the beam at 6000 snaps to the corrected point
+        [1000002, {'name': 'HES_STR_WAL_200', 'thk': 200.0, 'material_grade': 'FC40',
+                   'x': [50.0, 5000.0], 'y': [30.0, 0.0], 'z_base': 3000.0, 'z_top': 6000.0}],
+    ]
+    beams = [
+        [2000001, {'name': 'STR_BEM_400x800', 'material_grade': 'FC40', 'angle': 0.0, 'z': 3000.0,
+                   'x': [5090.0, 9000.0], 'y': [0.0, 0.0], 'b': 400.0, 'h': 800.0, 'level': 'L1'}],
+        [2000002, {'name': 'STR_BEM_400x800', 'material_grade': 'FC40', 'angle': 0.0, 'z': 6000.0,
+                   'x': [9000.0, 4000.0, 60.0], 'y': [0.0, 0.0, 20.0], 'b': 400.0, 'h': 800.0, 'level': 'L2'}],
+    ]
+    beam_store = ElementStore.from_batches([ElementBatch('beam', *zip(*beams))])
+    wall_store = ElementStore.from_batches([ElementBatch('wall', *zip(*walls))])
+    revit = beams_frame_set(beam_store, wall_store)
+    specs = beam_frame_specs(beams, walls)
+    assert revit.names.tolist() == [x.name for x in specs]
+    np.testing.assert_allclose(revit.xyz_i, [x.xyz_i for x in specs])
+    np.testing.assert_allclose(revit.xyz_j, [x.xyz_j for x in specs])
+    assert revit.xyz_i[0].tolist() == [5000.0, 0.0, 3000.0]
+    assert revit.xyz_j[-1].tolist() == [0.0, 0.0, 6000.0]
+    # without walls the raw polyline points are used
+    assert beams_frame_set(beam_store).xyz_i[0].tolist() == [5090.0, 0.0, 3000.0]
+
+
+def test_mismatch_categories():
+    stores = make_stores(make_columns(6), make_beams())
+    revit = concat_frame_sets([columns_frame_set(stores['column']), beams_frame_set(stores['beam'])])
+    etabs = revit.take(np.arange(1, len(revit))) # 6000000 missing
+    etabs = FrameSet(etabs.names.copy(), etabs.xyz_i.copy(), etabs.xyz_j.copy(),
+                     etabs.prop_names.copy(), etabs.levels.copy())
+    etabs.xyz_j[0, 2] += 50.0 # 6000001 moved
+    etabs.names[1] = '42' # 6000002 renamed, same geometry
+    etabs.prop_names[2] = 'C 500x800-FC50' # 6000003 wrong section
+    etabs.levels[3] = 'L2' # 6000004 wrong level
+    etabs.xyz_i[-1], etabs.xyz_j[-1] = etabs.xyz_j[-1].copy(), etabs.xyz_i[-1].copy() # reversed, still a match
+    etabs = concat_frame_sets([etabs, FrameSet(np.array(['B99'], dtype=object), np.array([[9e3, 0, 0.]]),
+                                               np.array([[9e3, 1e3, 0.]]), np.array(['X'], dtype=object),
+                                               np.array(['L1'], dtype=object))])
+
+    report = reconcile_frames(revit, etabs, tolerance=1.0)
+    assert report.summary() == {'missing': 1, 'extra': 1, 'renamed': 1, 'moved': 1,
+                                'wrong_section': 1, 'wrong_level': 1}
+    assert report.select('missing').revit_name.tolist() == ['6000000']
+    assert report.select('extra').etabs_name.tolist() == ['B99']
+    renamed = report.select('renamed')
+    assert (renamed.revit_name[0], renamed.etabs_name[0]) == ('6000002', '42')
+    assert report.select('moved').deviation.tolist() == [50.0]
+    assert list(report.select('wrong_section').rows())[0][:5] == \
+        ('wrong_section', '6000003', '6000003', 'C 500x800-12T25-FC50', 'C 500x800-FC50')
+    assert report.select('wrong_level').etabs_value.tolist() == ['L2']
+    assert report.matched == len(revit) - 1
+
+    # without the geometry join the renamed frame is missing and extra
+    report = reconcile_frames(revit, etabs, tolerance=1.0, match_geometry=False, is_managed=is_revit_name)
+    assert report.summary()['missing'] == 2 and report.select('extra').etabs_name.tolist() == []
+    with pytest.raises(ValueError):
+        reconcile_frames(concat_frame_sets([revit, revit]), etabs)
+
+
+def test_reconcile_with_fake_etabs_model(fake_sap_model):
+    columns, beams = make_columns(4), make_beams()
+    sync_revit_to_etabs(column_frame_specs(columns) + beam_frame_specs(beams), [], fake_sap_model)
+    for name, frame in fake_sap_model.frames.items():
+        frame['story'] = 'Story1'
+    fake_sap_model.frames['6000001']['prop'] = 'C 600x600-FC50'
+    calls = fake_sap_model.count_calls('GetAllFrames')
+
+    report = reconcile_with_etabs(make_stores(columns, beams), fake_sap_model,
+                                  story_of_level={'L1': 'Story1'}, is_managed=is_revit_name)
+    assert report.summary() == {'missing': 0, 'extra': 0, 'renamed': 0, 'moved': 0,
+                                'wrong_section': 1, 'wrong_level': 0}
+    assert report.select('wrong_section').revit_name.tolist() == ['6000001']
+    assert fake_sap_model.count_calls('GetAllFrames') == calls + 1
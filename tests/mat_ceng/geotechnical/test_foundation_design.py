@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from mat_ceng.geotechnical.foundation_design import (
+    CONCRETE_UNIT_WEIGHT,
+    RaftModel,
+    plan_candidates,
+    size_isolated_footings,
+    _service_pressures,
+    _shear_ratios)
+
+
+def brute_force_volume(c1, c2, P, Pu, Mx, My, allowable, B, L, thicknesses):
+    best = np.inf
+    for h in thicknesses:
+        q_max, q_min = _service_pressures(P[None], Mx[None], My[None], B, L, np.full(len(B), h))
+        punching, one_way = _shear_ratios(Pu[None], Mx[None] * 1.4, My[None] * 1.4, c1, c2, B, L, h - 0.1,
+                                          30.0, 1.0, 0.75)
+        ok = (q_max <= allowable) & (q_min >= 0) & (punching <= 1) & (one_way <= 1)
+        ok &= (B >= c1 + 0.1) & (L >= c2 + 0.1)
+        if ok.any():
+            best = min(best, (B * L * h)[ok].min())
+    return best
+
+
+def test_lightest_footing_matches_brute_force():
+    rng = np.random.default_rng(3)
+    n = 12
+    c1, c2 = rng.choice([0.4, 0.6], n), rng.choice([0.4, 0.8], n)
+    P = rng.uniform(500, 4000, (n, 3))
+    Mx, My = rng.uniform(-150, 150, (n, 3)), rng.uniform(-150, 150, (n, 3))
+    design = size_isolated_footings(c1, c2, P, 1.4 * P, 250.0, Mx, My, 1.4 * Mx, 1.4 * My, max_aspect_ratio=1.5)
+    assert design.feasible.all()
+    B, L = plan_candidates(np.arange(1.0, 6.0 + 1e-9, 0.1), 1.5)
+    thicknesses = np.arange(0.4, 2.0 + 1e-9, 0.05)
+    for i in range(n):
+        expected = brute_force_volume(c1[i], c2[i], P[i], 1.4 * P[i], Mx[i], My[i], 250.0, B, L, thicknesses)
+        assert design.volume[i] == pytest.approx(expected)
+    assert np.all(design.bearing_ratio <= 1.0) and np.all(design.punching_ratio <= 1.0)
+
+
+def test_concentric_square_footing():
+    design = size_isolated_footings([0.5], [0.5], [[1000.0]], [[1400.0]], allowable_bearing=250.0,
+                                    sizes=np.arange(1.0, 4.0 + 1e-9, 0.1))
+    B, h = design.B[0], design.h[0]
+    assert design.L[0] == B
+    # smallest plan carrying the load and the self weight
+    assert (1000.0 + CONCRETE_UNIT_WEIGHT * B * B * h) / B**2 <= 250.0
+    assert (1000.0 + CONCRETE_UNIT_WEIGHT * (B - 0.1)**2 * h) / (B - 0.1)**2 > 250.0
+
+    # the removed overburden is taken off the gross pressure
+    net = size_isolated_footings([0.5], [0.5], [[1000.0]], [[1400.0]], allowable_bearing=250.0, overburden=36.0,
+                                 sizes=np.arange(1.0, 4.0 + 1e-9, 0.1))
+    assert net.B[0] < B
+    assert (1000.0 + CONCRETE_UNIT_WEIGHT * net.B[0]**2 * net.h[0]) / net.B[0]**2 - 36.0 <= 250.0
+
+    # no candidate large enough
+    design = size_isolated_footings([0.5], [0.5], [[1.0e5]], [[1.4e5]], 250.0)
+    assert not design.feasible[0] and np.isnan(design.B[0])
+
+
+def test_stiff_raft_settles_uniformly():
+    raft = RaftModel([[0, 0], [10, 0], [10, 10], [0, 10]], thickness=3.0, subgrade_modulus=20_000.0)
+    results = raft.solve(raft.load_vector([[5.0, 5.0]], [[10_000.0]]))
+    # P / (ks A) for a rigid raft
+    np.testing.assert_allclose(results.settlement, 10_000.0 / (20_000.0 * 100.0), rtol=0.03)
+    assert results.iterations.tolist() == [0]
+
+
+def test_tension_only_springs():
+    raft = RaftModel([[0, 0], [10, 0], [10, 10], [0, 10]], thickness=1.0, subgrade_modulus=20_000.0)
+    walls = [[[8.8, 0.2], [9.2, 0.2], [9.2, 9.8], [8.8, 9.8]]]
+    F = raft.load_vector([[1.0, 1.0], [1.0, 9.0]], [[5000.0, 5000.0], [100.0, 5000.0]], walls, [[0.0, 4000.0]])
+    results = raft.solve(F)
+    assert results.iterations[0] > 0
+    released = ~results.in_contact[:, 0]
+    assert released.any() and np.all(results.settlement[released, 0] <= 0)
+    assert np.all(results.soil_pressure >= 0)
+    # the springs in contact carry the loads
+    np.testing.assert_allclose((raft.springs[:, None] * results.settlement * results.in_contact).sum(axis=0),
+                               [5100.0, 14_000.0])
+    # the low rank update and the refactorisation agree
+    refactored = raft.solve(F, woodbury_limit=0)
+    np.testing.assert_allclose(refactored.settlement, results.settlement, atol=1e-12)
+
+
+def test_punching_includes_the_unbalanced_moment():
+    args = (np.array([0.5]), np.array([0.5]), np.array([3.0]), np.array([3.0]), np.array([0.6]), 30.0, 1.0, 0.75)
+    Pu = np.array([[2000.0]])
+    concentric, _ = _shear_ratios(Pu, np.zeros((1, 1)), np.zeros((1, 1)), *args)
+    eccentric, _ = _shear_ratios(Pu, np.array([[300.0]]), np.zeros((1, 1)), *args)
+    # ACI318-19 8.4.4.2: square section b1 = b2 = 1.1 m, gamma_v = 0.4
+    b, d = 1.1, 0.6
+    Jc = d * b**3 / 6 + b * d**3 / 6 + d * b * b**2 / 2
+    assert eccentric[0] / concentric[0] == pytest.approx(
+        1 + 0.4 * 300.0 * b / 2 / Jc / (2000.0 * (1 - b * b / 9.0) / (4 * b * d)))
+
+
+def test_raft_resting_on_a_line_of_springs_is_unstable():
+    raft = RaftModel([[0, 0], [10, 0], [10, 10], [0, 10]], thickness=0.2, subgrade_modulus=20_000.0, mesh_size=1.0)
+    F = np.zeros((raft.dof_count, 1))
+    F[0::3, 0] = np.where(np.isclose(raft.mesh.nodes[:, 1], 0.0), 1000.0, -100.0)
+    with pytest.raises(ValueError, match='unstable'):
+        raft.solve(F)
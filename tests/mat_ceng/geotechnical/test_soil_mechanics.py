@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from mat_ceng.csi_interop.etabs_api import AreaTable
+from mat_ceng.geotechnical.soil_mechanics import (
+    SoilLateralPressureParameters,
+    min_pressure,
+    max_pressure,
+    calculate_etabs_parameters,
+    panel_levels,
+    panel_pressures,
+    wall_types,
+    SoilLayer,
+    LayeredSoil,
+    stress_influence,
+    SettlementModel)
+
+
+def test_notebook_example():
+    params = SoilLateralPressureParameters(local_axe3_direction=-1)
+    assert min_pressure(params) == pytest.approx(-70.0)
+    assert max_pressure(params) == pytest.approx(-200.0)
+    assert calculate_etabs_parameters(params) == pytest.approx((13.0, -135.0))
+    params.local_axe3_direction = 1
+    assert calculate_etabs_parameters(params) == pytest.approx((-13.0, 135.0))
+
+
+def test_arrays_match_scalar_evaluation():
+    water = np.array([-1.0, 0.0, 4.0, 10.0, 12.0])
+    surcharge = np.array([0.0, 10.0, 20.0, 5.0, 15.0])
+    C, D = calculate_etabs_parameters(SoilLateralPressureParameters(water_table_height=water,
+                                                                    surcharge_load=surcharge))
+    for i in range(len(water)):
+        expected = calculate_etabs_parameters(SoilLateralPressureParameters(water_table_height=float(water[i]),
+                                                                            surcharge_load=float(surcharge[i])))
+        assert (C[i], D[i]) == pytest.approx(expected)
+
+
+def test_panel_pressures_from_area_table():
+    # two wall panels of a N_mm model, boundary points of both in one table
+    z = [-5000.0, -5000.0, -2000.0, -2000.0, -2000.0, -2000.0, 5000.0, 5000.0]
+    areas = AreaTable(names=['W1', 'W2'], offsets=np.array([0, 4, 8]),
+                      xyz=np.column_stack([np.zeros(8), np.zeros(8), z]), index={'W1': 0, 'W2': 1})
+    bottom, top = panel_levels(areas, ['W2', 'W1'], length_scale=1e-3)
+    assert bottom.tolist() == [-2.0, -5.0] and top.tolist() == [5.0, -2.0]
+
+    params = SoilLateralPressureParameters(water_table_height=np.array([0.0, 6.0]))
+    p_bottom, p_top = panel_pressures(params, bottom, top)
+    assert p_bottom.shape == (2, 2)
+    # panel W1 starts at the base level: max. pressure
+    np.testing.assert_allclose(p_bottom[1], [max_pressure(SoilLateralPressureParameters(water_table_height=0.0)),
+                                             max_pressure(SoilLateralPressureParameters(water_table_height=6.0))])
+    types, panel_type = wall_types(bottom, top)
+    assert types.tolist() == [[-5.0, -2.0], [-2.0, 5.0]] and panel_type.tolist() == [1, 0]
+
+
+def test_stress_influence_rectangles():
+    # centre and corner of a 2 x 2 m area at 1 m depth (Newmark, m = n = 1 and m = n = 2)
+    influence = stress_influence([[0.0, 0.0], [1.0, 1.0]], [1.0], [[0.0, 0.0, 2.0, 2.0]])
+    np.testing.assert_allclose(influence[:, 0], [4 * 0.17522, 0.23247], atol=1e-4)
+    # shallow point under a very large area carries the full pressure
+    assert stress_influence([[0.0, 0.0]], [0.1], [[0.0, 0.0, 1e3, 1e3]])[0, 0] == pytest.approx(1.0, abs=1e-4)
+    westergaard = stress_influence([[0.0, 0.0]], [1.0], [[0.0, 0.0, 2.0, 2.0]], method='westergaard')
+    assert 0 < westergaard[0, 0] < influence[0, 0]
+
+
+def test_layered_settlement():
+    clay = SoilLayer(4.0, unit_weight=18.0, elastic_modulus=np.inf, compression_index=0.3,
+                     recompression_index=0.05, void_ratio=1.0, ocr=1.5, sublayers=1)
+    soil = LayeredSoil([SoilLayer(2.0, elastic_modulus=20e3, sublayers=2), clay], water_table_depth=2.0)
+    footprints = np.array([[0.0, 0.0, 3.0, 3.0], [6.0, 0.0, 2.0, 4.0]])
+    model = SettlementModel(soil, footprints[:, :2], footprints)
+    # same geometry shares the cached influence matrix
+    assert SettlementModel(soil, footprints[:, :2].copy(), footprints.copy()).influence is model.influence
+
+    pressures = np.array([[150.0, 0.0], [0.0, 200.0]])
+    results = model.settlement(pressures)
+    stress = model.stress_increase(pressures)
+    influence = stress_influence(footprints[:, :2], soil.depth, footprints).reshape(2, 3, 2)
+    np.testing.assert_allclose(stress, influence @ pressures)
+
+    # hand calculation at the first footprint centre for the first load case
+    sigma = stress[0, :, 0]
+    assert results.immediate[0, 0] == pytest.approx((sigma[:2] * 1.0 / 20e3).sum())
+    sigma0 = 19.0 * 2 + 8.0 * 2
+    sigma_p = 1.5 * sigma0
+    final = sigma0 + sigma[2]
+    expected = 4.0 / 2.0 * (0.05 * np.log10(min(final, sigma_p) / sigma0) +
+                            0.3 * np.log10(max(final, sigma_p) / sigma_p))
+    assert results.consolidation[0, 0] == pytest.approx(expected)
+    assert results.total.shape == (2, 2)
@@ -0,0 +1,101 @@
+import json
+import os
+
+import numpy as np
+
+from mat_ceng.revit_interop.cache import load_cached_element_store, load_cached_element_stores, read_manifest
+from mat_ceng.revit_interop.sections import section_names
+
+
+def make_columns(grade='FC50'):
+    return [
+        [101, {'name': 'STR_SCL_500x800', 'b': 800.0, 'h': 500.0, 'material_grade': grade, 'rebar': '12T20',
+               'top_level': 'L1', 'column_above': None,
+               'cross_section_coord': {'x': [0.0, 800.0, 800.0, 0.0], 'y': [0.0, 0.0, 500.0, 500.0]}}],
+        [102, {'name': 'STR_SCL_600x600', 'b': 600.0, 'h': 600.0, 'material_grade': grade, 'rebar': None,
+               'top_level': 'L2', 'column_above': 101,
+               'cross_section_coord': {'x': [0.0, 600.0, 600.0], 'y': [0.0, 0.0, 600.0]}}],
+    ]
+
+
+def make_floors():
+    return [['a-1', {'name': 'HES_STR_SLB_250_ConcreteSlab', 'thk': 250.0, 'material_grade': 'FC40',
+                     'structural': True, 'non_beam_x': None,
+                     'x': [[0.0, 10.0, 10.0], [1.0, 2.0, 2.0]], 'y': [[0.0, 0.0, 10.0], [1.0, 1.0, 2.0]]}],
+            ['a-2', {'name': 'HES_STR_SLB_200_ConcreteSlab', 'thk': 200.0, 'material_grade': 'FC40',
+                     'structural': False, 'non_beam_x': [[1.0, 2.0]],
+                     'x': [[0.0, 5.0, 5.0]], 'y': [[0.0, 0.0, 5.0]]}]]
+
+
+def write(path, items):
+    with open(path, 'w') as file:
+        json.dump(items, file)
+
+
+def test_cache_round_trip_is_memory_mapped(tmp_path):
+    write(tmp_path / 'column_data.json', make_columns())
+    write(tmp_path / 'floor_data.json', make_floors())
+    first = load_cached_element_stores(tmp_path)
+    second = load_cached_element_stores(tmp_path)
+    for kind, items in (('column', make_columns()), ('floor', make_floors())):
+        assert [second[kind].get(x[0]) for x in items] == [x[1] for x in items]
+        assert first[kind].ids.tolist() == second[kind].ids.tolist()
+    assert isinstance(second['column']['b'], np.memmap)
+    assert isinstance(second['floor']['x'].values.values, np.memmap)
+    # section names are built before saving and read back with the arrays
+    assert 'section_name' in second['column'].derived
+    assert section_names(second['column']).tolist() == ['C 500x800-12T20-FC50', 'C 600x600-None-FC50']
+    assert section_names(second['column'].take([1])).tolist() == ['C 600x600-None-FC50']
+
+
+def test_cache_is_rebuilt_when_the_source_changes(tmp_path):
+    path = tmp_path / 'column_data.json'
+    write(path, make_columns())
+    cache = tmp_path / 'cache'
+    load_cached_element_store(path, cache)
+    stamp = read_manifest(cache / 'column_data')['source']
+
+    write(path, make_columns('FC60'))
+    os.utime(path, ns=(stamp['mtime_ns'] + 10**9, stamp['mtime_ns'] + 10**9))
+    store = load_cached_element_store(path, cache)
+    assert store.get(101)['material_grade'] == 'FC60'
+
+    # same size and mtime: only the hash check sees the edit
+    write(path, make_columns('FC70'))
+    stamp = read_manifest(cache / 'column_data')['source']
+    os.utime(path, ns=(stamp['mtime_ns'], stamp['mtime_ns']))
+    assert load_cached_element_store(path, cache).get(101)['material_grade'] == 'FC60'
+    assert load_cached_element_store(path, cache, check='hash').get(101)['material_grade'] == 'FC70'
+
+
+def test_saves_switch_versions_without_touching_mapped_files(tmp_path, monkeypatch):
+    from mat_ceng.revit_interop import cache as cache_module
+    from mat_ceng.revit_interop.element_store import ElementStore
+
+    def from_items(items):
+        write(tmp_path / 'column_data.json', items)
+        return ElementStore.from_file(tmp_path / 'column_data.json')
+
+    folder = tmp_path / 'cache' / 'column_data'
+    store = from_items(make_columns())
+    cache_module.save_element_store(store, folder)
+    mapped = cache_module.load_element_store(folder)
+    first = json.loads((folder / 'current.json').read_text())['current']
+
+    cache_module.save_element_store(from_items(make_columns('FC60')), folder)
+    # the reader of the first version keeps valid arrays, new readers get the new version
+    assert mapped.get(101)['material_grade'] == 'FC50'
+    assert cache_module.load_element_store(folder).get(101)['material_grade'] == 'FC60'
+    assert (folder / first).exists()
+
+    # the first version is deleted a save later, unless it is still in use (windows)
+    def locked(path, *args, **kwargs):
+        raise PermissionError(path)
+    monkeypatch.setattr(cache_module.shutil, 'rmtree', locked)
+    cache_module.save_element_store(store, folder)
+    pointer = json.loads((folder / 'current.json').read_text())
+    assert (folder / first).exists() and first in pointer['previous']
+    monkeypatch.undo()
+    cache_module.save_element_store(store, folder)
+    assert not (folder / first).exists()
+    assert len([x for x in folder.iterdir() if x.is_dir()]) == 2
@@ -0,0 +1,84 @@
+import numpy as np
+
+from mat_ceng.revit_interop.connectivity import ConnectivityGraph
+from mat_ceng.revit_interop.element_store import ElementStore
+from mat_ceng.revit_interop.loader import ElementBatch
+
+
+def column(x, y, z_base, z_top, above=None, below=None):
+    return {'x': x, 'y': y, 'z_base': z_base, 'z_top': z_top, 'column_above': above, 'column_below': below}
+
+
+def beam(x, y, z, columns=None):
+    return {'x': x, 'y': y, 'z': z, 'columns': columns}
+
+
+def store(kind, items):
+    return ElementStore.from_batches([ElementBatch(kind, *zip(*items))])
+
+
+def make_model():
+    columns = store('column', [
+        [1, column(0.0, 0.0, 0.0, 3000.0, above=2)],
+        [2, column(0.0, 0.0, 3000.0, 6000.0, below=1)],
+        [3, column(6000.0, 0.0, 0.0, 3000.0, above=99)],      # dangling reference
+        [4, column(3000.0, 0.0, 3000.0, 6000.0)],             # on beam 11
+        [5, column(9000.0, 9000.0, 3000.0, 6000.0)],          # floating
+        [6, column(0.0, 6000.0, 3000.0, 6000.0, above=2)],    # 2 does not point back
+    ])
+    beams = store('beam', [
+        [11, beam([0.0, 6000.0], [0.0, 0.0], 3000.0, [1, 3])],
+        [12, beam([3000.0, 3000.0], [0.0, 4000.0], 3000.0)],  # secondary beam on 11 and wall 21
+        [13, beam([20000.0, 25000.0], [0.0, 0.0], 3000.0)],   # unsupported
+    ])
+    walls = store('wall', [
+        [21, {'x': [0.0, 6000.0], 'y': [4000.0, 4000.0], 'z_base': 0.0, 'z_top': 3000.0}],
+    ])
+    return columns, beams, walls
+
+
+def test_load_path_checks():
+    graph = ConnectivityGraph.from_stores(*make_model())
+    report = graph.check()
+    assert report.unsupported_beams.tolist() == ['13']
+    assert report.dangling_references == [('column', 3, 'column_above', 99)]
+    assert report.asymmetric_stacks == [(6, 2)]
+    assert report.floating_columns.tolist() == ['5', '6']
+    # 6 hangs on the stack through its one sided link, so only 5 and 13 float
+    assert report.floating_clusters == [['5'], ['13']]
+    assert not report.is_consistent
+
+    secondary = graph.node('beam', 12)
+    neighbours = sorted(graph.ids[graph.neighbours(secondary)].tolist())
+    assert neighbours == ['11', '21', '4']
+    assert sorted(graph.ids[graph.neighbours(graph.node('column', 4))].tolist()) == ['11', '12']
+    # CSR is symmetric and without duplicated edges
+    assert (graph.adjacency != graph.adjacency.T).nnz == 0
+    assert graph.adjacency.data.max() == 1
+
+
+def test_without_walls_the_secondary_beam_loses_its_far_end_support():
+    columns, beams, _ = make_model()
+    report = ConnectivityGraph.from_stores(columns, beams).check()
+    assert report.unsupported_beams.tolist() == ['12', '13']
+    assert report.summary() == {'unsupported_beams': 2, 'dangling_references': 1, 'asymmetric_stacks': 1,
+                                'floating_columns': 2, 'floating_clusters': 2}
+
+
+def test_every_beam_end_needs_a_support():
+    columns = store('column', [
+        ['C1', column(0.0, 0.0, 0.0, 3000.0)],
+        ['C2', column(6000.0, 0.0, 3000.0, 6000.0)],          # stands on beam B2
+    ])
+    beams = store('beam', [
+        ['B1', beam([0.0, -2000.0], [0.0, 0.0], 3000.0)],      # cantilever from C1
+        ['B2', beam([3000.0, 9000.0], [0.0, 0.0], 3000.0)],    # carries C2 and B3, rests on nothing
+        ['B3', beam([200.0, 3000.0], [0.0, 0.0], 3000.0)],      # from the face of C1 to B2
+    ])
+    graph = ConnectivityGraph.from_stores(columns, beams)
+    assert graph.check().unsupported_beams.tolist() == ['B1', 'B2', 'B3']
+    assert sorted(graph.ids[graph.neighbours(graph.node('beam', 'B2'))].tolist()) == ['B3', 'C2']
+
+    columns.fields['b'] = np.full(2, 500.0)
+    report = ConnectivityGraph.from_stores(columns, beams).check()
+    assert report.unsupported_beams.tolist() == ['B1', 'B2']
@@ -0,0 +1,87 @@
+import json
+import pathlib
+
+import numpy as np
+import pytest
+
+from mat_ceng.revit_interop.element_store import ElementStore, Categorical, RaggedArray, load_element_stores
+from mat_ceng.revit_interop.loader import ElementBatch
+
+test_data_folder = pathlib.Path(__file__).parents[3] / 'notebooks' / 'modeling_from_revit' / 'test_data'
+
+
+def make_columns():
+    return [
+        [101, {'name': 'STR_SCL_500x800', 'b': 800.0, 'h': 500.0, 'base_level': 'L0', 'rebar': None,
+               'column_above': 102, 'column_below': None,
+               'cross_section_coord': {'x': [0.0, 800.0, 800.0, 0.0, 0.0], 'y': [0.0, 0.0, 500.0, 500.0, 0.0]}}],
+        [102, {'name': 'STR_SCL_500x800', 'b': 800.0, 'h': 500.0, 'base_level': 'L1', 'rebar': '12T20',
+               'column_above': None, 'column_below': 101,
+               'cross_section_coord': {'x': [0.0, 800.0, 0.0, 0.0], 'y': [0.0, 0.0, 500.0, 0.0]}}],
+        [103, {'name': 'STR_SCL_600x600', 'b': 600.0, 'h': 600.0, 'base_level': 'L1', 'rebar': None,
+               'column_above': None, 'column_below': None,
+               'cross_section_coord': {'x': [0.0, 600.0, 600.0, 0.0], 'y': [0.0, 0.0, 600.0, 600.0]}}],
+    ]
+
+
+def make_floors():
+    return [
+        [201, {'z': 3000.0, 'level': 'L1', 'x': [[0.0, 10.0, 10.0, 0.0], [20.0, 30.0, 20.0]],
+               'y': [[0.0, 0.0, 10.0, 0.0], [0.0, 0.0, 10.0]], 'non_beam_x': None}],
+        [202, {'z': 6000.0, 'level': 'L2', 'x': [[0.0, 5.0, 0.0]], 'y': [[0.0, 0.0, 5.0]],
+               'non_beam_x': [[0.0, 5.0]]}],
+    ]
+
+
+def test_columns_are_stored_in_typed_arrays():
+    columns = ElementStore.from_batches([ElementBatch('column', *zip(*make_columns()))])
+    assert columns.ids.dtype == np.int64
+    assert columns['b'].dtype == np.float64
+    assert isinstance(columns['base_level'], Categorical)
+    assert list(columns['base_level'].categories) == ['L0', 'L1']
+    assert columns['column_above'].tolist() == [102, -1, -1]
+    outline = columns['cross_section_coord.x']
+    assert isinstance(outline, RaggedArray)
+    assert outline.lengths().tolist() == [5, 4, 4]
+    np.testing.assert_allclose(outline[columns.row(102)], [0.0, 800.0, 0.0, 0.0])
+
+
+def test_filters_and_round_trip():
+    items = make_columns()
+    columns = ElementStore.from_batches([ElementBatch('column', *zip(*items[:1])),
+                                         ElementBatch('column', *zip(*items[1:]))])
+    assert columns.where(base_level='L1').tolist() == [1, 2]
+    assert columns.where(base_level='L1', b=(700, 900)).tolist() == [1]
+    assert columns.where(rebar=None).tolist() == [0, 2]
+    assert [columns.get(i) for i in columns.ids.tolist()] == [x[1] for x in items]
+    subset = columns.take(columns.where(base_level='L1'))
+    assert subset.ids.tolist() == [102, 103] and subset.get(103) == items[2][1]
+
+
+def test_nested_floor_loops():
+    floors = ElementStore.from_batches([ElementBatch('floor', *zip(*make_floors()))])
+    loops = floors['x'][floors.row(201)]
+    assert [len(x) for x in loops] == [4, 3]
+    assert floors.get(202) == make_floors()[1][1]
+    assert floors.get(201)['non_beam_x'] is None
+    assert floors.take([1, 0]).get(201) == make_floors()[0][1]
+
+
+def test_bool_and_none_fields_round_trip():
+    items = [[1, {'structural': True, 'openings': None}],
+             [2, {'structural': False, 'openings': []}],
+             [3, {'structural': None, 'openings': [1.0, 2.0]}]]
+    store = ElementStore.from_batches([ElementBatch('floor', *zip(*items))])
+    assert store['structural'].dtype == bool
+    assert store.where(structural=True).tolist() == [0]
+    assert [store.get(i) for i in store.ids.tolist()] == [x[1] for x in items]
+
+
+@pytest.mark.skipif(not test_data_folder.exists(), reason='exporter sample data not available')
+def test_exporter_sample_folder():
+    stores = load_element_stores(test_data_folder, kinds=['column', 'beam', 'floor', 'area_load'])
+    with open(test_data_folder / 'beam_data.json', 'r') as file:
+        beams = json.load(file)
+    assert len(stores['beam']) == len(beams)
+    assert stores['beam'].get(beams[10][0]) == beams[10][1]
+    assert stores['area_load'].ids.dtype == object
@@ -0,0 +1,46 @@
+import pathlib
+
+import numpy as np
+import pytest
+
+from mat_ceng.revit_interop.element_store import Categorical
+from mat_ceng.revit_interop.levels import LevelIndex
+
+test_data_folder = pathlib.Path(__file__).parents[3] / 'notebooks' / 'modeling_from_revit' / 'test_data'
+
+LEVELS = [['L1', 3000.0], ['BASE', 0.0], ['L2', 6000.0], ['L1.5', 4500.0]]
+MAPPED = {'L1 TOS': {'level_elevation': 3050.0, 'refrence_level_name': 'L1', 'refrence_level_elevation': 3000.0}}
+
+
+def test_assign_and_stories():
+    levels = LevelIndex.from_analytical(LEVELS, MAPPED)
+    assert levels.names.tolist() == ['BASE', 'L1', 'L1.5', 'L2']
+    assigned = levels.assign([-50.0, 3000.4, 3700.0, 3800.0, 9000.0], tolerance=1.0)
+    assert assigned.names.tolist() == ['BASE', 'L1', 'L1', 'L1.5', 'L2']
+    np.testing.assert_allclose(assigned.offsets, [-50.0, 0.4, 700.0, -700.0, 3000.0])
+    assert assigned.between.tolist() == [True, False, True, True, True]
+    # a column top at 3000 and a beam at 3000.5 belong to the story under L1
+    assert levels.story_names([0.0, 1500.0, 3000.5, 3001.5, 7000.0]).tolist() == [None, 'L1', 'L1', 'L1.5', None]
+    assert levels.story_definition() == (0.0, ['L1', 'L1.5', 'L2'], [3000.0, 1500.0, 1500.0])
+
+
+def test_mapped_level_names():
+    levels = LevelIndex.from_analytical(LEVELS, MAPPED)
+    names = Categorical(['L1 TOS', 'L2', 'UNKNOWN'], np.array([0, 1, -1, 0, 2]))
+    assert levels.reference_names(names).tolist() == ['L1', 'L2', None, 'L1', 'UNKNOWN']
+    assert levels.rows_of(names).tolist() == [1, 3, -1, 1, -1]
+    assert levels.rows_of(['L1 TOS', 'BASE']).tolist() == [1, 0]
+    assert levels.elevation('L1 TOS') == 3000.0
+    with pytest.raises(ValueError):
+        LevelIndex(['A', 'A'], [0.0, 1.0])
+
+
+@pytest.mark.skipif(not test_data_folder.exists(), reason='exporter sample data not available')
+def test_exporter_sample_levels():
+    from mat_ceng.revit_interop.element_store import ElementStore
+    levels = LevelIndex.from_folder(test_data_folder)
+    columns = ElementStore.from_file(test_data_folder / 'column_data.json')
+    assigned = levels.assign(columns['z_top'], tolerance=1.0)
+    # every column top is on its analytical top level
+    assert not assigned.between.any()
+    assert (assigned.rows == levels.rows_of(columns['top_level'])).all()
@@ -0,0 +1,52 @@
+import json
+import pathlib
+
+import pytest
+
+from mat_ceng.revit_interop.loader import (
+    iter_json_array,
+    iter_element_batches,
+    get_element_kind)
+
+test_data_folder = pathlib.Path(__file__).parents[3] / 'notebooks' / 'modeling_from_revit' / 'test_data'
+
+
+def write_export(path, items):
+    path.write_text(json.dumps(items, indent=1), encoding='utf-8')
+    return path
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1 << 16])
+def test_stream_matches_json_load(tmp_path, chunk_size):
+    items = [
+        [6055928, {'name': 'STR_SCL_500x800', 'x': 46688.61, 'rebar': None, 'column_below': 6872106}],
+        ['6284479', {'line_load_style': 'Loads - [Line], "01"', 'x': [1.5, -2e-3], 'z': [-7600.0, 123456]}],
+        [7, {'name': 'Ü ø', 'nested': {'a': [[1, 2], [3]]}}],
+    ]
+    path = write_export(tmp_path / 'column_data.json', items)
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == items
+
+
+def test_batches_have_bounded_size(tmp_path):
+    items = [[i, {'b': 400.0, 'h': 800.0}] for i in range(25)]
+    path = write_export(tmp_path / 'beam_data.json', items)
+    batches = list(iter_element_batches(path, batch_size=10))
+    assert [len(x) for x in batches] == [10, 10, 5]
+    assert {x.kind for x in batches} == {'beam'}
+    assert [list(pair) for batch in batches for pair in batch] == items
+
+
+def test_empty_and_invalid_files(tmp_path):
+    assert list(iter_json_array(write_export(tmp_path / 'empty.json', []))) == []
+    with pytest.raises(ValueError):
+        list(iter_json_array(write_export(tmp_path / 'levels.json', {'a': 1})))
+
+
+@pytest.mark.skipif(not test_data_folder.exists(), reason='exporter sample data not available')
+def test_exporter_sample_file():
+    path = test_data_folder / 'column_data.json'
+    assert get_element_kind(path) == 'column'
+    with open(path, 'r') as file:
+        expected = json.load(file)
+    streamed = [list(pair) for batch in iter_element_batches(path, batch_size=50) for pair in batch]
+    assert streamed == expected
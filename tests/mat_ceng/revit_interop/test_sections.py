@@ -0,0 +1,53 @@
+import numpy as np
+
+from mat_ceng.revit_interop.element_store import ElementStore
+from mat_ceng.revit_interop.loader import ElementBatch
+from mat_ceng.revit_interop.sections import SectionCatalogue, section_definition, column_section_names
+
+
+def column(name, b, h, rebar, grade='FC50'):
+    return {'name': name, 'b': b, 'h': h, 'rebar': rebar, 'material_grade': grade}
+
+
+def make_stores():
+    columns = [
+        [1, column('STR_SCL_500x800', 800.0, 500.0, '12T20')],
+        [2, column('STR_SCL_500x800', 800.0, 500.0, None)],
+        [3, column('STR_SCL_500x800', 800.0, 500.0, '12T20')],
+        [4, column('STR_SCL_D600', 600.0, None, '10T25')],
+        [5, column('STR_SCL_500x800', 800.0, 500.0, 'T@')],
+    ]
+    beams = [
+        [11, {'name': 'STR_SFA_400x800', 'b': 400.0, 'h': 800.0, 'material_grade': 'FC40'}],
+        [12, {'name': 'STR_SFA_400x800 copy', 'b': 400.0, 'h': 800.0, 'material_grade': 'FC40'}],
+    ]
+    floors = [[21, {'name': 'HES_STR_SLB_250_ConcreteSlab', 'thk': 250.0, 'material_grade': 'FC40'}]]
+    return {kind: ElementStore.from_batches([ElementBatch(kind, *zip(*items))])
+            for kind, items in (('column', columns), ('beam', beams), ('floor', floors))}
+
+
+def test_catalogue_deduplicates_sections():
+    stores = make_stores()
+    catalogue = SectionCatalogue.from_stores(stores)
+    assert [x.name for x in catalogue.definitions] == [
+        'C 500x800-12T20-FC50', 'C 500x800-None-FC50', 'C 600-10T25-FC50', 'C 500x800-T@-FC50',
+        'B 400X800-FC40', 'S 250-FC40']
+    codes = catalogue.codes['column']
+    assert codes.dtype == np.int32 and codes.tolist() == [0, 1, 0, 2, 3]
+    assert catalogue.names(codes).tolist() == column_section_names(stores['column']).tolist()
+    # both beam types give the same section
+    assert catalogue.codes['beam'].tolist() == [4, 4]
+    circle = catalogue[2]
+    assert (circle.shape, circle.depth, circle.rebar) == ('circle', 600.0, '10T25')
+    # the exporter placeholder is not a rebar definition
+    assert catalogue[3].rebar is None and catalogue[1].rebar is None
+    assert len(catalogue.frame_definitions) == 5 and len(catalogue.area_definitions) == 1
+    assert catalogue.code('S 250-FC40') == 5 and catalogue.code('missing') == -1
+
+
+def test_same_name_with_another_definition_is_a_conflict():
+    catalogue = SectionCatalogue()
+    first = catalogue.add(section_definition('beam', (1, {'name': 'B', 'b': 400.0, 'h': 800.0, 'material_grade': 'FC40'})))
+    other = catalogue.add(section_definition('beam', (2, {'name': 'B', 'b': 400.2, 'h': 800.0, 'material_grade': 'FC40'})))
+    assert first == other == 0
+    assert len(catalogue) == 1 and len(catalogue.conflicts) == 1
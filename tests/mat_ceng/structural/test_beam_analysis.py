@@ -0,0 +1,84 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from mat_ceng.structural.beam_analysis import ContinuousBeam, pattern_loads
+
+EI = 2.0e14 # N·mm²
+
+
+def test_simple_span_matches_closed_form():
+    results = ContinuousBeam([6000.0], EI).solve([10.0])
+    assert results.moment.max() == pytest.approx(10.0 * 6000.0**2 / 8)
+    assert results.deflection.max() == pytest.approx(5 * 10.0 * 6000.0**4 / (384 * EI))
+    np.testing.assert_allclose(results.reactions.ravel(), [30_000.0, 30_000.0])
+
+
+def test_two_spans_and_fixed_ends():
+    results = ContinuousBeam([6000.0, 6000.0], EI).solve([10.0, 10.0])
+    assert results.moment.min() == pytest.approx(-10.0 * 6000.0**2 / 8)
+    np.testing.assert_allclose(results.reactions.ravel(), [22_500.0, 75_000.0, 22_500.0])
+
+    results = ContinuousBeam([6000.0], EI, fixed_ends=(True, True)).solve([10.0])
+    assert results.moment.max() == pytest.approx(10.0 * 6000.0**2 / 24)
+    np.testing.assert_allclose(results.support_moments.ravel(), [3.0e7, -3.0e7])
+
+
+def test_cantilever_with_point_load():
+    beam = ContinuousBeam([3000.0], EI, supports=[True, False], fixed_ends=(True, False), extra_nodes=[2000.0])
+    results = beam.solve(point_loads=[1000.0], point_x=[2000.0])
+    assert results.moment.min() == pytest.approx(-2.0e6)
+    assert results.reactions.ravel() == pytest.approx([1000.0])
+    with pytest.raises(ValueError):
+        beam.solve(point_loads=[1000.0], point_x=[1600.0])
+    with pytest.raises(ValueError):
+        ContinuousBeam([3000.0], EI, supports=[True, False])
+
+
+def test_pattern_loads_solve_as_one_batch():
+    loads, names = pattern_loads(dead=20.0, live=10.0, span_count=3)
+    assert names == ['all', 'alternate_odd', 'alternate_even', 'adjacent_1_2', 'adjacent_2_3']
+    beam = ContinuousBeam([6000.0, 6000.0, 6000.0], EI)
+    results = beam.solve(loads)
+    assert results.moment.shape[1] == len(names)
+    # every column matches a separate solve
+    single = beam.solve(loads[:, 1])
+    np.testing.assert_allclose(results.moment[:, 1], single.moment[:, 0], atol=1e-3)
+    envelope = results.envelope()
+    # max end span moment from the alternate pattern, max support moment from the adjacent spans
+    end_span = results.span == 0
+    assert envelope['moment_max'][end_span].max() == pytest.approx(results.moment[end_span, 1].max())
+    support = np.argmin(np.abs(results.x - 6000.0))
+    assert envelope['moment_min'][support] == pytest.approx(results.moment[support, 3])
+
+
+def test_influence_lines_are_cached_by_geometry():
+    lines = ContinuousBeam([6000.0, 7000.0], EI).influence_lines()
+    assert ContinuousBeam([6000.0, 7000.0], EI).influence_lines() is lines
+    assert ContinuousBeam([6000.0, 7000.0], 2 * EI).influence_lines() is not lines
+    assert not lines.moment.flags.writeable
+
+
+def test_pattern_envelope_covers_every_span_combination():
+    beam = ContinuousBeam([6000.0, 7000.0, 5000.0], EI)
+    combinations = np.array(list(itertools.product([0.0, 1.0], repeat=3))).T
+    expected = beam.solve(20.0 + 10.0 * combinations).envelope()
+    envelope = beam.influence_lines().pattern_envelope(dead=20.0, live=10.0)
+    for key in expected:
+        np.testing.assert_allclose(envelope[key], expected[key], atol=1e-3)
+
+
+def test_moving_load_envelope():
+    beam = ContinuousBeam([6000.0], EI, extra_nodes=[1000.0])
+    lines = beam.influence_lines()
+    # exact at the nodes
+    single = beam.solve(point_loads=[1000.0], point_x=[1000.0])
+    np.testing.assert_allclose(lines.point_load_response([1000.0], [1000.0]).moment, single.moment, atol=1e-6)
+
+    envelope = lines.moving_load_envelope(axle_offsets=[0.0], axle_loads=[1000.0], step=50.0)
+    assert envelope['moment_max'].max() == pytest.approx(1000.0 * 6000.0 / 4)
+    np.testing.assert_allclose(envelope['reaction_max'], [1000.0, 1000.0])
+    # second axle 1 m behind, both on the span
+    envelope = lines.moving_load_envelope(axle_offsets=[0.0, 1000.0], axle_loads=[1000.0, 1000.0], step=50.0)
+    assert envelope['reaction_max'] == pytest.approx([2000.0 * 5500.0 / 6000.0] * 2)
@@ -0,0 +1,78 @@
+import json
+import pathlib
+
+import numpy as np
+import pytest
+from shapely import box
+
+from mat_ceng.column_area import ColumnArea, get_column_area_loads
+from mat_ceng.structural.beam_analysis import concrete_modulus
+from mat_ceng.structural.slab_design import analyse_slab, check_punching_shear
+
+test_data_folder = pathlib.Path(__file__).parents[3] / 'notebooks' / 'Calculating trib regions'
+
+
+def edge_walls(length, width=20.0):
+    h = width / 2
+    return [
+        [[-h, -h], [length + h, -h], [length + h, h], [-h, h]],
+        [[-h, length - h], [length + h, length - h], [length + h, length + h], [-h, length + h]],
+        [[-h, -h], [h, -h], [h, length + h], [-h, length + h]],
+        [[length - h, -h], [length + h, -h], [length + h, length + h], [length - h, length + h]],
+    ]
+
+
+def test_simply_supported_plate_matches_plate_theory():
+    length, thickness, poisson = 6000.0, 200.0, 0.3
+    floor_data = {'slab_outline': [[0, 0], [length, 0], [length, length], [0, length]],
+                  'walls': edge_walls(length)}
+    results = analyse_slab(floor_data, thickness=thickness, poisson=poisson, mesh_size=250.0, pressure=[10.0])
+    D = concrete_modulus(40.0) * thickness**3 / (12 * (1 - poisson**2))
+    q = 10.0e-3 # N/mm²
+    # Timoshenko, square plate, uniform load: w = 0.00406 q a^4 / D, mx = 0.0479 q a^2
+    assert results.deflection.max() == pytest.approx(0.00406 * q * length**4 / D, rel=0.01)
+    assert results.moments[:, 0].max() == pytest.approx(0.0479 * q * length**2 * 1e-3, rel=0.01)
+    assert results.wall_reactions.sum() == pytest.approx(10.0 * 36.0)
+
+
+def test_floor_data_is_in_equilibrium():
+    with open(test_data_folder / 'floor_data.json') as file:
+        floor_data = json.load(file)
+    with open(test_data_folder / 'occupancy_loading.json') as file:
+        occupancy_loading = json.load(file)
+    results = analyse_slab(floor_data, occupancy_loading, mesh_size=500.0)
+    assert results.cases == ['dead', 'live', 'wind']
+    assert results.column_reactions.shape == (len(floor_data['columns']), 3)
+    # same total load as the tributary areas, up to the stepped mesh boundary
+    total = results.column_reactions.sum(axis=0) + results.wall_reactions.sum(axis=0)
+    expected = sum(x.column_load for x in get_column_area_loads(floor_data, occupancy_loading))
+    np.testing.assert_allclose(total, expected, rtol=0.005)
+
+    iterative = analyse_slab(floor_data, occupancy_loading, mesh_size=1000.0, solver='iterative')
+    direct = analyse_slab(floor_data, occupancy_loading, mesh_size=1000.0)
+    np.testing.assert_allclose(iterative.deflection, direct.deflection, atol=1e-6)
+
+
+def test_punching_shear_interior_edge_and_opening():
+    floor_data = {'slab_outline': [[0, 0], [20000, 0], [20000, 20000], [0, 20000]],
+                  'slab_openings': [[[11000, 9000], [12000, 9000], [12000, 11000], [11000, 11000]]]}
+    columns = [
+        ColumnArea(box(4800, 4800, 5200, 5200), box(2000, 2000, 8000, 8000), {}, np.array([300.0, 100.0])),
+        ColumnArea(box(0, 9800, 400, 10200), box(0, 7000, 3000, 13000), {}, np.array([150.0, 50.0])),
+        ColumnArea(box(9800, 9800, 10200, 10200), box(7000, 7000, 13000, 13000), {}, np.array([300.0, 100.0])),
+    ]
+    results = check_punching_shear(columns, floor_data, effective_depth=200.0, thickness=250.0,
+                                   load_factors=[[1.2, 1.6], [1.4, 0.0]], deduct_inner_load=False)
+    # the opening only reduces b0, the column next to it stays interior (22.6.5.3)
+    assert results.location.tolist() == ['interior', 'edge', 'interior']
+    assert results.perimeter[0] == pytest.approx(4 * 600.0)
+    assert results.perimeter[1] == pytest.approx(600.0 + 2 * 500.0)
+    # the tangents to the opening corners are at 45 degrees, they hide the whole face towards it
+    assert results.perimeter[2] == pytest.approx(3 * 600.0)
+    assert results.vu[0, 0] == pytest.approx((1.2 * 300.0 + 1.6 * 100.0) * 1e3 / (2400.0 * 200.0))
+    # 22.6.5.2(a) governs a square interior column, lambda_s = 1 for d = 200
+    assert results.phi_vc[0] == pytest.approx(0.75 * 0.33 * np.sqrt(40.0))
+    assert results.governing[0] == 0 and results.passes.all()
+
+    inner = check_punching_shear(columns[:1], floor_data, 200.0, 250.0, [1.0, 1.0])
+    assert inner.vu_force[0, 0] == pytest.approx(400.0 * (1 - 600.0**2 / 6000.0**2))
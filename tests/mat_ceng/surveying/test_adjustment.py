@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from mat_ceng.surveying.adjustment import SurveyNetwork, adjust_levelling
+
+
+def _bearing(a, b):
+    dx, dy = b - a
+    return np.arctan2(dx, dy)
+
+
+def test_network_recovers_true_coordinates():
+    # closed traverse between two fixed stations, exact observations, perturbed approximations
+    truth = np.array([[0.0, 0.0], [0.0, 100.0], [80.0, 160.0], [170.0, 120.0], [160.0, 20.0], [70.0, -30.0]])
+    names = ['A', 'B', 'T1', 'T2', 'T3', 'T4']
+    approximate = truth + np.random.default_rng(3).normal(0, 0.5, truth.shape)
+    approximate[:2] = truth[:2]
+    network = SurveyNetwork(names, approximate, fixed=['A', 'B'])
+    ring = [1, 2, 3, 4, 5, 0]
+    network.add_distances([names[i] for i in ring[:-1]], [names[i] for i in ring[1:]],
+                          np.hypot(*(truth[ring[1:]] - truth[ring[:-1]]).T))
+    at, back, fore = ring[1:-1], ring[:-2], ring[2:]
+    angles = [(_bearing(truth[i], truth[f]) - _bearing(truth[i], truth[b])) % (2 * np.pi)
+              for i, b, f in zip(at, back, fore)]
+    network.add_angles([names[i] for i in at], [names[i] for i in back], [names[i] for i in fore], angles)
+    network.add_bearings(['T4'], ['A'], [_bearing(truth[5], truth[0])])
+
+    results = network.adjust(standard_deviations=True)
+    np.testing.assert_allclose(results.coordinates, truth, atol=1e-6)
+    np.testing.assert_allclose(results.residuals, 0, atol=1e-6)
+    assert results.redundancy == 10 - 8
+    assert np.all(results.standard_deviations[:2] == 0)
+    assert np.all(results.standard_deviations[2:] >= 0)
+
+    # one fixed point and distances only: rotation about it is free
+    free = SurveyNetwork(names, approximate, fixed=['A'])
+    free.add_distances([names[i] for i in ring[:-1]], [names[i] for i in ring[1:]], np.ones(5))
+    with pytest.raises(ValueError):
+        free.adjust()
+
+
+def test_levelling_network():
+    # loop BM1 -> P1 -> P2 -> BM1 with a 6 mm misclosure, equal weights
+    results = adjust_levelling(['BM1', 'P1', 'P2'], [100.0, 0.0, 0.0], ['BM1'],
+                               ['BM1', 'P1', 'P2'], ['P1', 'P2', 'BM1'], [1.502, -0.748, -0.748],
+                               standard_deviations=True)
+    np.testing.assert_allclose(results.residuals, -0.002, atol=1e-12)
+    np.testing.assert_allclose(results.coordinates, [100.0, 101.500, 100.750], atol=1e-12)
+    assert results.redundancy == 1
+    assert results.standard_deviations[0] == 0
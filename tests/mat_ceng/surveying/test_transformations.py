@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from mat_ceng.surveying.transformations import Helmert2D, Helmert3D
+from mat_ceng.surveying.survey_io import read_points_csv, transform_csv
+
+
+def test_helmert2d_fit_and_inverse():
+    rng = np.random.default_rng(1)
+    truth = Helmert2D(350120.0, 3712050.0, 1.0002, 0.3)
+    local = rng.uniform(-500, 500, (20, 2))
+    fitted = Helmert2D.fit(local, truth.apply(local))
+    assert (fitted.tx, fitted.ty, fitted.scale, fitted.rotation) == pytest.approx(
+        (truth.tx, truth.ty, truth.scale, truth.rotation))
+    np.testing.assert_allclose(fitted.inverse().apply(fitted.apply(local)), local, atol=1e-8)
+
+    grid = Helmert2D.from_grid((100.0, 200.0), (5000.0, 6000.0), rotation=np.pi / 2)
+    np.testing.assert_allclose(grid.apply([[100.0, 200.0], [101.0, 200.0]]), [[5000.0, 6000.0], [5000.0, 6001.0]])
+
+
+def test_helmert3d_fit():
+    rng = np.random.default_rng(2)
+    truth = Helmert3D.from_parameters(-120.5, 80.2, 55.0, scale_ppm=4.5, rx=1e-5, ry=-2e-5, rz=3e-5)
+    source = rng.uniform(-1e4, 1e4, (30, 3)) + (4.0e6, 3.0e6, 4.5e6)
+    fitted = Helmert3D.fit(source, truth.apply(source))
+    assert fitted.scale == pytest.approx(truth.scale, abs=1e-10)
+    assert fitted.angles == pytest.approx((1e-5, -2e-5, 3e-5), abs=1e-10)
+    np.testing.assert_allclose(fitted.apply(source), truth.apply(source), atol=1e-4)
+    np.testing.assert_allclose(fitted.inverse().apply(fitted.apply(source)), source, atol=1e-6)
+
+
+def test_transform_csv_in_chunks(tmp_path):
+    source, target = tmp_path / 'local.csv', tmp_path / 'project.csv'
+    xy = np.arange(20.0).reshape(10, 2)
+    lines = ['name,x,y,code'] + [f'P{i},{x},{y},TS' for i, (x, y) in enumerate(xy)]
+    source.write_text('\n'.join(lines) + '\n')
+    transform = Helmert2D(10.0, 20.0, 1.0, np.pi)
+    assert transform_csv(source, target, transform.apply, chunk_size=3) == 10
+
+    chunks = list(read_points_csv(target, name_column='name', chunk_size=4))
+    assert [len(names) for names, _ in chunks] == [4, 4, 2]
+    assert chunks[0][0][0] == 'P0'
+    np.testing.assert_allclose(np.vstack([x for _, x in chunks]), transform.apply(xy), atol=1e-9)
+    assert target.read_text().splitlines()[1].endswith(',TS')
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from mat_ceng.column import (Material, Section_Dimensions, Load_Case,
+                             calculate_column_actual_moment_of_inertia,
+                             calculate_section_actual_moment_of_inertia)
+from mat_ceng.utils.geometry_helpers import loop_properties
+
+
+def test_polygon_sections_match_rectangular_columns():
+    material = Material()
+    loads = [Load_Case(Pu=6e6, Pu_sustained=4e6, Mu_22=150e6, Mu_33=400e6),
+             Load_Case(Pu=-1e5, Pu_sustained=0, Mu_22=10e6, Mu_33=10e6)]
+    # 900 deep along the local axis 2 (global x), 400 wide along the local axis 3
+    outline = np.array([[0.0, 0.0], [900.0, 0.0], [900.0, 400.0], [0.0, 400.0]])
+    sections = loop_properties([outline, outline])
+    result = calculate_section_actual_moment_of_inertia(
+        material, sections, 0.02, [x.Pu for x in loads], [x.Mu_22 for x in loads], [x.Mu_33 for x in loads])
+    for i, load in enumerate(loads):
+        expected = calculate_column_actual_moment_of_inertia(material, Section_Dimensions(400, 900, 40, 0.02), load)
+        assert (result['moment_of_inertia'][0][i], result['moment_of_inertia'][1][i]) == pytest.approx(
+            expected['moment_of_inertia'])
+        assert (result['ratio'][0][i], result['ratio'][1][i]) == pytest.approx(expected['ratio'])
+
+
+def test_moments_are_resolved_onto_the_principal_axes():
+    material = Material()
+    Pu, Mu_22, Mu_33 = [5e6, 4e6], [900e6, -1200e6], [1500e6, 600e6]
+    # T section, flange along x, principal axes along x and y
+    tee = np.array([[-600.0, 0.0], [600.0, 0.0], [600.0, 250.0], [150.0, 250.0], [150.0, 900.0],
+                    [-150.0, 900.0], [-150.0, 250.0], [-600.0, 250.0]])
+    rotation = np.radians(30.0)
+    R = np.array([[np.cos(rotation), -np.sin(rotation)], [np.sin(rotation), np.cos(rotation)]])
+    sections = loop_properties([tee, tee])
+    rotated = loop_properties([tee @ R.T, tee @ R.T])
+    assert rotated.I1 == pytest.approx(sections.I1)
+
+    expected = calculate_section_actual_moment_of_inertia(material, sections, 0.02, Pu, Mu_22, Mu_33)
+    # section and frame local axes rotated together
+    result = calculate_section_actual_moment_of_inertia(material, rotated, 0.02, Pu, Mu_22, Mu_33,
+                                                        local_axis_angle=30.0)
+    for i in range(2):
+        np.testing.assert_allclose(result['moment_of_inertia'][i], expected['moment_of_inertia'][i], rtol=1e-9)
+    # local axes along x / y on the rotated section: the moments mix
+    mixed = calculate_section_actual_moment_of_inertia(material, rotated, 0.02, Pu, Mu_22, Mu_33)
+    assert not np.allclose(np.concatenate(mixed['ratio']), np.concatenate(expected['ratio']))
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import mat_ceng.csi as csi
+from mat_ceng.csi import CsiHelper
+
+
+class FakeBackend:
+    '''
+    stands in for the ETABS SapModel; remembers the thread it was created on
+    and refuses calls from any other thread, like a pythonnet COM object
+    '''
+    def __init__(self):
+        self.owner = threading.get_ident()
+        self.calls = []
+
+    def AddPoint(self, x, y, z):
+        if threading.get_ident() != self.owner:
+            raise RuntimeError('COM object used from another thread')
+        self.calls.append((x, y, z))
+        return len(self.calls)
+
+
+@pytest.fixture
+def worker():
+    CsiHelper.start_worker()
+    yield CsiHelper
+    CsiHelper.stop_worker(release=False)
+
+
+def test_submit_runs_on_the_worker_thread(worker):
+    backend = worker.call(FakeBackend)
+    assert backend.owner != threading.get_ident()
+    futures = [worker.submit(backend.AddPoint, i, 0.0, 0.0) for i in range(20)]
+    assert [f.result(timeout=5) for f in futures] == list(range(1, 21))
+    with pytest.raises(RuntimeError):
+        backend.AddPoint(0.0, 0.0, 0.0) # direct call from the main thread
+
+
+def test_submit_propagates_exceptions(worker):
+    def failing():
+        raise ValueError('bad unit')
+    with pytest.raises(ValueError, match='bad unit'):
+        worker.submit(failing).result(timeout=5)
+    assert worker.call(lambda: 'still alive') == 'still alive'
+
+
+def test_asubmit_overlaps_with_python_work(worker):
+    backend = worker.call(FakeBackend)
+    started = threading.Event()
+
+    def add_point(i):
+        started.set()
+        return backend.AddPoint(i, 0.0, 0.0)
+
+    async def main():
+        pending = [worker.asubmit(add_point, i) for i in range(5)]
+        # the worker runs the requests before the coroutine awaits them
+        overlapped = started.wait(timeout=5)
+        return overlapped, await asyncio.gather(*pending)
+
+    overlapped, results = asyncio.run(main())
+    assert overlapped
+    assert results == [1, 2, 3, 4, 5]
+
+
+def test_stop_worker_resolves_queued_and_rejects_new_requests():
+    CsiHelper.start_worker()
+    release = threading.Event()
+    blocked = CsiHelper.submit(release.wait, 5)
+    queued = CsiHelper.submit(lambda: 'queued')
+    stopper = threading.Thread(target=CsiHelper.stop_worker, kwargs={'release': False})
+    stopper.start()
+    while not CsiHelper._stopping:
+        time.sleep(0.001)
+    with pytest.raises(RuntimeError):
+        CsiHelper.submit(lambda: 'too late')
+    release.set()
+    stopper.join(timeout=5)
+    assert blocked.result(timeout=5) is True and queued.result(timeout=5) == 'queued'
+    assert not CsiHelper.worker_running()
+    assert CsiHelper.submit(lambda: 'inline').result() == 'inline'
+
+
+def test_stop_without_waiting_keeps_one_worker_thread():
+    CsiHelper.start_worker()
+    release = threading.Event()
+    old = CsiHelper._worker
+    blocked = CsiHelper.submit(release.wait, 5)
+    CsiHelper.stop_worker(release=False, wait=False)
+    # the old thread still drains the queue: no inline run, no second thread
+    with pytest.raises(RuntimeError):
+        CsiHelper.submit(threading.get_ident)
+    starter = threading.Thread(target=CsiHelper.start_worker)
+    starter.start()
+    starter.join(timeout=0.05)
+    assert starter.is_alive() and CsiHelper._worker is old
+    release.set()
+    starter.join(timeout=5)
+    assert blocked.result(timeout=5) is True and not old.is_alive()
+    assert CsiHelper._worker is not old and CsiHelper.call(threading.current_thread) is CsiHelper._worker
+    CsiHelper.stop_worker(release=False)
+    assert CsiHelper._worker is None and not CsiHelper._stopping
+
+
+def test_helpers_run_on_the_worker(worker, monkeypatch):
+    threads = []
+
+    class Groups:
+        def GetNameList(self, **kwargs):
+            threads.append(threading.get_ident())
+            return (0, 1, ['All'])
+
+    class SapModel:
+        GroupDef = Groups()
+
+    monkeypatch.setattr(CsiHelper, 'connect_to_etabs', classmethod(lambda cls, unit=None: SapModel()))
+    assert csi.get_etabs_groups() == ['All']
+    assert threads == [worker._worker.ident]
+
+
+def test_submit_without_worker_runs_inline():
+    assert not CsiHelper.worker_running()
+    future = CsiHelper.submit(threading.get_ident)
+    assert future.done()
+    assert future.result() == threading.get_ident()
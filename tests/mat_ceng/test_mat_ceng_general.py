@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+import mat_ceng
+
+
+def run_isolated(code:str) -> str:
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def test_import_does_not_load_heavy_modules():
+    code = (
+        'import sys, logging, mat_ceng\n'
+        'heavy = ["mat_ceng.csi", "mat_ceng.column_area", "clr", "shapely", "pandas"]\n'
+        'print([x for x in heavy if x in sys.modules], len(logging.getLogger().handlers))'
+    )
+    assert run_isolated(code) == '[] 0'
+
+
+def test_lazy_attributes_resolve_on_access():
+    assert mat_ceng.csi.CsiHelper is not None
+    assert callable(mat_ceng.get_column_area_loads)
+    assert 'csi' in dir(mat_ceng)
+
+
+def test_csi_import_leaves_root_logger_alone():
+    code = (
+        'import logging, mat_ceng.csi_interop\n'
+        'print(len(logging.getLogger().handlers), logging.getLogger().level == logging.WARNING)'
+    )
+    assert run_isolated(code) == '0 True'
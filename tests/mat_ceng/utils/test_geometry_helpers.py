@@ -0,0 +1,99 @@
+import json
+import pathlib
+
+import numpy as np
+
+from mat_ceng.revit_interop.element_store import load_element_stores
+from mat_ceng.utils.geometry_helpers import PointSnapper, snap_points, simplify_loops, loop_properties, polygon_properties
+
+test_data_folder = pathlib.Path(__file__).parents[3] / 'notebooks' / 'modeling_from_revit' / 'test_data'
+
+
+def get_nearest_point(pnt, pnt_list, min_distance = 500.0, epsilon = 0.1):
+    # reference implementation from the columns_to_etabs notebook
+    distances = [sum((a - b)**2 for a, b in zip(pnt, x))**0.5 for x in pnt_list]
+    distances = [x if x >= epsilon else 1.0e9 for x in distances]
+    near_pnt = min(zip(distances, pnt_list))
+    return near_pnt[1] if near_pnt[0] <= min_distance else pnt
+
+
+def test_snap_matches_reference():
+    rng = np.random.default_rng(7)
+    targets = rng.uniform(0, 20_000, size=(300, 3)).round(-2)
+    points = np.vstack([
+        targets[:20], # already on a joint
+        targets[20:60] + rng.uniform(-300, 300, size=(40, 3)),
+        rng.uniform(0, 20_000, size=(40, 3)),
+    ])
+    expected = np.array([get_nearest_point(tuple(p), [tuple(t) for t in targets]) for p in points])
+    np.testing.assert_allclose(snap_points(points, targets), expected)
+
+
+def test_snap_skips_coincident_duplicates():
+    targets = np.array([[0.0, 0.0, 0.0]] * 6 + [[400.0, 0.0, 0.0], [2000.0, 0.0, 0.0]])
+    result = PointSnapper(targets, neighbours=2).snap([[0.0, 0.0, 0.0], [1000.0, 0.0, 0.0]])
+    np.testing.assert_allclose(result.points, [[400.0, 0.0, 0.0], [1000.0, 0.0, 0.0]])
+    assert result.target_index.tolist() == [6, -1]
+
+
+def test_simplify_matches_douglas_peucker():
+    t = np.linspace(0.0, 2.0 * np.pi, 301)
+    circle = np.column_stack([1000.0 * np.cos(t), 1000.0 * np.sin(t)])
+    circle[-1] = circle[0]
+    square = np.array([[0.0, 0.0], [5.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0], [0.0, 0.0]])
+    line = np.array([[0.0, 0.0], [1.0, 0.001], [2.0, 0.0]])
+    result = simplify_loops([circle, square, line], tolerance=1.0)
+    assert result.counts.tolist() == [109, 5, 2]
+    np.testing.assert_allclose(result[1], square[[0, 2, 3, 4, 5]])
+    assert result.max_deviation[0] <= 1.0 and result.max_deviation[2] == 0.001
+    assert 0.6 < result.reduction < 0.65
+
+
+def test_simplify_keeps_rings_valid():
+    # a tiny ring stays a polygon whatever the tolerance
+    ring = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0], [0.0, 0.0]])
+    result = simplify_loops([ring], tolerance=100.0)
+    assert len(np.unique(result[0], axis=0)) >= 3
+    np.testing.assert_allclose(result[0][0], result[0][-1])
+
+
+def test_polygon_properties():
+    rectangle = np.array([[0.0, 0.0], [400.0, 0.0], [400.0, 800.0], [0.0, 800.0]]) + 1e6
+    angle = np.radians(30)
+    rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    l_shape = [[0, 0], [600, 0], [600, 200], [200, 200], [200, 600], [0, 600], [0, 0]]
+    t = np.linspace(0, 2 * np.pi, 721)[:-1]
+    circle = 300 * np.column_stack([np.cos(t), np.sin(t)])
+    # clockwise, rotated copy of the rectangle
+    properties = loop_properties([rectangle, rectangle[::-1] @ rotation.T, l_shape, circle])
+
+    np.testing.assert_allclose(properties.area[:3], [320000, 320000, 200000])
+    np.testing.assert_allclose(properties.centroid[0], [1e6 + 200, 1e6 + 400])
+    np.testing.assert_allclose(properties.centroid[2], [220, 220])
+    np.testing.assert_allclose(properties.I1[:2], 400 * 800 ** 3 / 12)
+    np.testing.assert_allclose(properties.I2[:2], 400 ** 3 * 800 / 12)
+    np.testing.assert_allclose(properties.angle[:3], [0, angle, np.pi / 4], atol=1e-9)
+    np.testing.assert_allclose([properties.depth_1[1], properties.depth_2[1]], [800, 400])
+    np.testing.assert_allclose(properties.I1[3], np.pi * 300 ** 4 / 4, rtol=1e-4)
+
+
+def test_loop_properties_of_the_exported_column_outlines():
+    with open(test_data_folder / 'column_data.json') as file:
+        columns = json.load(file)
+    properties = loop_properties([x[1]['cross_section_coord'] for x in columns])
+    assert len(properties) == len(columns)
+    # closed rectangles (5 points) of b x h
+    b, h = np.array([[x[1]['b'], x[1]['h']] for x in columns]).T
+    rectangle = np.array([len(x[1]['cross_section_coord']['x']) == 5 for x in columns])
+    assert rectangle.sum() > 300
+    np.testing.assert_allclose(properties.area[rectangle], (b * h)[rectangle])
+    np.testing.assert_allclose(properties.I1[rectangle], (np.maximum(b, h) ** 3 * np.minimum(b, h) / 12)[rectangle])
+    # the principal axes of a square are not unique
+    oblong = rectangle & (b != h)
+    np.testing.assert_allclose(properties.depth_1[oblong], np.maximum(b, h)[oblong])
+    # same result from the ragged buffers of the ElementStore
+    store = load_element_stores(test_data_folder, kinds=['column'])['column']
+    x, y = store['cross_section_coord.x'], store['cross_section_coord.y']
+    from_store = polygon_properties(np.column_stack([x.values, y.values]), x.offsets)
+    np.testing.assert_allclose(from_store.area, properties.area)
+    np.testing.assert_allclose(from_store.centroid, properties.centroid)